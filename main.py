@@ -1,29 +1,64 @@
+import argparse
 import sys
-from PyQt6.QtWidgets import QApplication
-import tkinter as tk
 
-from stellar.gui import GUI_ENGINES
+from stellar.gui import DEFAULT_ENGINE, GUI_ENGINES, load_engine
 from stellar.settings.config import config
-from stellar.utils.logger import StellarLogger
+from stellar.utils.logger import StellarLogger, enable_tracing, set_tracing
+from stellar.utils.metrics import metrics
 
 logger = StellarLogger("stellar-term")
 
-if __name__ == "__main__":
-    gui_engine = config.gui_engine
-    StellarApp = GUI_ENGINES.get(gui_engine, "pyqt")
 
-    logger.info(f"Using {gui_engine if gui_engine else 'pyqt'} gui engine")
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stellar terminal emulator")
+    parser.add_argument(
+        "--stats-json", metavar="PATH", help="write frame and stage timings to PATH on exit"
+    )
+    parser.add_argument("--hud", action="store_true", help="show the performance overlay")
+    # Anything else is left for the GUI toolkit (e.g. Qt's -platform)
+    args, toolkit_args = parser.parse_known_args()
+    if args.stats_json:
+        metrics.dump_on_exit(args.stats_json)
+    if args.hud:
+        config.show_hud = True
+
+    # Tracing can also be switched at runtime by editing [logging] trace
+    enable_tracing(*config.trace_subsystems)
+    config.subscribe(
+        lambda changed: set_tracing(changed["trace_subsystems"]), keys=["trace_subsystems"]
+    )
+
+    gui_engine = config.gui_engine or DEFAULT_ENGINE
+    if gui_engine not in GUI_ENGINES:
+        logger.warning(f"Unknown gui engine {gui_engine!r}, falling back to {DEFAULT_ENGINE}")
+        gui_engine = DEFAULT_ENGINE
+
+    # Only the selected engine's toolkit is imported
+    StellarApp = load_engine(gui_engine)
+    logger.info(f"Using {gui_engine} gui engine")
+
     if gui_engine == "pyqt":
-        app = QApplication(sys.argv)  # Create the QApplication instance
+        from PyQt6.QtWidgets import QApplication
+
+        app = QApplication([sys.argv[0], *toolkit_args])  # Create the QApplication instance
         window = StellarApp()  # Create the main window (TerminalApp)
         window.show()  # Display the window
         sys.exit(app.exec())  # Run the application event loop
     elif gui_engine == "tkinter":
+        import tkinter as tk
+
         root = tk.Tk()
         root.title("Tkinter Terminal Emulator")
         app = StellarApp(master=root)
         app.start_process()
-        root.mainloop()
-    elif gui_engine == "dearpygui":
+        try:
+            root.mainloop()
+        finally:
+            app.close()
+    else:
         app = StellarApp()
         app.run()
+
+
+if __name__ == "__main__":
+    main()
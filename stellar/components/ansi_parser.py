@@ -1,15 +1,25 @@
 import re
-from typing import List, Tuple, Dict, Union
-from functools import lru_cache
-import numpy as np
+from typing import Hashable, List, Tuple, Dict, Union
 
-from stellar.components.ansi import ANSI_COLORS
-from stellar.settings.config import Config
+from stellar.settings.themes import DEFAULT_BG, DEFAULT_FG
+from stellar.utils.logger import tracer
+
+trace = tracer("parser")
+
+# A cell color: a palette index (see stellar.settings.themes) or truecolor RGB
+Color = Union[int, Tuple[int, int, int]]
 
 
 class ANSIParser:
+    """
+    Splits terminal output into styled runs.
+
+    Colors are kept as palette indices and only truecolor (SGR 38;2/48;2) is
+    stored as RGB, so parsed output does not depend on the theme; backends
+    resolve colors with Theme.resolve() when painting.
+    """
+
     def __init__(self):
-        self.theme = Config().theme
         self.reset_attributes()
         self.escape_sequence_pattern = re.compile(
             r"\x1b(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])|[\u0080-\u009F]"
@@ -18,7 +28,7 @@ class ANSIParser:
         self.cursor_y = 0
 
         self.sgr_pattern = re.compile(r"\x1b\[([0-9;]*)m")
-        self.cursor_pattern = re.compile(r"\x1b\[([0-9;]*)([ABCDEFGHJ])")
+        self.cursor_pattern = re.compile(r"\x1b\[([0-9;]*)([ABCDEFGHJf])")
 
         # New attributes for title and CWD
         self.terminal_title = ""
@@ -28,90 +38,22 @@ class ANSIParser:
         self.title_pattern = re.compile(r"\x1b]0;(.*?)\x07")
         self.cwd_pattern = re.compile(r"\x1b]7;file://(.*?)\x07")
 
-        # Pre-compute color arrays
-        self.ansi_colors = self._compute_ansi_colors()
-        self.bright_ansi_colors = self._compute_bright_ansi_colors()
-
-        # Pre-compute 256-color palette
-        self.color_256 = self._generate_256_color_palette()
-
     def reset_attributes(self) -> None:
-        self.foreground_color = np.array(
-            self.theme.hex_to_rgb(self.theme.get_default_fg()), dtype=np.uint8
-        )
-        self.background_color = np.array(
-            self.theme.hex_to_rgb(self.theme.get_default_bg()), dtype=np.uint8
-        )
+        self.foreground_color: Color = DEFAULT_FG
+        self.background_color: Color = DEFAULT_BG
         self.bold = self.italic = self.underline = False
+        self._style_key = None
 
-    @lru_cache(maxsize=None)
-    def _compute_ansi_colors(self):
-        return np.array(
-            [
-                self.theme.hex_to_rgb(self.theme.get_normal_color(color))
-                for color in [
-                    ANSI_COLORS.BLACK,
-                    ANSI_COLORS.RED,
-                    ANSI_COLORS.GREEN,
-                    ANSI_COLORS.YELLOW,
-                    ANSI_COLORS.BLUE,
-                    ANSI_COLORS.MAGENTA,
-                    ANSI_COLORS.CYAN,
-                    ANSI_COLORS.WHITE,
-                ]
-            ],
-            dtype=np.uint8,
-        )
-
-    @lru_cache(maxsize=None)
-    def _compute_bright_ansi_colors(self):
-        return np.array(
-            [
-                self.theme.hex_to_rgb(self.theme.get_bright_color(color))
-                for color in [
-                    ANSI_COLORS.BLACK,
-                    ANSI_COLORS.RED,
-                    ANSI_COLORS.GREEN,
-                    ANSI_COLORS.YELLOW,
-                    ANSI_COLORS.BLUE,
-                    ANSI_COLORS.MAGENTA,
-                    ANSI_COLORS.CYAN,
-                    ANSI_COLORS.WHITE,
-                ]
-            ],
-            dtype=np.uint8,
-        )
-
-    @lru_cache(maxsize=None)
-    def _generate_256_color_palette(self) -> np.ndarray:
-        palette = np.zeros((256, 3), dtype=np.uint8)
-        # Standard 16 colors
-        palette[:16] = np.vstack(
-            (self._compute_ansi_colors(), self._compute_bright_ansi_colors())
-        )
-        # 216 color cube
-        r = np.repeat(np.arange(0, 6, dtype=np.uint8), 36).reshape(-1, 1) * 51
-        g = (
-            np.tile(np.repeat(np.arange(0, 6, dtype=np.uint8), 6), 6).reshape(-1, 1)
-            * 51
-        )
-        b = np.tile(np.arange(0, 6, dtype=np.uint8), 36).reshape(-1, 1) * 51
-        palette[16:232] = np.hstack((r, g, b))
-        # 24 grayscale colors
-        gray = np.arange(8, 248, 10, dtype=np.uint8).reshape(-1, 1)
-        palette[232:] = np.repeat(gray, 3, axis=1)
-        return palette
-
-    def parse(self, text: str) -> List[Tuple[str, Dict[str, Union[bool, np.ndarray]]]]:
+    def parse(self, text: str) -> List[Tuple[str, Dict[str, Union[bool, Color]]]]:
         # Process title and CWD before other parsing
-        print("Text before clan: ", text)
+        trace.debug("Text before clean: %r", text)
         self.process_title_and_cwd(text)
 
         # Remove title and CWD sequences from text
         text = self.title_pattern.sub("", text)
         text = self.cwd_pattern.sub("", text)
 
-        print("Text after clan: ", text)
+        trace.debug("Text after clean: %r", text)
         parsed_text = []
         last_end = 0
 
@@ -128,6 +70,40 @@ class ANSIParser:
 
         return parsed_text
 
+    def tokenize(self, text: str) -> List[Tuple[Union[str, None], Hashable]]:
+        """
+        Splits output into styled text runs and line-editing controls, in order.
+
+        Text runs are returned as (text, style key). The CSI sequences that edit
+        the current line (EL "K", CUF "C", CUB "D", CHA "G") are returned as
+        (None, (command, n)) with n None when omitted, so a line model can apply
+        carriage returns and erases in place.
+        """
+        self.process_title_and_cwd(text)
+        text = self.title_pattern.sub("", text)
+        text = self.cwd_pattern.sub("", text)
+
+        tokens = []
+        last_end = 0
+        for match in self.escape_sequence_pattern.finditer(text):
+            if match.start() > last_end:
+                tokens.append(
+                    (text[last_end : match.start()], self.get_current_style_key())
+                )
+            sequence = match.group()
+            if sequence.startswith("\x1b[") and sequence[-1] in "KCDG":
+                param = sequence[2:-1].split(";")[0]
+                tokens.append(
+                    (None, (sequence[-1], int(param) if param.isdigit() else None))
+                )
+            self.process_escape_sequence(sequence)
+            last_end = match.end()
+
+        if last_end < len(text):
+            tokens.append((text[last_end:], self.get_current_style_key()))
+
+        return tokens
+
     def process_title_and_cwd(self, text: str) -> None:
         # Process terminal title
         title_match = self.title_pattern.search(text)
@@ -147,28 +123,33 @@ class ANSIParser:
 
     def process_escape_sequence(self, sequence: str) -> None:
         if sequence.startswith("\x1b["):
+            # Private-mode variants like "\x1b[?25h" or "\x1b[>4;1m" don't match
+            # the patterns and are ignored
             if sequence[-1] == "m":
-                self.process_sgr_params(
-                    self.sgr_pattern.match(sequence).group(1).split(";")
-                )
-            elif sequence[-1] in "ABCDEFGHJ":
-                params, command = self.cursor_pattern.match(sequence).groups()
-                self.process_cursor_command(params.split(";"), command)
+                match = self.sgr_pattern.match(sequence)
+                if match:
+                    self.process_sgr_params(match.group(1).split(";"))
+            elif sequence[-1] in "ABCDEFGHJf":
+                match = self.cursor_pattern.match(sequence)
+                if match:
+                    params, command = match.groups()
+                    self.process_cursor_command(params.split(";"), command)
 
     def process_sgr_params(self, params: List[str]) -> None:
+        self._style_key = None
         i = 0
         while i < len(params):
             param = params[i]
             if param in ("38", "48"):
                 i = self.process_color_param(params, i)
             else:
-                self.process_sgr_param(int(param))
+                self.process_sgr_param(int(param or 0))
             i += 1
 
     def process_color_param(self, params: List[str], i: int) -> int:
         if i + 1 < len(params):
             if params[i + 1] == "5" and i + 2 < len(params):
-                color = self.color_256[int(params[i + 2])]
+                color = min(int(params[i + 2] or 0), 255)
                 setattr(
                     self,
                     f"{'foreground' if params[i] == '38' else 'background'}_color",
@@ -176,7 +157,7 @@ class ANSIParser:
                 )
                 return i + 2
             elif params[i + 1] == "2" and i + 4 < len(params):
-                color = np.array(list(map(int, params[i + 2 : i + 5])), dtype=np.uint8)
+                color = tuple(min(int(c or 0), 255) for c in params[i + 2 : i + 5])
                 setattr(
                     self,
                     f"{'foreground' if params[i] == '38' else 'background'}_color",
@@ -185,14 +166,6 @@ class ANSIParser:
                 return i + 4
         return i
 
-    @lru_cache(maxsize=1024)
-    def get_ansi_color(self, color_code: int, bright: bool = False) -> np.ndarray:
-        return (
-            self.bright_ansi_colors[color_code]
-            if bright
-            else self.ansi_colors[color_code]
-        )
-
     def process_sgr_param(self, param: int) -> None:
         if param == 0:
             self.reset_attributes()
@@ -203,15 +176,19 @@ class ANSIParser:
         elif param == 4:
             self.underline = True
         elif 30 <= param <= 37:
-            self.foreground_color = self.get_ansi_color(param - 30)
+            self.foreground_color = param - 30
         elif 40 <= param <= 47:
-            self.background_color = self.get_ansi_color(param - 40)
+            self.background_color = param - 40
         elif 90 <= param <= 97:
-            self.foreground_color = self.get_ansi_color(param - 90, bright=True)
+            self.foreground_color = param - 90 + 8
         elif 100 <= param <= 107:
-            self.background_color = self.get_ansi_color(param - 100, bright=True)
+            self.background_color = param - 100 + 8
+        elif param == 39:
+            self.foreground_color = DEFAULT_FG
+        elif param == 49:
+            self.background_color = DEFAULT_BG
 
-    def get_current_style(self) -> Dict[str, Union[bool, np.ndarray]]:
+    def get_current_style(self) -> Dict[str, Union[bool, Color]]:
         return {
             "foreground": self.foreground_color,
             "background": self.background_color,
@@ -220,6 +197,27 @@ class ANSIParser:
             "underline": self.underline,
         }
 
+    def get_current_style_key(self) -> tuple:
+        """Returns the style key of the current attributes, cached until SGR changes."""
+        if self._style_key is None:
+            self._style_key = self.style_key(self.get_current_style())
+        return self._style_key
+
+    @staticmethod
+    def style_key(style: Dict[str, Union[bool, Color]]) -> tuple:
+        """
+        Returns a hashable, picklable key for a style returned by parse():
+        (foreground, background, bold, italic, underline) with palette-index
+        or RGB-tuple colors.
+        """
+        return (
+            style["foreground"],
+            style["background"],
+            style["bold"],
+            style["italic"],
+            style["underline"],
+        )
+
     def process_cursor_command(self, params: List[str], command: str) -> None:
         n = int(params[0]) if params and params[0] else 1
         if command == "A":
@@ -238,13 +236,7 @@ class ANSIParser:
             self.cursor_x = 0
         elif command == "G":
             self.cursor_x = max(0, n - 1)
-        elif command == "H":
-            self.cursor_y = int(params[0]) - 1 if len(params) > 0 else 0
-            self.cursor_x = int(params[1]) - 1 if len(params) > 1 else 0
-
-    def clear_caches(self):
-        """Clear all LRU caches in case of theme changes."""
-        self._compute_ansi_colors.cache_clear()
-        self._compute_bright_ansi_colors.cache_clear()
-        self._generate_256_color_palette.cache_clear()
-        self.get_ansi_color.cache_clear()
+        elif command in "Hf":
+            # Omitted or empty parameters default to 1, e.g. "\x1b[H" or "\x1b[;5H"
+            self.cursor_y = int(params[0] or 1) - 1
+            self.cursor_x = int(params[1] or 1) - 1 if len(params) > 1 else 0
@@ -0,0 +1,213 @@
+import logging
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class GitState:
+    """
+    What the prompt shows for a repository.
+
+    Attributes:
+        root (str): The work tree root.
+        branch (str): The branch name, or a short commit hash when detached.
+        dirty (bool | None): Whether the work tree has unstaged changes;
+            None until the first background check has finished.
+    """
+
+    root: str
+    branch: str
+    dirty: bool | None = None
+
+
+@dataclass
+class _Repository:
+    git_dir: str
+    state: GitState
+    head_stamp: int | None = None
+    index_stamp: int | None = None
+    checked_at: float = 0.0
+    checking: bool = False
+
+
+def find_repository(path: str) -> tuple[str, str] | None:
+    """
+    Walks up from `path` to the enclosing work tree.
+
+    Args:
+        path (str): A directory inside the work tree.
+
+    Returns:
+        tuple[str, str] | None: (work tree root, git dir), or None outside a
+            repository. Worktrees and submodules, whose `.git` is a file holding
+            `gitdir: <path>`, resolve to the git dir it points at.
+    """
+    path = os.path.abspath(path)
+    while True:
+        dot_git = os.path.join(path, ".git")
+        if os.path.isdir(dot_git):
+            return path, dot_git
+        if os.path.isfile(dot_git):
+            try:
+                with open(dot_git, "r") as f:
+                    line = f.readline().strip()
+            except OSError:
+                return None
+            if line.startswith("gitdir:"):
+                git_dir = line[len("gitdir:") :].strip()
+                return path, os.path.normpath(os.path.join(path, git_dir))
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+
+def read_head(git_dir: str) -> str:
+    """
+    Reads the checked out branch from HEAD without running git.
+
+    Returns:
+        str: The branch name, a short hash for a detached HEAD, or "" if HEAD
+            cannot be read.
+    """
+    try:
+        with open(os.path.join(git_dir, "HEAD"), "r") as f:
+            head = f.readline().strip()
+    except OSError:
+        return ""
+    if head.startswith("ref:"):
+        ref = head[len("ref:") :].strip()
+        return ref.removeprefix("refs/heads/")
+    return head[:7]
+
+
+def mtime(path: str) -> int | None:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class GitStatusCache:
+    """
+    Git state for the prompt, cached per repository root.
+
+    The branch is re-read from HEAD only when the mtime of `.git/HEAD` changes.
+    The dirty check (`git diff --quiet`) can take hundreds of milliseconds in a
+    large repository, so it runs on a background worker: `status()` always
+    returns immediately with the last known state and schedules a check when
+    `.git/index` changed or the last check is older than `max_age`. Edits to the
+    work tree do not touch the index, hence the age limit.
+
+    Args:
+        timeout (float): Seconds before a dirty check is abandoned; the
+            previous state is kept.
+        max_age (float): Seconds a dirty result is trusted while the index is
+            unchanged.
+    """
+
+    def __init__(self, timeout: float = 2.0, max_age: float = 5.0) -> None:
+        self.timeout = timeout
+        self.max_age = max_age
+        self.repositories: dict[str, _Repository] = {}
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="git-status")
+
+    def status(
+        self,
+        path: str | None = None,
+        on_update: Callable[[GitState], None] | None = None,
+    ) -> GitState | None:
+        """
+        Returns the git state for a directory without waiting on git.
+
+        Args:
+            path (str | None): The directory; defaults to the working directory.
+            on_update (Callable[[GitState], None] | None): Called from the worker
+                thread if a scheduled dirty check changes the state.
+
+        Returns:
+            GitState | None: The last known state, or None outside a repository.
+        """
+        found = find_repository(path or os.getcwd())
+        if found is None:
+            return None
+        root, git_dir = found
+
+        head_stamp = mtime(os.path.join(git_dir, "HEAD"))
+        index_stamp = mtime(os.path.join(git_dir, "index"))
+        with self.lock:
+            repository = self.repositories.get(root)
+            if repository is None:
+                repository = _Repository(git_dir, GitState(root, ""))
+                self.repositories[root] = repository
+            if repository.head_stamp != head_stamp or not repository.state.branch:
+                repository.state.branch = read_head(git_dir)
+                repository.head_stamp = head_stamp
+
+            stale = (
+                repository.index_stamp != index_stamp
+                or time.monotonic() - repository.checked_at > self.max_age
+            )
+            if stale and not repository.checking:
+                repository.checking = True
+                repository.index_stamp = index_stamp
+                self.executor.submit(self._check_dirty, repository, on_update)
+            return GitState(root, repository.state.branch, repository.state.dirty)
+
+    def _check_dirty(
+        self, repository: _Repository, on_update: Callable[[GitState], None] | None
+    ) -> None:
+        root = repository.state.root
+        start = time.perf_counter()
+        try:
+            result = subprocess.run(
+                ["git", "diff", "--quiet", "--ignore-submodules"],
+                cwd=root,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                timeout=self.timeout,
+            )
+            dirty = result.returncode != 0
+        except subprocess.TimeoutExpired:
+            logger.warning(f"git diff timed out after {self.timeout}s in {root}")
+            dirty = None
+        except OSError as e:
+            logger.error(f"Failed to run git in {root}: {e}")
+            dirty = None
+        logger.debug(f"git diff in {root} took {time.perf_counter() - start:.3f}s")
+
+        with self.lock:
+            repository.checking = False
+            repository.checked_at = time.monotonic()
+            if dirty is None or dirty == repository.state.dirty:
+                return
+            repository.state.dirty = dirty
+            state = GitState(root, repository.state.branch, dirty)
+        if on_update is not None:
+            on_update(state)
+
+    def invalidate(self, path: str | None = None) -> None:
+        """Forces a dirty check on the next status() call, e.g. after a command ran."""
+        found = find_repository(path or os.getcwd())
+        if found is None:
+            return
+        with self.lock:
+            repository = self.repositories.get(found[0])
+            if repository is not None:
+                repository.checked_at = 0.0
+
+
+git_status = GitStatusCache()
+
+if __name__ == "__main__":
+    print(git_status.status())
+    time.sleep(0.5)
+    print(git_status.status())
@@ -1,8 +1,9 @@
 from stellar.settings.config import config
 import time
 import os
-import subprocess
 import getpass
+from stellar.components.ansi import ANSI_COLORS
+from stellar.components.git_status import GitState, git_status
 from stellar.plugins.manager import PluginManager
 
 
@@ -66,31 +67,44 @@ class Prompt:
         """
         Format the prompt as a list of text segments and their associated colors.
 
+        The git segment comes from the shared GitStatusCache, so formatting never
+        waits on git; a finished background check re-formats the prompt.
+
         Returns:
             list[tuple[str, str]]: A list of tuples where each tuple contains
             a string and its associated color.
         """
         # Get colors from the theme
-        arrow_color = self.theme.get_bright_color("blue")
-        dir_color = self.theme.get_bright_color("green")
-        git_label_color = self.theme.get_bright_color("blue")
-        git_branch_color = self.theme.get_bright_color("red")
-        status_color = self.get_git_status_color()  # Dynamic based on git status
-
-        # Get Git status symbol
-        git_status_symbol = self.get_git_status_symbol()
+        arrow_color = self.theme.get_bright_color(ANSI_COLORS.BLUE)
+        dir_color = self.theme.get_bright_color(ANSI_COLORS.GREEN)
+        git_label_color = self.theme.get_bright_color(ANSI_COLORS.BLUE)
+        git_branch_color = self.theme.get_bright_color(ANSI_COLORS.RED)
 
-        # Return a list of (text, color) tuples
-        return [
+        segments = [
             ("➜ ", arrow_color),
             (self.get_shortened_dir() + " ", dir_color),
-            ("git:", git_label_color),
-            ("(", git_label_color),
-            (self.get_git_branch(), git_branch_color),
-            (") ", git_label_color),
-            (git_status_symbol, status_color),
-            (" ", ""),  # Adds some space between prompt and input
         ]
+        state = git_status.status(on_update=self.on_git_update)
+        if state is not None:
+            # One dirty check serves both the symbol and its color
+            segments += [
+                ("git:", git_label_color),
+                ("(", git_label_color),
+                (state.branch, git_branch_color),
+                (") ", git_label_color),
+                (self.get_git_status_symbol(state), self.get_git_status_color(state)),
+            ]
+        segments.append((" ", ""))  # Adds some space between prompt and input
+        return segments
+
+    def on_git_update(self, state: GitState):
+        """
+        Re-format the prompt once a background dirty check has finished.
+
+        Args:
+            state (GitState): The updated git state.
+        """
+        self.update()
 
     def get_time(self) -> str:
         """
@@ -150,53 +164,34 @@ class Prompt:
         Returns:
             str: The name of the current Git branch, or an empty string if not in a Git repo.
         """
-        try:
-            branch = (
-                subprocess.check_output(
-                    ["git", "rev-parse", "--abbrev-ref", "HEAD"],
-                    stderr=subprocess.DEVNULL,
-                )
-                .decode()
-                .strip()
-            )
-            return branch if branch else ""
-        except subprocess.CalledProcessError:
-            return ""
-
-    def get_git_status_symbol(self) -> str:
+        state = git_status.status()
+        return state.branch if state else ""
+
+    def get_git_status_symbol(self, state: GitState) -> str:
         """
         Get the Git status symbol based on whether there are changes in the repository.
-        Returns "✔" if no changes and "✗" if there are changes.
+
+        Args:
+            state (GitState): The repository's last known state.
 
         Returns:
-            str: "✔" if there are no changes, "✗" if there are changes.
+            str: "✔" if there are no changes, "✗" if there are changes, and
+            "…" while the first check is still running.
         """
-        try:
-            subprocess.check_call(
-                ["git", "diff", "--quiet", "--ignore-submodules"],
-                stderr=subprocess.DEVNULL,
-            )
-            # No changes, return green ✔ symbol
-            return "✔"
-        except subprocess.CalledProcessError:
-            # There are changes, return yellow ✗ symbol
-            return "✗"
+        if state.dirty is None:
+            return "…"
+        return "✗" if state.dirty else "✔"
 
-    def get_git_status_color(self) -> str:
+    def get_git_status_color(self, state: GitState) -> str:
         """
         Get the Git status color based on whether there are changes in the repository.
-        Returns green if no changes and yellow if there are changes.
+
+        Args:
+            state (GitState): The repository's last known state.
 
         Returns:
-            str: The ANSI color code for green if no changes, or yellow if there are changes.
-        """
-        try:
-            subprocess.check_call(
-                ["git", "diff", "--quiet", "--ignore-submodules"],
-                stderr=subprocess.DEVNULL,
-            )
-            # No changes, return green
-            return self.theme.get_bright_color("green")
-        except subprocess.CalledProcessError:
-            # There are changes, return yellow
-            return self.theme.get_bright_color("yellow")
+            str: Yellow if there are changes, green otherwise.
+        """
+        if state.dirty:
+            return self.theme.get_bright_color(ANSI_COLORS.YELLOW)
+        return self.theme.get_bright_color(ANSI_COLORS.GREEN)
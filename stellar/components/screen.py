@@ -0,0 +1,207 @@
+import re
+from itertools import groupby
+from typing import Hashable, Iterable
+
+from stellar.components.scrollback import Scrollback, ScrollbackLine
+from stellar.components.viewport import Viewport, ViewportRow
+
+# C0 controls that are handled by the line model; other control characters are dropped
+C0_CONTROLS = re.compile(r"[\x00-\x1f]")
+
+TAB_WIDTH = 8
+
+
+class CurrentLine:
+    """
+    The line the cursor is on, edited in place until a line feed commits it.
+
+    Characters and their style keys are kept in parallel lists indexed by column,
+    so carriage returns, backspaces, cursor moves and erase-in-line overwrite
+    cells instead of appending. A progress bar that redraws itself thousands of
+    times therefore only ever occupies one line's worth of memory.
+
+    Attributes:
+        chars (list[str]): The characters of the line, one per column.
+        styles (list[Hashable]): The style key of each column.
+        cursor (int): The column the next character is written to.
+    """
+
+    def __init__(self) -> None:
+        self.chars: list[str] = []
+        self.styles: list[Hashable] = []
+        self.cursor = 0
+        self.blank_style: Hashable = None
+
+    def write(self, text: str, style: Hashable) -> None:
+        """Writes text at the cursor, overwriting existing cells."""
+        column = self.cursor
+        self._pad(column, style)
+        self.chars[column : column + len(text)] = text
+        self.styles[column : column + len(text)] = [style] * len(text)
+        self.cursor = column + len(text)
+        self.blank_style = style
+
+    def _pad(self, column: int, style: Hashable) -> None:
+        """Fills the line with blanks up to `column`."""
+        missing = column - len(self.chars)
+        if missing > 0:
+            self.chars.extend(" " * missing)
+            self.styles.extend([style] * missing)
+
+    def carriage_return(self) -> None:
+        self.cursor = 0
+
+    def backspace(self) -> None:
+        self.cursor = max(0, self.cursor - 1)
+
+    def tab(self) -> None:
+        self.cursor = (self.cursor // TAB_WIDTH + 1) * TAB_WIDTH
+
+    def control(self, command: str, n: int | None) -> None:
+        """
+        Applies a line-editing CSI sequence.
+
+        Args:
+            command (str): "K" (erase in line), "C" (forward), "D" (back) or
+                "G" (column absolute).
+            n (int | None): The numeric parameter, or None when omitted.
+        """
+        if command == "K":
+            self.erase(n or 0)
+        elif command == "C":
+            self.cursor += n or 1
+        elif command == "D":
+            self.cursor = max(0, self.cursor - (n or 1))
+        elif command == "G":
+            self.cursor = max(0, (n or 1) - 1)
+
+    def erase(self, mode: int) -> None:
+        """
+        Erases part of the line without moving the cursor.
+
+        Args:
+            mode (int): 0 erases to the end of the line, 1 erases to the start
+                (inclusive) and 2 erases the whole line.
+        """
+        if mode == 0:
+            del self.chars[self.cursor :]
+            del self.styles[self.cursor :]
+        elif mode == 1:
+            end = min(self.cursor + 1, len(self.chars))
+            self.chars[:end] = " " * end
+            self.styles[:end] = [self.blank_style] * end
+        elif mode == 2:
+            self.chars.clear()
+            self.styles.clear()
+
+    def snapshot(self) -> ScrollbackLine:
+        """Returns the line as text with grouped style runs."""
+        return ScrollbackLine(
+            "".join(self.chars),
+            tuple((len(list(group)), style) for style, group in groupby(self.styles)),
+        )
+
+    def take(self) -> ScrollbackLine:
+        """Returns the line and starts a new, empty one."""
+        line = self.snapshot()
+        self.chars = []
+        self.styles = []
+        self.cursor = 0
+        return line
+
+
+class Screen:
+    """
+    Toolkit-independent model of terminal output.
+
+    Parsed tokens are applied to a CurrentLine, which handles CR, BS, TAB and
+    erase-in-line in place and is committed to the scrollback only on LF; a
+    Viewport selects which rows a backend shows.
+
+    Attributes:
+        scrollback (Scrollback): Committed lines.
+        viewport (Viewport): The visible window over the scrollback.
+        line (CurrentLine): The live, uncommitted line.
+    """
+
+    def __init__(self, scrollback: Scrollback, rows: int, cols: int) -> None:
+        self.scrollback = scrollback
+        self.viewport = Viewport(scrollback, rows, cols)
+        self.line = CurrentLine()
+
+    @property
+    def live_line(self) -> ScrollbackLine:
+        """The uncommitted line being written to."""
+        return self.line.snapshot()
+
+    def feed(self, tokens: Iterable[tuple[str | None, Hashable]]) -> int:
+        """
+        Applies parsed tokens, committing each completed line.
+
+        Args:
+            tokens (Iterable[tuple[str | None, Hashable]]): (text, style key) runs
+                and (None, (command, n)) line-editing controls, as produced by
+                ANSIParser.tokenize().
+
+        Returns:
+            int: The number of lines committed to the scrollback.
+        """
+        line = self.line
+        committed = 0
+        for text, style in tokens:
+            if text is None:
+                line.control(*style)
+                continue
+
+            position = 0
+            for match in C0_CONTROLS.finditer(text):
+                if match.start() > position:
+                    line.write(text[position : match.start()], style)
+                char = match.group()
+                if char == "\n":
+                    committed_line = line.take()
+                    self.scrollback.append(committed_line.text, committed_line.runs)
+                    committed += 1
+                elif char == "\r":
+                    line.carriage_return()
+                elif char == "\b":
+                    line.backspace()
+                elif char == "\t":
+                    line.tab()
+                position = match.end()
+            if position < len(text):
+                line.write(text[position:], style)
+
+        # The live line may have grown onto another row even without a commit
+        self.viewport.live_line = self.live_line
+        self.viewport.on_lines_appended()
+        return committed
+
+    def resize(self, rows: int, cols: int) -> None:
+        """Resizes the viewport; only the visible lines are reflowed right away."""
+        self.viewport.set_size(rows, cols)
+
+    def visible_rows(self) -> list[ViewportRow]:
+        """Returns the display rows currently inside the viewport."""
+        return self.viewport.visible_rows(self.live_line)
+
+    def visible_lines(self) -> list[ScrollbackLine]:
+        """Returns the content of the display rows inside the viewport."""
+        return self.viewport.visible_lines(self.live_line)
+
+    def first_changed_row(
+        self, old_rows: list[ViewportRow], new_rows: list[ViewportRow]
+    ) -> int:
+        """
+        Finds the first display row that differs between two renders.
+
+        Backends repaint from the returned row onward, so when only the live
+        line changed (a progress bar redrawing itself) only its rows are touched.
+
+        Returns:
+            int: Index of the first row to repaint.
+        """
+        for i, (old, new) in enumerate(zip(old_rows, new_rows)):
+            if old != new:
+                return i
+        return min(len(old_rows), len(new_rows))
@@ -0,0 +1,412 @@
+import lzma
+import pickle
+import threading
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Hashable, Iterator
+
+from stellar.components.spill import SpillFile
+
+# A style run covers `length` characters of a line with a hashable style key
+StyleRun = tuple[int, Hashable]
+
+# Codec name -> (compress, decompress)
+CODECS: dict[str, tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]] = {
+    "zlib": (lambda data: zlib.compress(data, 6), zlib.decompress),
+    "lzma": (lambda data: lzma.compress(data, preset=1), lzma.decompress),
+    "none": (lambda data: data, lambda data: data),
+}
+
+
+@dataclass(slots=True)
+class ScrollbackLine:
+    """A single committed line of terminal output and its style runs."""
+
+    text: str
+    runs: tuple[StyleRun, ...] = ()
+
+
+class ScrollbackBlock:
+    """
+    A fixed-size run of cold scrollback lines packed into one compressed payload.
+
+    Style keys are interned into a per-block table so that repeated styles are
+    serialized once, and runs refer to them by index.
+
+    Attributes:
+        first_line (int): Absolute index of the first line in the block.
+        line_count (int): Number of lines stored in the block.
+        codec (str): Name of the codec used for the payload (see CODECS).
+        payload (bytes): The compressed, pickled block contents.
+    """
+
+    __slots__ = ("first_line", "line_count", "codec", "payload")
+
+    def __init__(self, first_line: int, line_count: int, codec: str, payload: bytes):
+        self.first_line = first_line
+        self.line_count = line_count
+        self.codec = codec
+        self.payload = payload
+
+    @classmethod
+    def pack(
+        cls, first_line: int, lines: list[ScrollbackLine], codec: str = "zlib"
+    ) -> "ScrollbackBlock":
+        """
+        Packs lines into a compressed block.
+
+        Args:
+            first_line (int): Absolute index of the first line.
+            lines (list[ScrollbackLine]): The lines to pack.
+            codec (str): Codec name. Defaults to "zlib".
+
+        Returns:
+            ScrollbackBlock: The packed block.
+        """
+        styles: dict[Hashable, int] = {}
+        texts = []
+        runs = []
+        for line in lines:
+            texts.append(line.text)
+            runs.append(
+                tuple(
+                    (length, styles.setdefault(style, len(styles)))
+                    for length, style in line.runs
+                )
+            )
+        raw = pickle.dumps((texts, runs, list(styles)), pickle.HIGHEST_PROTOCOL)
+        compress, _ = CODECS[codec]
+        return cls(first_line, len(lines), codec, compress(raw))
+
+    def unpack(self) -> list[ScrollbackLine]:
+        """
+        Decompresses the block back into lines.
+
+        Returns:
+            list[ScrollbackLine]: The lines stored in the block.
+        """
+        _, decompress = CODECS[self.codec]
+        texts, runs, styles = pickle.loads(decompress(self.payload))
+        return [
+            ScrollbackLine(
+                text, tuple((length, styles[style]) for length, style in line_runs)
+            )
+            for text, line_runs in zip(texts, runs)
+        ]
+
+
+class Scrollback:
+    """
+    Line-oriented scrollback store with compressed cold history.
+
+    The newest `hot_lines` lines are kept as plain Python objects. Older lines
+    are packed `block_lines` at a time into compressed ScrollbackBlocks, which are
+    decompressed lazily when read and kept in a small LRU of decoded blocks.
+
+    When spilling is enabled, only the newest `max_ram_blocks` compressed blocks
+    stay in memory; older ones are appended to a per-session SpillFile and read
+    back through `mmap`, so history is unbounded while memory stays constant.
+
+    Appends and ranged reads are serialized by `lock`, so background readers
+    such as the search worker can use get_line() and get_lines() safely.
+
+    Attributes:
+        hot_lines (int): Number of recent lines kept uncompressed.
+        block_lines (int): Number of lines per compressed block.
+        compression (str): Codec used for cold blocks ("zlib", "lzma" or "none").
+        cache_blocks (int): Number of decompressed blocks kept in the LRU.
+        max_ram_blocks (int): Compressed blocks kept in memory before spilling.
+        spill (SpillFile | None): The on-disk store, or None when spilling is off.
+        listeners (list[Callable[[int, str], None]]): Called with the index and
+            text of every appended line.
+        clear_listeners (list[Callable[[], None]]): Called after clear(), so
+            anything keyed by line index can reset.
+    """
+
+    def __init__(
+        self,
+        hot_lines: int = 5000,
+        block_lines: int = 1024,
+        compression: str = "zlib",
+        cache_blocks: int = 8,
+        spill: bool = False,
+        max_ram_blocks: int = 64,
+        spill_dir: str | None = None,
+        keep_spill: bool = False,
+    ) -> None:
+        if compression not in CODECS:
+            raise ValueError(f"Unknown scrollback compression: {compression}")
+        self.hot_lines = hot_lines
+        self.block_lines = block_lines
+        self.compression = compression
+        self.cache_blocks = cache_blocks
+        self.max_ram_blocks = max_ram_blocks
+        self.spill_dir = spill_dir
+        self.keep_spill = keep_spill
+        self.spill: SpillFile | None = None
+        self.spill_enabled = spill
+
+        # Compressed blocks still held in memory; older ones live in self.spill
+        self.blocks: list[ScrollbackBlock] = []
+        self.spilled_blocks = 0
+        self.hot: list[ScrollbackLine] = []
+        self._cache: OrderedDict[int, list[ScrollbackLine]] = OrderedDict()
+
+        self.lock = threading.RLock()
+        self.listeners: list[Callable[[int, str], None]] = []
+        self.clear_listeners: list[Callable[[], None]] = []
+
+    @classmethod
+    def from_config(cls, config) -> "Scrollback":
+        """
+        Creates a Scrollback using the [scrollback] settings of a Config.
+
+        Args:
+            config (Config): The loaded configuration.
+
+        Returns:
+            Scrollback: A store configured from the settings.
+        """
+        return cls(
+            hot_lines=config.scrollback_hot_lines,
+            block_lines=config.scrollback_block_lines,
+            compression=config.scrollback_compression,
+            cache_blocks=config.scrollback_cache_blocks,
+            spill=config.scrollback_spill,
+            max_ram_blocks=config.scrollback_max_ram_blocks,
+            spill_dir=config.scrollback_spill_dir or None,
+            keep_spill=config.scrollback_keep_spill,
+        )
+
+    @property
+    def cold_line_count(self) -> int:
+        """Number of lines stored in compressed blocks, in memory or on disk."""
+        return (self.spilled_blocks + len(self.blocks)) * self.block_lines
+
+    def __len__(self) -> int:
+        return self.cold_line_count + len(self.hot)
+
+    def append(self, text: str, runs: tuple[StyleRun, ...] = ()) -> int:
+        """
+        Commits a line to the scrollback.
+
+        Args:
+            text (str): The line text, without the trailing newline.
+            runs (tuple[StyleRun, ...]): Style runs covering the text.
+
+        Returns:
+            int: The absolute index of the appended line.
+        """
+        with self.lock:
+            self.hot.append(ScrollbackLine(text, tuple(runs)))
+            if len(self.hot) >= self.hot_lines + self.block_lines:
+                self._freeze_oldest_block()
+            index = len(self) - 1
+        for listener in self.listeners:
+            listener(index, text)
+        return index
+
+    def add_listener(self, listener: Callable[[int, str], None]) -> None:
+        """
+        Registers a callback invoked with (index, text) for every appended line.
+
+        Args:
+            listener (Callable[[int, str], None]): The callback to register.
+        """
+        self.listeners.append(listener)
+
+    def add_clear_listener(self, listener: Callable[[], None]) -> None:
+        """
+        Registers a callback invoked after clear() has dropped every line.
+
+        Line indices restart at 0 afterwards, so indexes, caches and
+        highlights keyed by line index must be reset.
+
+        Args:
+            listener (Callable[[], None]): The callback to register.
+        """
+        self.clear_listeners.append(listener)
+
+    def _freeze_oldest_block(self) -> None:
+        """Packs the oldest `block_lines` hot lines into a compressed block."""
+        lines = self.hot[: self.block_lines]
+        del self.hot[: self.block_lines]
+        self.blocks.append(
+            ScrollbackBlock.pack(self.cold_line_count, lines, self.compression)
+        )
+        if self.spill_enabled and len(self.blocks) > self.max_ram_blocks:
+            self._spill_oldest_block()
+
+    def _spill_oldest_block(self) -> None:
+        """Moves the oldest in-memory compressed block to the spill file."""
+        if self.spill is None:
+            self.spill = SpillFile(self.spill_dir, keep=self.keep_spill)
+        block = self.blocks.pop(0)
+        self.spill.append(block.first_line, block.line_count, block.payload)
+        self.spilled_blocks += 1
+
+    def _load_block(self, block_index: int) -> ScrollbackBlock:
+        """Returns a compressed block from memory or from the spill file."""
+        ram_index = block_index - self.spilled_blocks
+        if ram_index >= 0:
+            return self.blocks[ram_index]
+
+        first_line = block_index * self.block_lines
+        position = self.spill.find(first_line)
+        return ScrollbackBlock(
+            first_line,
+            self.spill.line_counts[position],
+            self.compression,
+            self.spill.read(position),
+        )
+
+    def _block_lines(self, block_index: int) -> list[ScrollbackLine]:
+        """Returns the decoded lines of a cold block, going through the LRU."""
+        lines = self._cache.get(block_index)
+        if lines is not None:
+            self._cache.move_to_end(block_index)
+            return lines
+
+        lines = self._load_block(block_index).unpack()
+        self._cache[block_index] = lines
+        if len(self._cache) > self.cache_blocks:
+            self._cache.popitem(last=False)
+        return lines
+
+    def get_line(self, index: int) -> ScrollbackLine:
+        """
+        Retrieves a line by absolute index, decompressing its block if needed.
+
+        Args:
+            index (int): Absolute line index (negative values count from the end).
+
+        Returns:
+            ScrollbackLine: The requested line.
+        """
+        with self.lock:
+            if index < 0:
+                index += len(self)
+            if not 0 <= index < len(self):
+                raise IndexError("scrollback index out of range")
+
+            cold = self.cold_line_count
+            if index >= cold:
+                return self.hot[index - cold]
+            block_index, offset = divmod(index, self.block_lines)
+            return self._block_lines(block_index)[offset]
+
+    def get_lines(self, start: int, stop: int) -> list[ScrollbackLine]:
+        """
+        Retrieves a contiguous range of lines.
+
+        Args:
+            start (int): First absolute line index (inclusive).
+            stop (int): Last absolute line index (exclusive).
+
+        Returns:
+            list[ScrollbackLine]: The lines in the range, clamped to the store.
+        """
+        with self.lock:
+            return list(self.iter_lines(start, stop))
+
+    def iter_lines(self, start: int = 0, stop: int | None = None) -> Iterator[ScrollbackLine]:
+        """
+        Iterates over lines in order, decoding one block at a time.
+
+        The iterator is not locked; other threads should use get_lines().
+
+        Args:
+            start (int): First absolute line index (inclusive). Defaults to 0.
+            stop (int | None): Last absolute line index (exclusive). Defaults to the end.
+
+        Yields:
+            ScrollbackLine: Each line in the range.
+        """
+        total = len(self)
+        stop = total if stop is None else min(stop, total)
+        index = max(0, start)
+        cold = self.cold_line_count
+
+        while index < min(stop, cold):
+            block_index, offset = divmod(index, self.block_lines)
+            lines = self._block_lines(block_index)
+            end = min(self.block_lines, offset + stop - index)
+            yield from lines[offset:end]
+            index += end - offset
+
+        if index < stop:
+            yield from self.hot[index - cold : stop - cold]
+
+    def clear(self) -> None:
+        """Drops all stored lines and notifies the clear listeners."""
+        with self.lock:
+            self.blocks.clear()
+            self.hot.clear()
+            self._cache.clear()
+            self.spilled_blocks = 0
+            if self.spill is not None:
+                self.spill.close()
+                self.spill = None
+        for listener in self.clear_listeners:
+            listener()
+
+    def close(self) -> None:
+        """Releases the spill file; it is deleted unless `keep_spill` is set."""
+        with self.lock:
+            if self.spill is not None:
+                self.spill.close()
+
+    def memory_usage(self) -> dict[str, int]:
+        """
+        Estimates the memory held by the store.
+
+        Returns:
+            dict[str, int]: Byte counts for hot lines, cold payloads and the block cache.
+        """
+        return {
+            "hot_lines": len(self.hot),
+            "cold_lines": self.cold_line_count,
+            "cold_bytes": sum(len(block.payload) for block in self.blocks),
+            "spilled_lines": self.spilled_blocks * self.block_lines,
+            "spilled_bytes": self.spill.size if self.spill is not None else 0,
+            "cached_blocks": len(self._cache),
+        }
+
+
+def report_memory(line_count: int = 100_000) -> None:
+    """
+    Prints the traced memory of `line_count` styled lines stored fully
+    uncompressed versus with compressed cold blocks.
+    """
+    import tracemalloc
+
+    styles = [
+        ((192, 202, 245), (26, 27, 38), False, False, False),
+        ((158, 206, 106), (26, 27, 38), True, False, False),
+        ((247, 118, 142), (26, 27, 38), False, False, True),
+    ]
+
+    def fill(store: Scrollback) -> None:
+        for i in range(line_count):
+            prefix = f"[{i:>7}] "
+            body = f"building target {i % 97} in src/module_{i % 13}/file_{i}.py ... ok"
+            store.append(
+                prefix + body, ((len(prefix), styles[1]), (len(body), styles[i % 3]))
+            )
+
+    for label, hot_lines in (("uncompressed", line_count), ("compressed", 5000)):
+        tracemalloc.start()
+        store = Scrollback(hot_lines=hot_lines)
+        fill(store)
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(
+            f"{label:>12}: {current / 1024 / 1024:8.2f} MiB per {line_count} lines "
+            f"({store.memory_usage()})"
+        )
+        del store
+
+
+if __name__ == "__main__":
+    report_memory()
@@ -0,0 +1,306 @@
+import re
+import threading
+from array import array
+from dataclasses import dataclass
+from typing import Callable
+
+from stellar.components.scrollback import Scrollback
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+
+@dataclass(slots=True, frozen=True)
+class SearchMatch:
+    """A match of a search query within a scrollback line."""
+
+    line: int
+    start: int
+    end: int
+
+
+def required_literal(pattern: str, flags: int = 0) -> str | None:
+    """
+    Finds the longest literal that every match of a regular expression contains.
+
+    Only top-level runs of literal characters are considered, and patterns with a
+    top-level alternation yield None, so the result is conservative.
+
+    Args:
+        pattern (str): The regular expression.
+        flags (int): Flags the pattern is compiled with.
+
+    Returns:
+        str | None: The literal, or None if none could be determined.
+    """
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except re.error:
+        return None
+
+    best, run = "", []
+    for op, arg in list(parsed) + [(None, None)]:
+        if op is sre_parse.LITERAL:
+            run.append(chr(arg))
+            continue
+        if len(run) > len(best):
+            best = "".join(run)
+        run = []
+        if op is sre_parse.BRANCH:
+            return None
+    return best or None
+
+
+class TrigramIndex:
+    """
+    Incremental trigram index over scrollback lines.
+
+    Lines are grouped into chunks of `chunk_lines`; each lowercased trigram maps
+    to the sorted list of chunks that contain it. Trigrams of the chunk being
+    filled are collected in a set and merged into the postings once the chunk is
+    complete, so each distinct trigram costs one append per chunk rather than one
+    per line. A query only has to verify chunks containing every needle trigram.
+
+    Attributes:
+        chunk_lines (int): Number of lines covered by one posting entry.
+        postings (dict[str, array]): Trigram -> sorted chunk numbers.
+        pending (set[str]): Trigrams of the chunk currently being filled.
+        line_count (int): Number of lines indexed so far.
+    """
+
+    def __init__(self, chunk_lines: int = 64) -> None:
+        self.chunk_lines = chunk_lines
+        self.reset()
+
+    def reset(self) -> None:
+        """Forgets every indexed line, e.g. after the scrollback was cleared."""
+        self.postings: dict[str, array] = {}
+        self.pending: set[str] = set()
+        self.pending_chunk = 0
+        self.line_count = 0
+
+    @staticmethod
+    def trigrams(text: str) -> set[str]:
+        """Returns the set of lowercased trigrams of a string."""
+        text = text.lower()
+        return {text[i : i + 3] for i in range(len(text) - 2)}
+
+    def add_line(self, index: int, text: str) -> None:
+        """
+        Indexes a newly appended line.
+
+        Args:
+            index (int): Absolute line index.
+            text (str): The line text.
+        """
+        chunk = index // self.chunk_lines
+        if chunk != self.pending_chunk:
+            self._flush()
+            self.pending_chunk = chunk
+        self.pending.update(self.trigrams(text))
+        self.line_count = index + 1
+
+    def _flush(self) -> None:
+        """Merges the trigrams of the pending chunk into the postings."""
+        chunk = self.pending_chunk
+        postings = self.postings
+        for trigram in self.pending:
+            posting = postings.get(trigram)
+            if posting is None:
+                postings[trigram] = array("I", (chunk,))
+            else:
+                posting.append(chunk)
+        self.pending = set()
+
+    def candidate_chunks(self, needle: str | None, line_count: int) -> list[int] | range:
+        """
+        Returns the chunks that may contain a literal needle, in order.
+
+        Args:
+            needle (str | None): The literal to look for, or None to scan everything.
+            line_count (int): Number of lines to consider.
+
+        Returns:
+            list[int] | range: Candidate chunk numbers in ascending order.
+        """
+        chunk_count = -(-line_count // self.chunk_lines)
+        trigrams = self.trigrams(needle) if needle else set()
+        if not trigrams:
+            return range(chunk_count)
+
+        # Read the pending chunk first: if a flush races with us, its trigrams
+        # are then found either in the old pending set or in the postings
+        pending_chunk, pending = self.pending_chunk, self.pending
+        in_pending = trigrams <= pending
+
+        chunks = []
+        postings = [self.postings.get(trigram) for trigram in trigrams]
+        if all(posting is not None for posting in postings):
+            postings.sort(key=len)
+            others = [set(posting) for posting in postings[1:]]
+            chunks = [
+                chunk
+                for chunk in list(postings[0])
+                if chunk < chunk_count and all(chunk in other for other in others)
+            ]
+        if in_pending and pending_chunk < chunk_count and pending_chunk not in chunks[-1:]:
+            chunks.append(pending_chunk)
+        return chunks
+
+
+class SearchHandle:
+    """Handle to a running search, used to cancel it or wait for completion."""
+
+    def __init__(self) -> None:
+        self._cancelled = threading.Event()
+        self._done = threading.Event()
+
+    def cancel(self) -> None:
+        """Asks the worker to stop; no callbacks fire after it notices."""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Blocks until the search finishes or is cancelled."""
+        return self._done.wait(timeout)
+
+
+class ScrollbackSearch:
+    """
+    Searches a Scrollback on a worker thread using an incremental TrigramIndex.
+
+    The index is kept current through Scrollback listeners. Queries run on a
+    background thread, verify candidate chunks in line order and stream matches
+    to `on_matches` in batches; starting a new search cancels the previous one.
+    Callbacks run on the worker thread, so GUI backends must marshal them.
+    """
+
+    def __init__(self, scrollback: Scrollback, chunk_lines: int = 64) -> None:
+        self.scrollback = scrollback
+        self.index = TrigramIndex(chunk_lines)
+        self.current: SearchHandle | None = None
+
+        with scrollback.lock:
+            for i, line in enumerate(scrollback.iter_lines()):
+                self.index.add_line(i, line.text)
+            scrollback.add_listener(self.index.add_line)
+            scrollback.add_clear_listener(self.on_clear)
+
+    def search(
+        self,
+        pattern: str,
+        regex: bool = False,
+        ignore_case: bool = False,
+        on_matches: Callable[[list[SearchMatch]], None] | None = None,
+        on_done: Callable[[int], None] | None = None,
+    ) -> SearchHandle:
+        """
+        Starts a search over the scrollback.
+
+        Args:
+            pattern (str): A plain substring, or a regular expression if `regex` is set.
+            regex (bool): Treat `pattern` as a regular expression. Defaults to False.
+            ignore_case (bool): Match case-insensitively. Defaults to False.
+            on_matches (Callable[[list[SearchMatch]], None] | None): Receives batches
+                of matches in ascending line order.
+            on_done (Callable[[int], None] | None): Receives the total match count
+                once the search completes without being cancelled.
+
+        Returns:
+            SearchHandle: A handle to cancel or wait for the search.
+        """
+        self.cancel()
+        handle = SearchHandle()
+        self.current = handle
+
+        flags = re.IGNORECASE if ignore_case else 0
+        compiled = re.compile(pattern if regex else re.escape(pattern), flags)
+        line_count = self.index.line_count
+        # Regexes are narrowed by the literal every match must contain, if any
+        needle = required_literal(pattern, flags) if regex else pattern
+        chunks = self.index.candidate_chunks(needle, line_count) if pattern else []
+
+        threading.Thread(
+            target=self._run,
+            args=(handle, compiled, chunks, line_count, on_matches, on_done),
+            daemon=True,
+        ).start()
+        return handle
+
+    def cancel(self) -> None:
+        """Cancels the running search, if any."""
+        if self.current is not None:
+            self.current.cancel()
+            self.current = None
+
+    def on_clear(self) -> None:
+        """Scrollback clear listener: the indexed line numbers no longer exist."""
+        self.cancel()
+        self.index.reset()
+
+    def _run(
+        self,
+        handle: SearchHandle,
+        compiled: re.Pattern,
+        chunks: list[int] | range,
+        line_count: int,
+        on_matches: Callable[[list[SearchMatch]], None] | None,
+        on_done: Callable[[int], None] | None,
+    ) -> None:
+        """Verifies candidate chunks in order and streams matches back."""
+        chunk_lines = self.index.chunk_lines
+        total = 0
+        try:
+            for chunk in chunks:
+                if handle.cancelled:
+                    return
+                start = chunk * chunk_lines
+                stop = min(start + chunk_lines, line_count)
+                found = [
+                    SearchMatch(start + offset, match.start(), match.end())
+                    for offset, line in enumerate(
+                        self.scrollback.get_lines(start, stop)
+                    )
+                    for match in compiled.finditer(line.text)
+                    if match.end() > match.start()
+                ]
+                if found and not handle.cancelled:
+                    total += len(found)
+                    if on_matches:
+                        on_matches(found)
+            if on_done and not handle.cancelled:
+                on_done(total)
+        finally:
+            handle._done.set()
+
+
+def benchmark_first_match(line_count: int = 1_000_000) -> None:
+    """Prints the time to the first match of a rare needle in `line_count` lines."""
+    import time
+
+    scrollback = Scrollback()
+    search = ScrollbackSearch(scrollback)
+    for i in range(line_count):
+        scrollback.append(f"[{i:>8}] compiling src/module_{i % 13}/file_{i % 997}.c ... ok")
+    scrollback.append("error: undefined reference to `stellar_main'")
+
+    for pattern, regex in (("undefined reference", False), (r"undefined \w+", True)):
+        first = []
+        started = time.perf_counter()
+        handle = search.search(
+            pattern,
+            regex=regex,
+            on_matches=lambda m: first or first.append(time.perf_counter()),
+        )
+        handle.wait()
+        elapsed = (first[0] - started) * 1000 if first else float("nan")
+        print(f"{'regex' if regex else 'plain':>5} {pattern!r}: first match in {elapsed:.1f} ms")
+
+
+if __name__ == "__main__":
+    benchmark_first_match()
@@ -0,0 +1,168 @@
+import logging
+import string
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Segment:
+    """
+    A registered prompt placeholder.
+
+    Attributes:
+        name (str): The placeholder name, as in "{name}".
+        provider (Callable[[], str]): Computes the segment's text.
+        ttl (float | None): Seconds a value stays fresh; 0 recomputes it on
+            every render and None never expires it.
+        threaded (bool): Evaluate on the worker pool instead of inline.
+        value (str | None): The last computed value.
+        updated_at (float | None): When `value` was computed (monotonic
+            seconds); None once invalidated, though the value is kept as a
+            stale fallback.
+        pending (Future | None): The running evaluation of a threaded segment.
+    """
+
+    name: str
+    provider: Callable[[], str]
+    ttl: float | None = 0.0
+    threaded: bool = False
+    value: str | None = None
+    updated_at: float | None = None
+    pending: Future | None = field(default=None, repr=False)
+
+    def is_fresh(self, now: float) -> bool:
+        if self.updated_at is None:
+            return False
+        return self.ttl is None or now - self.updated_at < self.ttl
+
+
+class _Values(dict):
+    # Placeholders without a provider render empty instead of raising
+    def __missing__(self, key: str) -> str:
+        return ""
+
+
+class SegmentEngine:
+    """
+    Assembles a prompt format string from registered segment providers.
+
+    Fresh cached values are reused, inline providers are called on the calling
+    thread, and threaded providers run on a small pool. render() waits for the
+    pool at most until the latency budget runs out; a segment that misses it
+    keeps its stale value (or renders empty the first time) and its result is
+    cached for the next render when it arrives.
+
+    Args:
+        budget (float): Seconds render() may spend in total.
+        max_workers (int): Threads for threaded providers.
+    """
+
+    def __init__(self, budget: float = 0.05, max_workers: int = 4) -> None:
+        self.budget = budget
+        self.segments: dict[str, Segment] = {}
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="prompt-segment"
+        )
+        self.formatter = string.Formatter()
+        self.fields: dict[str, list[str]] = {}
+
+    def register(
+        self,
+        name: str,
+        provider: Callable[[], str],
+        ttl: float | None = 0.0,
+        threaded: bool = False,
+    ) -> None:
+        """
+        Registers the provider for a placeholder, replacing any previous one.
+
+        Args:
+            name (str): The placeholder name.
+            provider (Callable[[], str]): Computes the segment's text.
+            ttl (float | None): Seconds a value stays fresh; None never expires.
+            threaded (bool): Evaluate on the worker pool, for slow providers.
+        """
+        self.segments[name] = Segment(name, provider, ttl, threaded)
+
+    def placeholders(self, prompt_format: str) -> list[str]:
+        """Returns the placeholder names in a format string, parsed once per format."""
+        names = self.fields.get(prompt_format)
+        if names is None:
+            names = [
+                name.split(".")[0].split("[")[0]
+                for _, name, _, _ in self.formatter.parse(prompt_format)
+                if name
+            ]
+            self.fields[prompt_format] = names
+        return names
+
+    def render(self, prompt_format: str) -> str:
+        """
+        Formats `prompt_format` within the latency budget.
+
+        Args:
+            prompt_format (str): A str.format template such as "{time} {git_branch}".
+
+        Returns:
+            str: The formatted prompt.
+        """
+        deadline = time.monotonic() + self.budget
+        waiting = []
+        for name in self.placeholders(prompt_format):
+            segment = self.segments.get(name)
+            if segment is None or segment.is_fresh(time.monotonic()):
+                continue
+            if segment.threaded:
+                with self.lock:
+                    if segment.pending is None:
+                        segment.pending = self.executor.submit(self._evaluate, segment)
+                    waiting.append(segment.pending)
+            else:
+                self._evaluate(segment)
+
+        if waiting:
+            _, missed = wait(waiting, timeout=max(0.0, deadline - time.monotonic()))
+            for segment in self.segments.values():
+                if segment.pending in missed:
+                    logger.debug(
+                        "Prompt segment %s missed the budget, using %s",
+                        segment.name,
+                        "stale value" if segment.value is not None else "empty",
+                    )
+
+        values = _Values(
+            (segment.name, segment.value)
+            for segment in self.segments.values()
+            if segment.value is not None
+        )
+        return prompt_format.format_map(values)
+
+    def _evaluate(self, segment: Segment) -> None:
+        start = time.perf_counter()
+        try:
+            value = str(segment.provider())
+        except Exception as e:
+            logger.error(f"Prompt segment {segment.name} failed: {e}")
+            value = segment.value
+        elapsed = time.perf_counter() - start
+        logger.debug("Prompt segment %s took %.2f ms", segment.name, elapsed * 1000)
+
+        with self.lock:
+            segment.value = value
+            segment.updated_at = time.monotonic()
+            segment.pending = None
+
+    def invalidate(self, name: str | None = None) -> None:
+        """Marks one segment, or all of them, as stale."""
+        for segment in self.segments.values():
+            if name is None or segment.name == name:
+                segment.updated_at = None
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,140 @@
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+from bisect import bisect_right
+
+# Index record: first line, line count, payload offset, payload length
+INDEX_RECORD = struct.Struct("<QIQI")
+
+
+class SpillFile:
+    """
+    Append-only on-disk store for compressed scrollback blocks.
+
+    Block payloads are appended to a per-session data file and read back through
+    `mmap`. A sidecar index file records (first line, line count, offset, length)
+    for every block; the same index is kept in memory as flat arrays so locating
+    the block that holds a line is a binary search.
+
+    Attributes:
+        path (str): Path of the data file.
+        index_path (str): Path of the sidecar index file.
+        keep (bool): Whether the files survive close().
+    """
+
+    def __init__(self, directory: str | None = None, keep: bool = False) -> None:
+        """
+        Creates the data and index files for a new session.
+
+        Args:
+            directory (str | None): Where to create the files. Defaults to the
+                system temporary directory.
+            keep (bool): Keep the files on close instead of deleting them.
+        """
+        directory = directory or os.path.join(tempfile.gettempdir(), "stellar")
+        os.makedirs(directory, exist_ok=True)
+
+        self.fd, self.path = tempfile.mkstemp(
+            prefix="scrollback-", suffix=".bin", dir=directory
+        )
+        self.index_path = self.path[: -len(".bin")] + ".idx"
+        self.index_fd = os.open(
+            self.index_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600
+        )
+        self.keep = keep
+
+        self.first_lines = array("Q")
+        self.line_counts = array("I")
+        self.offsets = array("Q")
+        self.lengths = array("I")
+        self.size = 0
+        self.closed = False
+        self._map: mmap.mmap | None = None
+
+    def __len__(self) -> int:
+        return len(self.first_lines)
+
+    @property
+    def line_count(self) -> int:
+        """Total number of lines stored in the file."""
+        if not self.first_lines:
+            return 0
+        return self.first_lines[-1] + self.line_counts[-1]
+
+    def append(self, first_line: int, line_count: int, payload: bytes) -> None:
+        """
+        Appends a block payload and its index record.
+
+        Args:
+            first_line (int): Absolute index of the first line in the block.
+            line_count (int): Number of lines in the block.
+            payload (bytes): The compressed block contents.
+        """
+        offset = self.size
+        os.write(self.fd, payload)
+        os.write(
+            self.index_fd,
+            INDEX_RECORD.pack(first_line, line_count, offset, len(payload)),
+        )
+        self.size += len(payload)
+
+        self.first_lines.append(first_line)
+        self.line_counts.append(line_count)
+        self.offsets.append(offset)
+        self.lengths.append(len(payload))
+
+    def find(self, line: int) -> int:
+        """
+        Finds the block holding a line.
+
+        Args:
+            line (int): Absolute line index.
+
+        Returns:
+            int: Position of the block in the index.
+        """
+        position = bisect_right(self.first_lines, line) - 1
+        if position < 0 or line >= self.first_lines[position] + self.line_counts[position]:
+            raise IndexError("line is not stored in the spill file")
+        return position
+
+    def read(self, position: int) -> bytes:
+        """
+        Reads a block payload through the memory map.
+
+        Args:
+            position (int): Position of the block in the index.
+
+        Returns:
+            bytes: The compressed block contents.
+        """
+        start = self.offsets[position]
+        end = start + self.lengths[position]
+        if self._map is None or end > len(self._map):
+            self._remap()
+        return self._map[start:end]
+
+    def _remap(self) -> None:
+        """Maps the whole data file, replacing a previous, shorter mapping."""
+        if self._map is not None:
+            self._map.close()
+        self._map = mmap.mmap(self.fd, self.size, access=mmap.ACCESS_READ)
+
+    def close(self) -> None:
+        """Closes the files, deleting them unless `keep` is set."""
+        if self.closed:
+            return
+        self.closed = True
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        os.close(self.fd)
+        os.close(self.index_fd)
+        if not self.keep:
+            for path in (self.path, self.index_path):
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
@@ -1,15 +1,23 @@
 import pty  # Provides functions to work with pseudo-terminals
+import codecs  # Incremental UTF-8 decoding across read boundaries
 import os  # Allows interaction with the operating system, including process control
+import fcntl  # Used to set the PTY window size
+import struct  # Packs the winsize structure for TIOCSWINSZ
+import termios  # Provides the TIOCSWINSZ request code
 import select  # Used to handle I/O multiplexing (waiting for I/O operations to complete)
 import logging  # Provides a flexible framework for emitting log messages
 import queue  # Implements a multi-producer, multi-consumer queue
 import threading  # Provides higher-level threading capabilities
+import time  # Monotonic clock for the read and decode stage timings
 from typing import Callable  # Used for type hinting of callable functions
 
-# Set up logger with detailed output format and configuration for file logging
+from stellar.utils.logger import tracer
+from stellar.utils.metrics import metrics
+
+# Handlers are set up by the application (see stellar.utils.logger.setup_logging)
 logger = logging.getLogger(__name__)
-FORMAT = "%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(funcName)s:%(lineno)d] - %(message)s"
-logging.basicConfig(filename="st_pty.log", level=logging.INFO, format=FORMAT)
+# Per-chunk and per-key tracing; off unless the "pty" subsystem is enabled
+trace = tracer("pty")
 
 
 class StellarPTY:
@@ -21,21 +29,28 @@ class StellarPTY:
 
     Attributes:
         shell (str): The shell to execute (default is /bin/zsh).
+        args (list[str]): Extra arguments passed to the shell.
         master_fd (int | None): The master file descriptor for the PTY.
         pid (int | None): The process ID of the forked child.
         old_tty (list | None): A placeholder for the original TTY settings.
         input_queue (queue.Queue): Queue to hold user input before sending it to the PTY.
         output_callback (Callable[[str], None] | None): Callback function to handle output from the PTY.
+        threaded (bool): Whether I/O runs on a background thread (see start()).
+        closed (bool): Set once the PTY reports end of file or is closed.
+        bytes_read (int): Total number of bytes read from the PTY.
+        write_buffer (bytearray): Input the PTY could not take yet (non-threaded mode).
     """
 
-    def __init__(self, shell: str = "/bin/zsh") -> None:
+    def __init__(self, shell: str = "/bin/zsh", args: list[str] | None = None) -> None:
         """
         Initializes the StellarPTY instance.
 
         Args:
             shell (str): Path to the shell binary to run in the PTY. Defaults to "/bin/zsh".
+            args (list[str] | None): Extra arguments for the shell, e.g. ["-c", command].
         """
         self.shell: str = shell  # Shell to be loaded in the PTY (default: zsh)
+        self.args: list[str] = args or []  # Extra arguments for the shell
         self.master_fd: int | None = None  # Master file descriptor for the PTY
         self.pid: int | None = None  # Process ID of the child process
         self.old_tty: list | None = (
@@ -47,13 +62,27 @@ class StellarPTY:
         self.output_callback: Callable[[str], None] | None = (
             None  # Callback for handling shell output
         )
-
-    def start(self) -> None:
+        self.size: tuple[int, int] | None = None  # Window size as (rows, cols)
+        self.threaded: bool = True  # I/O mode chosen in start()
+        self.closed: bool = False  # Set once the PTY reports EOF
+        self.bytes_read: int = 0  # Total bytes read from the PTY
+        self.write_buffer = bytearray()  # Unsent input in non-threaded mode
+        self.decoder = codecs.getincrementaldecoder("utf-8")(
+            errors="replace"
+        )  # Keeps multi-byte characters split across reads intact
+
+    def start(self, threaded: bool = True) -> None:
         """
         Starts the PTY session by forking the process and initializing the shell.
 
         The parent process manages I/O between the user and the shell, while the child process
         executes the shell.
+
+        Args:
+            threaded (bool): Run the I/O loop on a background thread that reports output
+                through the output callback. When False, `master_fd` is made non-blocking
+                and the caller watches it from its own event loop, reading with drain()
+                and writing with write() and flush(). Defaults to True.
         """
         try:
             self.pid, self.master_fd = pty.fork()  # Forks the process and creates a PTY
@@ -71,10 +100,18 @@ class StellarPTY:
                 logger.error(f"Failed to load shell: {e}")  # Logs failure and exits
                 os._exit(1)
         else:
-            # Parent process: handle I/O in a separate thread
-            threading.Thread(
-                target=self.handle_io, daemon=True
-            ).start()  # Start a background thread for I/O handling
+            # Apply a size requested before the child existed
+            if self.size:
+                self.resize(*self.size)
+            self.threaded = threaded
+            if threaded:
+                # Parent process: handle I/O in a separate thread
+                threading.Thread(
+                    target=self.handle_io, daemon=True
+                ).start()  # Start a background thread for I/O handling
+            else:
+                # Parent process: the caller polls master_fd from its event loop
+                os.set_blocking(self.master_fd, False)
 
     def load_shell(self) -> None:
         """
@@ -86,7 +123,7 @@ class StellarPTY:
             f"Initializing shell: {self.shell}"
         )  # Logs the shell initialization
         os.execvp(
-            self.shell, [self.shell]
+            self.shell, [self.shell, *self.args]
         )  # Replaces the current process with the shell
 
     def handle_io(self, read_size: int = 1024) -> None:
@@ -99,21 +136,27 @@ class StellarPTY:
         Args:
             read_size (int): Number of bytes to read at a time from the PTY. Defaults to 1024.
         """
-        while True:
+        while not self.closed:
             try:
                 # Wait for data to be available for reading from the PTY
                 r, _, _ = select.select([self.master_fd], [], [], 0.1)
 
                 if self.master_fd in r:
                     # Read data from the PTY
+                    start = time.perf_counter()
                     data: bytes = os.read(self.master_fd, read_size)
                     if not data:
+                        self.closed = True
                         break  # Exit if no data is returned (i.e., PTY closed)
+                    read = time.perf_counter()
+                    metrics.record("read", read - start)
+                    metrics.count("bytes_in", len(data))
+                    self.bytes_read += len(data)
+                    trace.debug("Read %d bytes: %r", len(data), data)
                     if self.output_callback:
-                        print("Data: ", data)
-                        self.output_callback(
-                            data.decode("utf-8", errors="replace")
-                        )  # Call the callback with the decoded data
+                        output = self.decoder.decode(data)
+                        metrics.record("decode", time.perf_counter() - read)
+                        self.output_callback(output)  # Call the callback with the decoded data
 
                 # If there is input data queued, send it to the PTY
                 if not self.input_queue.empty() and self.master_fd:
@@ -123,27 +166,177 @@ class StellarPTY:
                     )  # Write input data to the PTY
 
             except OSError as e:
-                logger.error(f"OSError in handle_io: {e}")  # Log any OS-related errors
+                if not self.closed:  # close() makes select() fail on purpose
+                    logger.error(f"OSError in handle_io: {e}")  # Log any OS-related errors
                 break
             except Exception as e:
-                logger.error(
-                    f"Unexpected error in handle_io: {e}"
-                )  # Log unexpected errors
+                if not self.closed:
+                    logger.error(
+                        f"Unexpected error in handle_io: {e}"
+                    )  # Log unexpected errors
+                break
+
+    def drain(self, max_bytes: int = 65536, read_size: int = 16384) -> str:
+        """
+        Reads all output that is available right now without blocking.
+
+        Used in non-threaded mode when the event loop reports `master_fd` readable.
+        Reading stops at `max_bytes` so a flood of output cannot starve the event loop.
+
+        Args:
+            max_bytes (int): Upper bound on bytes read per call. Defaults to 65536.
+            read_size (int): Bytes requested per read. Defaults to 16384.
+
+        Returns:
+            str: The decoded output, possibly empty.
+        """
+        start = time.perf_counter()
+        chunks = []
+        total = 0
+        while total < max_bytes:
+            try:
+                data = os.read(self.master_fd, read_size)
+            except BlockingIOError:
+                break  # Nothing more available
+            except OSError as e:
+                # Linux reports EIO once the child side is closed
+                logger.info(f"PTY closed: {e}")
+                self.closed = True
+                break
+            if not data:
+                self.closed = True
+                break
+            chunks.append(data)
+            total += len(data)
+        self.bytes_read += total
+        data = b"".join(chunks)
+        read = time.perf_counter()
+        trace.debug("Drained %d bytes: %r", total, data)
+        output = self.decoder.decode(data)
+        if total:
+            metrics.record("read", read - start)
+            metrics.record("decode", time.perf_counter() - read)
+            metrics.count("bytes_in", total)
+        return output
+
+    def write(self, data: str | bytes) -> None:
+        """
+        Writes directly to the PTY from the calling thread.
+
+        In threaded mode `master_fd` is blocking and the call waits while the
+        PTY's buffer is full; the I/O thread keeps draining output meanwhile.
+        In non-threaded mode it never blocks: whatever the PTY cannot take now
+        is kept in `write_buffer`, and the caller's event loop must call flush()
+        when `master_fd` becomes writable while `write_pending` is set. Waiting
+        here instead would deadlock a large paste, since the shell stops reading
+        input once its output is not drained.
+
+        Args:
+            data (str | bytes): The data to write; strings are UTF-8 encoded.
+        """
+        pending = data.encode("utf-8") if isinstance(data, str) else data
+        if not self.threaded:
+            self.write_buffer += pending
+            self.flush()
+            return
+        while pending:
+            written = os.write(self.master_fd, pending)
+            pending = pending[written:]
+
+    @property
+    def write_pending(self) -> bool:
+        """Whether input is buffered until `master_fd` becomes writable."""
+        return bool(self.write_buffer)
+
+    def flush(self) -> bool:
+        """
+        Writes as much of `write_buffer` as the PTY accepts without blocking.
+
+        Returns:
+            bool: True once the buffer is empty.
+        """
+        while self.write_buffer:
+            try:
+                written = os.write(self.master_fd, self.write_buffer)
+            except BlockingIOError:
+                break  # The PTY is full; retry when it is writable
+            except OSError as e:
+                logger.error(f"Failed to write to PTY: {e}")
+                self.write_buffer.clear()
                 break
+            del self.write_buffer[:written]
+        trace.debug("%d bytes of input pending", len(self.write_buffer))
+        return not self.write_buffer
 
     def send_input(self, input_data: str) -> None:
         """
-        Sends input to the PTY via a queue.
+        Sends a line of input to the PTY.
 
-        This function queues the input, which will be processed by the handle_io function.
+        In threaded mode the input is queued and written by the handle_io function;
+        otherwise it is written directly.
 
         Args:
             input_data (str): The input string to send to the PTY.
         """
-        self.input_queue.put(
-            input_data + "\n"
-        )  # Add the input data to the queue with a newline
-        logger.info(f"Input sent to queue: {input_data}")  # Log the input data
+        if not self.threaded:
+            self.write(input_data + "\n")
+        else:
+            self.input_queue.put(
+                input_data + "\n"
+            )  # Add the input data to the queue with a newline
+        trace.debug("Input sent: %r", input_data)
+
+    def send_keys(self, data: bytes) -> None:
+        """
+        Sends encoded key presses to the PTY.
+
+        Keys are written immediately in both modes: the threaded I/O loop only
+        services the input queue between select() timeouts, which would add up to
+        100ms of latency to every keystroke.
+
+        Args:
+            data (bytes): The bytes the keys encode to (see stellar.input.xterm).
+        """
+        trace.debug("Keys sent: %r", data)
+        self.write(data)
+
+    def resize(self, rows: int, cols: int) -> None:
+        """
+        Sets the PTY window size.
+
+        The kernel delivers SIGWINCH to the child's foreground process group when the
+        size changes, so callers should debounce interactive resizes.
+
+        Args:
+            rows (int): Number of rows.
+            cols (int): Number of columns.
+        """
+        self.size = (rows, cols)
+        if self.master_fd is None:
+            return  # Applied once the PTY is started
+        try:
+            fcntl.ioctl(
+                self.master_fd, termios.TIOCSWINSZ, struct.pack("HHHH", rows, cols, 0, 0)
+            )
+            logger.info(f"PTY resized to {rows}x{cols}")
+        except OSError as e:
+            logger.error(f"Failed to resize PTY: {e}")
+
+    def close(self) -> None:
+        """
+        Closes the master side of the PTY; the shell receives SIGHUP.
+
+        Safe to call more than once. Callers watching `master_fd` from their
+        event loop must stop watching it first.
+        """
+        self.closed = True
+        self.write_buffer.clear()
+        if self.master_fd is not None:
+            try:
+                os.close(self.master_fd)
+            except OSError as e:
+                logger.error(f"Failed to close PTY: {e}")
+            self.master_fd = None
 
     def set_output_callback(self, callback: Callable[[str], None]) -> None:
         """
@@ -0,0 +1,315 @@
+import logging
+import re
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator
+
+from stellar.components.scrollback import Scrollback
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+logger = logging.getLogger(__name__)
+
+# What a trigger does when it matches; frontends subscribe with TriggerEngine.on()
+ACTIONS = ("highlight", "beep", "capture")
+
+
+@dataclass(slots=True, frozen=True)
+class Trigger:
+    """
+    A pattern to watch the output for.
+
+    Attributes:
+        pattern (str): A literal string, or a regular expression if `regex`.
+        action (str): One of ACTIONS.
+        regex (bool): Treat `pattern` as a regular expression.
+        ignore_case (bool): Match case-insensitively.
+        name (str): Label for captures, e.g. "url".
+    """
+
+    pattern: str
+    action: str = "highlight"
+    regex: bool = False
+    ignore_case: bool = False
+    name: str = ""
+
+
+@dataclass(slots=True, frozen=True)
+class TriggerMatch:
+    """A trigger match within a scrollback line."""
+
+    line: int
+    start: int
+    end: int
+    trigger: Trigger
+    text: str
+
+
+def _references_groups(node) -> bool:
+    """Whether a parsed regex contains a backreference or a group conditional."""
+    if isinstance(node, sre_parse.SubPattern):
+        return any(
+            op in (sre_parse.GROUPREF, sre_parse.GROUPREF_EXISTS) or _references_groups(av)
+            for op, av in node
+        )
+    if isinstance(node, (tuple, list)):
+        return any(_references_groups(item) for item in node)
+    return False
+
+
+def needs_own_pattern(pattern: str) -> bool:
+    """
+    Whether a regex would change meaning inside the combined alternation.
+
+    Inline global flags such as "(?i)" are only valid at the start of the whole
+    expression, backreferences like "\\1" would point at another rule's group
+    once the groups are renumbered, and group names could clash between rules.
+
+    Args:
+        pattern (str): A regular expression that compiles on its own.
+
+    Returns:
+        bool: True if the rule must be matched with its own compiled pattern.
+    """
+    parsed = sre_parse.parse(pattern)
+    return bool(
+        parsed.state.flags & ~re.UNICODE
+        or parsed.state.groupdict
+        or _references_groups(parsed)
+    )
+
+
+class AhoCorasick:
+    """
+    Aho-Corasick automaton over a set of literal patterns.
+
+    A scan visits every character of the text once, however many patterns
+    there are, and reports every occurrence of every pattern, including
+    overlapping ones.
+
+    Args:
+        patterns (list[str]): The literals; empty strings are ignored.
+    """
+
+    def __init__(self, patterns: list[str]) -> None:
+        self.patterns = patterns
+        self.goto: list[dict[str, int]] = [{}]
+        self.fail: list[int] = [0]
+        # Pattern indices ending at each state, including via failure links
+        self.output: list[tuple[int, ...]] = [()]
+
+        outputs: list[list[int]] = [[]]
+        for index, pattern in enumerate(patterns):
+            if not pattern:
+                continue
+            state = 0
+            for char in pattern:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][char] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    outputs.append([])
+                state = next_state
+            outputs[state].append(index)
+
+        # Breadth-first, so every failure target is complete before it is used
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[next_state] = target if target != next_state else 0
+                outputs[next_state].extend(outputs[self.fail[next_state]])
+        self.output = [tuple(indices) for indices in outputs]
+
+        # Every match is a run of pattern characters at least as long as the
+        # shortest pattern, so the scan skips everything else at C speed
+        alphabet = sorted({char for pattern in patterns for char in pattern})
+        shortest = min((len(pattern) for pattern in patterns if pattern), default=0)
+        self.runs = (
+            re.compile(
+                "[" + "".join(re.escape(char) for char in alphabet) + f"]{{{shortest},}}"
+            )
+            if alphabet
+            else None
+        )
+
+    def find(self, text: str) -> Iterator[tuple[int, int, int]]:
+        """
+        Yields (start, end, pattern index) for every occurrence in `text`.
+        """
+        if self.runs is None:
+            return
+        goto, fail, output, patterns = self.goto, self.fail, self.output, self.patterns
+        for run in self.runs.finditer(text):
+            state = 0
+            offset = run.start()
+            for position, char in enumerate(run.group(), start=offset + 1):
+                while state and char not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(char, 0)
+                for index in output[state]:
+                    yield position - len(patterns[index]), position, index
+
+
+class TriggerEngine:
+    """
+    Watches committed output lines for a set of triggers.
+
+    All literal triggers are compiled into one AhoCorasick automaton (two when
+    some ignore case: the other scans the lowercased line) and all regex
+    triggers into one alternation of named groups, so the scan cost per line
+    does not grow with the number of rules. The combined regex reports at most
+    one regex trigger per position: the first listed that matches. Regexes that
+    would change meaning when combined (see needs_own_pattern()) are matched
+    separately with their own compiled pattern.
+
+    The engine listens to the Scrollback, so it sees the parsed text of each
+    line exactly once, when the line is committed; lines split across PTY reads
+    are only scanned once complete.
+
+    Args:
+        triggers (Iterable[Trigger]): The rules to compile.
+        capture_limit (int): Most recent "capture" matches kept in `captures`.
+    """
+
+    def __init__(self, triggers: Iterable[Trigger], capture_limit: int = 1000) -> None:
+        self.triggers: list[Trigger] = []
+        for trigger in triggers:
+            if trigger.action not in ACTIONS:
+                logger.warning(
+                    f"Ignoring trigger {trigger.pattern!r}: unknown action {trigger.action!r}"
+                )
+                continue
+            self.triggers.append(trigger)
+        self.handlers: dict[str, list[Callable[[TriggerMatch], None]]] = {
+            action: [] for action in ACTIONS
+        }
+        self.captures: deque[TriggerMatch] = deque(maxlen=capture_limit)
+        self.lines_scanned = 0
+        self.matches_found = 0
+        self.compile()
+
+    @classmethod
+    def from_config(cls, config) -> "TriggerEngine":
+        """
+        Creates a TriggerEngine from the `triggers.rules` setting.
+
+        Args:
+            config (Config): The loaded configuration.
+
+        Returns:
+            TriggerEngine: An engine with the configured rules.
+        """
+        triggers = []
+        for rule in config.trigger_rules:
+            try:
+                triggers.append(Trigger(**rule))
+            except TypeError as e:
+                logger.error(f"Invalid trigger {rule}: {e}")
+        return cls(triggers)
+
+    def compile(self) -> None:
+        """Builds the automata, the combined regex and the separate regexes from `triggers`."""
+        self.literal_triggers = [t for t in self.triggers if not t.regex and not t.ignore_case]
+        self.folded_triggers = [t for t in self.triggers if not t.regex and t.ignore_case]
+        self.regex_triggers = []
+
+        self.literals = AhoCorasick([t.pattern for t in self.literal_triggers])
+        self.folded = AhoCorasick([t.pattern.lower() for t in self.folded_triggers])
+
+        # (compiled pattern, trigger) for rules that can't join the alternation
+        self.separate: list[tuple[re.Pattern, Trigger]] = []
+        alternatives = []
+        for trigger in (t for t in self.triggers if t.regex):
+            try:
+                compiled = re.compile(
+                    trigger.pattern, re.IGNORECASE if trigger.ignore_case else 0
+                )
+            except re.error as e:
+                logger.error(f"Invalid trigger regex {trigger.pattern!r}: {e}")
+                continue
+            if needs_own_pattern(trigger.pattern):
+                self.separate.append((compiled, trigger))
+                continue
+            group = f"_t{len(self.regex_triggers)}"
+            flags = "(?i:" if trigger.ignore_case else "(?:"
+            alternatives.append(f"(?P<{group}>{flags}{trigger.pattern}))")
+            self.regex_triggers.append((compiled, trigger))
+
+        self.regex = None
+        if alternatives:
+            try:
+                self.regex = re.compile("|".join(alternatives))
+            except re.error as e:
+                logger.warning(f"Matching trigger regexes separately: {e}")
+                self.separate = self.regex_triggers + self.separate
+        if self.regex is None:
+            self.regex_triggers = []
+
+    def on(self, action: str, callback: Callable[[TriggerMatch], None]) -> None:
+        """
+        Registers a callback for every match of triggers with `action`.
+
+        Callbacks run on the thread that commits lines to the scrollback.
+        """
+        self.handlers[action].append(callback)
+
+    def attach(self, scrollback: Scrollback) -> None:
+        """Starts scanning every line committed to `scrollback`."""
+        scrollback.add_listener(self.add_line)
+
+    def scan(self, text: str) -> list[tuple[int, int, Trigger]]:
+        """
+        Finds the trigger matches in a line.
+
+        Returns:
+            list[tuple[int, int, Trigger]]: (start, end, trigger), ordered by start.
+        """
+        matches = [
+            (start, end, self.literal_triggers[index])
+            for start, end, index in self.literals.find(text)
+        ]
+        if self.folded_triggers:
+            lowered = text.lower()
+            # lower() can change the length of a few characters; offsets
+            # would be off, so such lines are only matched case-sensitively
+            if len(lowered) == len(text):
+                matches += [
+                    (start, end, self.folded_triggers[index])
+                    for start, end, index in self.folded.find(lowered)
+                ]
+        if self.regex is not None:
+            for match in self.regex.finditer(text):
+                if match.end() > match.start():
+                    trigger = self.regex_triggers[int(match.lastgroup[2:])][1]
+                    matches.append((match.start(), match.end(), trigger))
+        for compiled, trigger in self.separate:
+            for match in compiled.finditer(text):
+                if match.end() > match.start():
+                    matches.append((match.start(), match.end(), trigger))
+        matches.sort(key=lambda match: match[0])
+        return matches
+
+    def add_line(self, index: int, text: str) -> None:
+        """Scrollback listener: scans a newly committed line and fires its actions."""
+        self.lines_scanned += 1
+        for start, end, trigger in self.scan(text):
+            self.matches_found += 1
+            match = TriggerMatch(index, start, end, trigger, text[start:end])
+            if trigger.action == "capture":
+                self.captures.append(match)
+            for callback in self.handlers[trigger.action]:
+                try:
+                    callback(match)
+                except Exception as e:
+                    logger.error(f"Trigger callback failed for {trigger.pattern!r}: {e}")
@@ -0,0 +1,284 @@
+import unicodedata
+from collections import OrderedDict
+from typing import NamedTuple
+
+from stellar.components.scrollback import Scrollback, ScrollbackLine
+
+
+def char_width(char: str) -> int:
+    """Returns the number of terminal columns a character occupies."""
+    return 2 if unicodedata.east_asian_width(char) in ("W", "F") else 1
+
+
+def wrap_points(text: str, cols: int) -> tuple[int, ...]:
+    """
+    Computes where a logical line is soft-wrapped at a given width.
+
+    Args:
+        text (str): The logical line.
+        cols (int): The number of columns per row.
+
+    Returns:
+        tuple[int, ...]: The text offset at which each display row starts.
+    """
+    if text.isascii():
+        return tuple(range(0, len(text), cols)) or (0,)
+
+    points = [0]
+    column = 0
+    for offset, char in enumerate(text):
+        width = char_width(char)
+        if column + width > cols:
+            points.append(offset)
+            column = 0
+        column += width
+    return tuple(points)
+
+
+def slice_line(line: ScrollbackLine, start: int, stop: int) -> ScrollbackLine:
+    """
+    Cuts a line down to the text between two offsets, trimming its style runs.
+
+    Args:
+        line (ScrollbackLine): The line to cut.
+        start (int): First offset (inclusive).
+        stop (int): Last offset (exclusive).
+
+    Returns:
+        ScrollbackLine: The segment with runs clipped to it.
+    """
+    if start == 0 and stop >= len(line.text):
+        return line
+    runs = []
+    position = 0
+    for length, key in line.runs:
+        end = position + length
+        overlap = min(end, stop) - max(position, start)
+        if overlap > 0:
+            runs.append((overlap, key))
+        position = end
+        if position >= stop:
+            break
+    return ScrollbackLine(line.text[start:stop], tuple(runs))
+
+
+class ViewportRow(NamedTuple):
+    """A display row: a segment of logical line `line` starting at `start`."""
+
+    line: int
+    start: int
+    content: ScrollbackLine
+
+
+class Viewport:
+    """
+    A window of `rows` display rows over the scrollback plus the live line.
+
+    GUI backends only ever hold the rows returned by visible_rows() and map
+    their scrollbar onto `line_count`, so layout and paint cost depend on the
+    window size rather than on the length of the history.
+
+    The scrollback stores logical lines; soft-wrap points for the current width
+    are computed only for lines that are shown and cached per line, so resizing
+    reflows the viewport immediately and the rest of the history lazily as it
+    scrolls into view.
+
+    Attributes:
+        scrollback (Scrollback): The store backing the view.
+        rows (int): Number of visible display rows.
+        cols (int): Number of columns per display row.
+        top (int): Index of the logical line shown first.
+        top_row (int): Wrapped row of `top` shown first.
+        follow (bool): Whether the view sticks to the bottom as output arrives.
+    """
+
+    def __init__(
+        self, scrollback: Scrollback, rows: int, cols: int, cache_lines: int = 4096
+    ) -> None:
+        self.scrollback = scrollback
+        self.rows = max(1, rows)
+        self.cols = max(1, cols)
+        self.top = 0
+        self.top_row = 0
+        self.follow = True
+        self.cache_lines = cache_lines
+        self._wraps: OrderedDict[int, tuple[int, ...]] = OrderedDict()
+        self.live_line = ScrollbackLine("")
+        scrollback.add_clear_listener(self.on_clear)
+
+    @property
+    def line_count(self) -> int:
+        """Number of addressable logical lines: the scrollback plus the live line."""
+        return len(self.scrollback) + 1
+
+    def get_line(self, index: int) -> ScrollbackLine:
+        if index == len(self.scrollback):
+            return self.live_line
+        return self.scrollback.get_line(index)
+
+    def line_wraps(self, index: int, line: ScrollbackLine | None = None) -> tuple[int, ...]:
+        """
+        Returns the wrap points of a logical line at the current width.
+
+        Committed lines are cached; the live line changes too often to cache.
+        """
+        if index >= len(self.scrollback):
+            return wrap_points((line or self.live_line).text, self.cols)
+
+        points = self._wraps.get(index)
+        if points is not None:
+            self._wraps.move_to_end(index)
+            return points
+        line = line or self.scrollback.get_line(index)
+        points = wrap_points(line.text, self.cols)
+        self._wraps[index] = points
+        if len(self._wraps) > self.cache_lines:
+            self._wraps.popitem(last=False)
+        return points
+
+    def bottom_anchor(self) -> tuple[int, int]:
+        """
+        Finds the (line, row) at which a view showing the newest rows starts.
+
+        Only the lines that fit on screen are wrapped, walking up from the end.
+        """
+        remaining = self.rows
+        index = self.line_count - 1
+        while index >= 0:
+            row_count = len(self.line_wraps(index))
+            if row_count >= remaining:
+                return index, row_count - remaining
+            remaining -= row_count
+            index -= 1
+        return 0, 0
+
+    @property
+    def max_top(self) -> int:
+        """The largest valid value of `top`."""
+        return self.bottom_anchor()[0]
+
+    def set_size(self, rows: int, cols: int) -> None:
+        """
+        Resizes the view. Changing the width drops cached wrap points, so only
+        lines that are shown afterwards get reflowed.
+
+        Args:
+            rows (int): The new number of visible rows.
+            cols (int): The new number of columns.
+        """
+        if max(1, cols) != self.cols:
+            self.cols = max(1, cols)
+            self._wraps.clear()
+        self.rows = max(1, rows)
+        if self.follow:
+            self.scroll_to_bottom()
+        else:
+            self.top_row = min(self.top_row, len(self.line_wraps(self.top)) - 1)
+            self._clamp()
+
+    def set_rows(self, rows: int) -> None:
+        """Resizes the view vertically, keeping the current width."""
+        self.set_size(rows, self.cols)
+
+    def _clamp(self) -> None:
+        """Keeps the view from scrolling past the bottom anchor."""
+        anchor = self.bottom_anchor()
+        if (self.top, self.top_row) >= anchor:
+            self.top, self.top_row = anchor
+            self.follow = True
+        else:
+            self.follow = False
+
+    def scroll_to(self, top: int) -> None:
+        """
+        Moves the view so that logical line `top` is shown first.
+
+        Args:
+            top (int): Index of the line to show first; clamped to the valid range.
+        """
+        self.top = max(0, min(top, self.line_count - 1))
+        self.top_row = 0
+        self._clamp()
+
+    def scroll_by(self, rows: int) -> None:
+        """
+        Scrolls the view by a number of display rows (negative scrolls up).
+
+        Args:
+            rows (int): Number of rows to scroll.
+        """
+        index, row = self.top, self.top_row + rows
+        while row < 0 and index > 0:
+            index -= 1
+            row += len(self.line_wraps(index))
+        while index < self.line_count - 1 and row >= len(self.line_wraps(index)):
+            row -= len(self.line_wraps(index))
+            index += 1
+        self.top = index
+        self.top_row = max(0, min(row, len(self.line_wraps(index)) - 1))
+        self._clamp()
+
+    def scroll_to_bottom(self) -> None:
+        """Shows the newest rows and resumes following output."""
+        self.top, self.top_row = self.bottom_anchor()
+        self.follow = True
+
+    def on_clear(self) -> None:
+        """Scrollback clear listener: drops the wrap points of the old lines."""
+        self._wraps.clear()
+        self.scroll_to_bottom()
+
+    def on_lines_appended(self) -> None:
+        """Keeps the view at the bottom when it is following output."""
+        if self.follow:
+            self.scroll_to_bottom()
+
+    def visible_range(self) -> tuple[int, int]:
+        """
+        Returns the range of logical lines that are at least partly visible.
+
+        Returns:
+            tuple[int, int]: The first (inclusive) and last (exclusive) line index.
+        """
+        rows = self.visible_rows()
+        return (rows[0].line, rows[-1].line + 1) if rows else (self.top, self.top)
+
+    def visible_rows(self, live_line: ScrollbackLine | None = None) -> list[ViewportRow]:
+        """
+        Fetches and wraps only the lines needed to fill the viewport.
+
+        Args:
+            live_line (ScrollbackLine | None): The uncommitted line after the
+                scrollback; defaults to the last one passed in.
+
+        Returns:
+            list[ViewportRow]: At most `rows` display rows, top to bottom.
+        """
+        if live_line is not None:
+            self.live_line = live_line
+
+        rows: list[ViewportRow] = []
+        index, skip = self.top, self.top_row
+        while len(rows) < self.rows and index < self.line_count:
+            line = self.get_line(index)
+            points = self.line_wraps(index, line)
+            ends = points[1:] + (len(line.text),)
+            for start, stop in list(zip(points, ends))[skip:]:
+                rows.append(ViewportRow(index, start, slice_line(line, start, stop)))
+                if len(rows) == self.rows:
+                    break
+            index += 1
+            skip = 0
+        return rows
+
+    def visible_lines(self, live_line: ScrollbackLine) -> list[ScrollbackLine]:
+        """
+        Returns the content of the visible display rows.
+
+        Args:
+            live_line (ScrollbackLine): The uncommitted line after the scrollback.
+
+        Returns:
+            list[ScrollbackLine]: At most `rows` row segments, top to bottom.
+        """
+        return [row.content for row in self.visible_rows(live_line)]
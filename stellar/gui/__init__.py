@@ -1,10 +1,31 @@
-from .dear import StellarApp as DearStellarApp
-from .tkinter import StellarApp as TkStellarApp
-from .pyqt6 import StellarApp as QTStellarAPP
-
+from importlib import import_module
 
+# Engine name -> module providing its StellarApp. Modules are imported on
+# demand, so only the selected engine's toolkit is loaded at startup and a
+# missing toolkit only matters when its engine is chosen.
 GUI_ENGINES = {
-    "tkinter": TkStellarApp,
-    "dearpygui": DearStellarApp,
-    "pyqt": QTStellarAPP,
+    "tkinter": "stellar.gui.tkinter",
+    "dearpygui": "stellar.gui.dear",
+    "pyqt": "stellar.gui.pyqt6",
+    "pygame": "stellar.gui.pygame",
+    "headless": "stellar.gui.headless",
 }
+
+DEFAULT_ENGINE = "pyqt"
+
+
+def load_engine(name: str) -> type:
+    """
+    Imports an engine's module and returns its StellarApp class.
+
+    Args:
+        name (str): A key of GUI_ENGINES.
+
+    Returns:
+        type: The engine's StellarApp class.
+    """
+    if name not in GUI_ENGINES:
+        raise ValueError(
+            f"Unknown gui engine {name!r}; expected one of {', '.join(GUI_ENGINES)}"
+        )
+    return import_module(GUI_ENGINES[name]).StellarApp
@@ -2,37 +2,80 @@ import sys
 import traceback
 import gc
 import os
+import queue
+import time
 import dearpygui.dearpygui as dpg
 
 from stellar.components.ansi_parser import ANSIParser
+from stellar.components.screen import Screen
+from stellar.components.scrollback import Scrollback
 from stellar.components.st_pty import StellarPTY
 from stellar.settings.config import config
+from stellar.settings.themes import DEFAULT_BG
 from stellar.utils.logger import StellarLogger
 
 # Set up logger with a basic configuration
 logger = StellarLogger("stellar-gui", log_file="stellar-gui.log")
 
+# Cell size of the default (ProggyClean) font relative to the draw size
+CELL_ASPECT = 7 / 13
+LINE_SPACING = 1.2
+
 
 class TerminalWidget:
+    """
+    Dear PyGui frontend over StellarPTY.
+
+    Output arrives on the PTY thread and is only queued there; the render loop
+    drains the queue once per frame. UI callbacks (scrolling, resizing, command
+    entry) are also run from the render loop rather than dpg's callback thread,
+    through manual callback management, so the screen model and all dpg items
+    are touched from a single thread. The visible rows are drawn into a draw list,
+    one draw layer per row, and only rows that changed since the last frame are
+    redrawn.
+    """
+
     def __init__(self, stellar_pty: StellarPTY):
         self.stellar_pty = stellar_pty
-        self.stellar_pty.set_output_callback(self.append_output)
+        self.stellar_pty.set_output_callback(self.queue_output)
         self.prompt = ""
         self.current_command = ""
         self.command_start_position = 0
         self.ansi_parser = ANSIParser()
+        self.scrollback = Scrollback.from_config(config)
+        self.screen = Screen(self.scrollback, config.rows, config.cols)
+        self.stellar_pty.resize(config.rows, config.cols)
+        self.output_queue: queue.SimpleQueue = queue.SimpleQueue()
+        self.rendered_rows = []
+        self.row_layers = []
+        self.text_size = config.font_size
+        self.cell_width = self.text_size * CELL_ASPECT
+        self.line_height = self.text_size * LINE_SPACING
+        self.pty_resize_at = None
+        self.theme_dirty = False
+        config.subscribe(self.on_config_changed, keys=["theme"])
 
         self.setup_ui()
 
     def setup_ui(self):
         with dpg.window(label="Stellar Terminal Emulator", tag="main_window"):
-            dpg.add_input_text(
-                multiline=True,
-                readonly=True,
-                tag="terminal_output",
-                width=-1,
-                height=-1,
-            )
+            # The text item only holds the viewport; the slider is mapped onto
+            # the scrollback line count
+            with dpg.group(horizontal=True):
+                dpg.add_drawlist(
+                    width=int(config.cols * self.cell_width),
+                    height=int(config.rows * self.line_height),
+                    tag="terminal_output",
+                )
+                dpg.add_slider_int(
+                    tag="terminal_scrollbar",
+                    vertical=True,
+                    height=-30,
+                    min_value=0,
+                    max_value=0,
+                    format="",
+                    callback=self.on_scroll,
+                )
             dpg.add_input_text(
                 label="",
                 callback=self.on_command_enter,
@@ -40,8 +83,25 @@ class TerminalWidget:
                 width=-1,
             )
 
+        with dpg.handler_registry():
+            dpg.add_mouse_wheel_handler(callback=self.on_mouse_wheel)
+
         # Set colors
         dpg.bind_theme(self.create_theme())
+        self.create_row_layers()
+
+    def create_row_layers(self):
+        """Creates one draw layer per visible row, so rows redraw independently."""
+        dpg.delete_item("terminal_output", children_only=True)
+        self.row_layers = [
+            dpg.add_draw_layer(parent="terminal_output")
+            for _ in range(self.screen.viewport.rows)
+        ]
+        self.rendered_rows = []
+
+    def on_config_changed(self, changed):
+        # May run on the config watcher thread; repainted by the render loop
+        self.theme_dirty = True
 
     def create_theme(self):
         with dpg.theme() as theme:
@@ -73,34 +133,139 @@ class TerminalWidget:
         self.stellar_pty.send_input(command)
         dpg.set_value("command_input", "")
 
+    def queue_output(self, output: str):
+        """Called on the PTY thread; hands output to the render loop."""
+        self.output_queue.put(output)
+
+    def process_pending_output(self):
+        """Drains queued output on the render thread and renders it as one batch."""
+        chunks = []
+        while True:
+            try:
+                chunks.append(self.output_queue.get_nowait())
+            except queue.Empty:
+                break
+        if chunks:
+            self.append_output("".join(chunks))
+        if self.theme_dirty:
+            # Cells hold palette indices, so a repaint picks up the new theme
+            self.theme_dirty = False
+            dpg.bind_theme(self.create_theme())
+            self.rendered_rows = []
+            self.render_viewport()
+        if self.pty_resize_at is not None and time.monotonic() >= self.pty_resize_at:
+            self.pty_resize_at = None
+            viewport = self.screen.viewport
+            self.stellar_pty.resize(viewport.rows, viewport.cols)
+
     def append_output(self, output: str):
         try:
-            logger.debug(f"Received output from StellarPTY: {output}")
-            current_text = dpg.get_value("terminal_output")
-            dpg.set_value("terminal_output", current_text + output)
-
-            if not output.endswith(self.prompt):
-                dpg.set_value(
-                    "terminal_output", dpg.get_value("terminal_output") + self.prompt
-                )
+            self.screen.feed(self.ansi_parser.tokenize(output))
+            self.update_scrollbar()
+            if self.screen.viewport.follow:
+                self.render_viewport()
 
         except Exception as e:
             logger.error(f"Error in append_output: {str(e)}")
             logger.error(traceback.format_exc())
 
+    def render_viewport(self):
+        """Redraws the viewport rows that changed since the last render."""
+        rows = self.screen.visible_rows()
+        first = self.screen.first_changed_row(self.rendered_rows, rows)
+        resolve = config.theme.resolve
+        for i in range(first, len(self.row_layers)):
+            layer = self.row_layers[i]
+            dpg.delete_item(layer, children_only=True)
+            if i >= len(rows):
+                continue
+            y = i * self.line_height
+            line = rows[i].content
+            position = 0
+            for length, key in line.runs:
+                text = line.text[position : position + length]
+                x = position * self.cell_width
+                position += length
+                if key is None:
+                    dpg.draw_text((x, y), text, size=self.text_size, parent=layer)
+                    continue
+                foreground, background = resolve(key[0]), resolve(key[1])
+                if key[1] != DEFAULT_BG:
+                    dpg.draw_rectangle(
+                        (x, y),
+                        (x + length * self.cell_width, y + self.line_height),
+                        color=background,
+                        fill=background,
+                        parent=layer,
+                    )
+                if not text.isspace():
+                    dpg.draw_text(
+                        (x, y), text, color=foreground, size=self.text_size, parent=layer
+                    )
+        self.rendered_rows = rows
+
+    def on_resize(self, sender, app_data, user_data=None):
+        """Refits the grid to the window; the PTY hears about it once resizing settles."""
+        width, height = dpg.get_item_rect_size("main_window")
+        rows = max(1, int((height - 60) // self.line_height))
+        cols = max(1, int((width - 50) // self.cell_width))
+        viewport = self.screen.viewport
+        if (rows, cols) == (viewport.rows, viewport.cols):
+            return
+        dpg.configure_item(
+            "terminal_output",
+            width=int(cols * self.cell_width),
+            height=int(rows * self.line_height),
+        )
+        self.screen.resize(rows, cols)
+        self.create_row_layers()
+        self.update_scrollbar()
+        self.render_viewport()
+        self.pty_resize_at = time.monotonic() + config.resize_debounce_ms / 1000
+
+    def update_scrollbar(self):
+        # The vertical slider grows upwards, so the bottom of the history is 0
+        viewport = self.screen.viewport
+        dpg.configure_item("terminal_scrollbar", max_value=viewport.max_top)
+        dpg.set_value("terminal_scrollbar", viewport.max_top - viewport.top)
+
+    def on_scroll(self, sender, app_data, user_data):
+        viewport = self.screen.viewport
+        viewport.scroll_to(viewport.max_top - app_data)
+        self.render_viewport()
+
+    def on_mouse_wheel(self, sender, app_data, user_data):
+        self.screen.viewport.scroll_by(-3 * int(app_data))
+        self.update_scrollbar()
+        self.render_viewport()
+
 
 class StellarApp:
     def __init__(self):
         dpg.create_context()
+        # Callbacks are queued for the render loop instead of run on dpg's thread
+        dpg.configure_app(manual_callback_management=True)
         self.stellar_pty = StellarPTY()
         self.terminal = TerminalWidget(self.stellar_pty)
 
     def run(self):
         dpg.create_viewport(title="Stellar Terminal Emulator", width=800, height=600)
         dpg.setup_dearpygui()
+        dpg.set_primary_window("main_window", True)
+        dpg.set_viewport_resize_callback(self.terminal.on_resize)
         dpg.show_viewport()
         self.terminal.initialize_pty()
-        dpg.start_dearpygui()
+        # Manual render loop, so UI callbacks and PTY output are applied on this
+        # thread between frames
+        next_config_check = time.monotonic()
+        while dpg.is_dearpygui_running():
+            if time.monotonic() >= next_config_check:
+                config.check_for_changes()
+                next_config_check = time.monotonic() + 1
+            dpg.run_callbacks(dpg.get_callback_queue())
+            self.terminal.process_pending_output()
+            dpg.render_dearpygui_frame()
+        self.terminal.scrollback.close()
         dpg.destroy_context()
 
 
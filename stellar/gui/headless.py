@@ -0,0 +1,219 @@
+import argparse
+import codecs
+import os
+import resource
+import select
+import sys
+import time
+
+from stellar.components.ansi_parser import ANSIParser
+from stellar.components.screen import Screen
+from stellar.components.scrollback import Scrollback
+from stellar.components.st_pty import StellarPTY
+from stellar.components.triggers import TriggerEngine
+from stellar.plugins.manager import PLUGIN_DIR, PluginManager
+from stellar.settings.config import config
+from stellar.utils.metrics import metrics
+
+# Pipeline stages, in the order output passes through them
+STAGES = ("read", "parse", "screen", "plugins")
+
+
+class HeadlessTerminal:
+    """
+    The terminal core without a GUI: parser, screen model, scrollback and the
+    plugins' on_output hook.
+
+    Output is processed exactly as a GUI backend would process it, minus the
+    painting, and the time spent in each stage is accumulated.
+
+    Attributes:
+        stage_times (dict[str, float]): Seconds spent per stage.
+        bytes_processed (int): Bytes of output seen.
+        lines (int): Lines committed to the scrollback.
+    """
+
+    def __init__(self, rows: int | None = None, cols: int | None = None) -> None:
+        self.scrollback = Scrollback.from_config(config)
+        self.screen = Screen(self.scrollback, rows or config.rows, cols or config.cols)
+        self.ansi_parser = ANSIParser()
+        # Scans committed lines, so its cost shows up in the screen stage
+        self.triggers = TriggerEngine.from_config(config)
+        self.triggers.attach(self.scrollback)
+        self.plugins = PluginManager()
+        self.plugins.discover_plugins(PLUGIN_DIR)
+        self.plugins.initialize_plugins(self)
+        self.stage_times = dict.fromkeys(STAGES, 0.0)
+        self.bytes_processed = 0
+        self.lines = 0
+
+    def feed(self, output: str) -> None:
+        """Runs decoded output through the pipeline, timing each stage."""
+        start = time.perf_counter()
+        tokens = self.ansi_parser.tokenize(output)
+        tokenized = time.perf_counter()
+        self.lines += self.screen.feed(tokens)
+        done = time.perf_counter()
+        # Queuing only; the plugins' own CPU time is in their output stats
+        self.plugins.handle_output(output)
+
+        self.stage_times["parse"] += tokenized - start
+        self.stage_times["screen"] += done - tokenized
+        self.stage_times["plugins"] += time.perf_counter() - done
+        metrics.record("parse", tokenized - start)
+        metrics.record("screen", done - tokenized)
+        # Nothing is painted, so every batch counts as a skipped frame
+        metrics.count("frames_skipped")
+
+    def close(self) -> None:
+        self.plugins.cleanup_plugins()
+        self.scrollback.close()
+
+
+class StellarApp:
+    """
+    Headless backend: runs a shell or command in StellarPTY and processes its
+    output without painting.
+
+    Without a command, the shell's input is copied from stdin, so a script can
+    be piped in. Statistics are printed when the PTY closes.
+
+    Args:
+        command (str | None): Command to run with `sh -c`; None runs the shell.
+        shell (str): The shell to start.
+    """
+
+    def __init__(self, command: str | None = None, shell: str = "/bin/bash") -> None:
+        self.terminal = HeadlessTerminal()
+        args = ["-c", command] if command else []
+        self.stellar_pty = StellarPTY(shell, args)
+        self.stellar_pty.resize(config.rows, config.cols)
+        self.elapsed = 0.0
+
+    def run(self) -> None:
+        self.stellar_pty.start(threaded=False)
+        fd = self.stellar_pty.master_fd
+        inputs = [] if self.stellar_pty.args else [sys.stdin.fileno()]
+        terminal = self.terminal
+
+        start = time.perf_counter()
+        try:
+            while not self.stellar_pty.closed:
+                # Stop reading our input while the PTY has not taken the last of it
+                pending = self.stellar_pty.write_pending
+                readable, writable, _ = select.select(
+                    [fd, *([] if pending else inputs)], [fd] if pending else [], []
+                )
+                if writable:
+                    self.stellar_pty.flush()
+                if inputs and inputs[0] in readable:
+                    data = os.read(inputs[0], 65536)
+                    # End of our input ends the shell's input too
+                    self.stellar_pty.send_keys(data or b"\x04")
+                    if not data:
+                        inputs = []
+                if fd in readable:
+                    read_start = time.perf_counter()
+                    output = self.stellar_pty.drain()
+                    terminal.stage_times["read"] += time.perf_counter() - read_start
+                    if output:
+                        terminal.feed(output)
+            self.elapsed = time.perf_counter() - start
+            terminal.bytes_processed = self.stellar_pty.bytes_read
+            print_stats(terminal, self.elapsed)
+        finally:
+            # Removes the spill file even if processing failed
+            terminal.close()
+
+
+def replay(path: str, chunk_size: int = 65536) -> tuple[HeadlessTerminal, float]:
+    """
+    Feeds a recorded output stream through the pipeline as fast as possible.
+
+    Args:
+        path (str): File holding raw terminal output.
+        chunk_size (int): Bytes per read, matching what a PTY drain returns.
+
+    Returns:
+        tuple[HeadlessTerminal, float]: The terminal and the elapsed seconds.
+    """
+    terminal = HeadlessTerminal()
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    start = time.perf_counter()
+    try:
+        with open(path, "rb") as stream:
+            while True:
+                read_start = time.perf_counter()
+                data = stream.read(chunk_size)
+                output = decoder.decode(data, final=not data)
+                terminal.stage_times["read"] += time.perf_counter() - read_start
+                if output:
+                    terminal.feed(output)
+                terminal.bytes_processed += len(data)
+                if not data:
+                    break
+    except BaseException:
+        terminal.close()
+        raise
+    return terminal, time.perf_counter() - start
+
+
+def peak_rss() -> int:
+    """Returns the peak resident set size of this process in bytes."""
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return usage if sys.platform == "darwin" else usage * 1024
+
+
+def print_stats(terminal: HeadlessTerminal, elapsed: float) -> None:
+    elapsed = max(elapsed, 1e-9)
+    mib = terminal.bytes_processed / (1 << 20)
+    print(f"elapsed    {elapsed:10.3f} s")
+    print(f"bytes      {mib:10.2f} MiB   {mib / elapsed:10.2f} MiB/s")
+    print(f"lines      {terminal.lines:10d}       {terminal.lines / elapsed:10.0f} lines/s")
+    print(f"peak RSS   {peak_rss() / (1 << 20):10.1f} MiB")
+    usage = terminal.scrollback.memory_usage()
+    print(
+        f"scrollback {usage['hot_lines']} hot lines, {usage['cold_lines']} cold lines"
+        f" in {usage['cold_bytes'] / (1 << 20):.1f} MiB,"
+        f" {usage['spilled_bytes'] / (1 << 20):.1f} MiB spilled"
+    )
+    triggers = terminal.triggers
+    print(
+        f"triggers   {len(triggers.triggers)} rules,"
+        f" {triggers.matches_found} matches in {triggers.lines_scanned} lines"
+    )
+    for name, stats in terminal.plugins.output_stats().items():
+        print(
+            f"plugin     {name}: {stats['calls']} on_output calls,"
+            f" {stats['cpu_time'] * 1000:.1f} ms CPU, {stats['dropped']} dropped,"
+            f" {stats['coalesced']} coalesced ({stats['truncated']} chars cut), throttled {stats['throttled']} times"
+        )
+    total = sum(terminal.stage_times.values()) or 1e-9
+    print("stage          seconds   share")
+    for stage, seconds in terminal.stage_times.items():
+        print(f"  {stage:<10} {seconds:10.3f}  {seconds / total:6.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run Stellar's terminal core without a GUI and report throughput."
+    )
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("-c", "--command", help="command to run in the PTY")
+    source.add_argument("-r", "--replay", help="file with recorded output to replay")
+    parser.add_argument(
+        "--stats-json", metavar="PATH", help="write per-stage timing histograms to PATH on exit"
+    )
+    args = parser.parse_args()
+    if args.stats_json:
+        metrics.dump_on_exit(args.stats_json)
+
+    if args.replay:
+        terminal, elapsed = replay(args.replay)
+        try:
+            print_stats(terminal, elapsed)
+        finally:
+            terminal.close()
+    else:
+        StellarApp(args.command).run()
@@ -0,0 +1,67 @@
+from PyQt6.QtWidgets import QLabel
+from PyQt6.QtCore import QTimer
+from PyQt6.QtGui import QFont
+
+from stellar.utils.metrics import Metrics
+
+
+class PerformanceHUD(QLabel):
+    """
+    Overlay showing live frame rate, per-stage percentiles and counters.
+
+    The frame rate comes from the `frames_presented` counter, i.e. real paints,
+    not timer ticks. Refreshing only reads the metrics, and stops while hidden.
+
+    Args:
+        metrics (Metrics): The metrics to display.
+        parent (QWidget | None): The widget to overlay.
+        interval (int): Refresh period in milliseconds.
+    """
+
+    def __init__(self, metrics: Metrics, parent=None, interval: int = 500):
+        super().__init__(parent)
+        self.metrics = metrics
+        self.last_frames = 0
+        self.interval = interval
+
+        # Set up the appearance
+        self.setStyleSheet("""
+            background-color: rgba(0, 0, 0, 170);
+            color: white;
+            border-radius: 5px;
+            padding: 4px;
+        """)
+        font = QFont("monospace")
+        font.setStyleHint(QFont.StyleHint.Monospace)
+        font.setPointSize(9)
+        self.setFont(font)
+
+        # Set up the timer
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.hide()
+
+    def toggle(self):
+        self.setVisible(not self.isVisible())
+
+    def showEvent(self, event):
+        self.last_frames = self.metrics.counters["frames_presented"]
+        self.timer.start(self.interval)
+        self.refresh()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+        frames = self.metrics.counters["frames_presented"]
+        fps = (frames - self.last_frames) * 1000 / self.interval
+        self.last_frames = frames
+        self.setText("\n".join([f"FPS: {fps:.0f}", *self.metrics.format_lines()]))
+        self.adjustSize()
+        parent = self.parentWidget()
+        if parent is not None:
+            # Keep to the top-right corner of the overlaid widget
+            self.move(parent.width() - self.width() - 8, 8)
+        self.raise_()
@@ -0,0 +1,459 @@
+import os
+import select
+import sys
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import pygame
+
+from stellar.components.ansi_parser import ANSIParser
+from stellar.components.screen import Screen
+from stellar.components.scrollback import Scrollback
+from stellar.components.st_pty import StellarPTY
+from stellar.components.viewport import char_width
+from stellar.input.xterm import ALT, CTRL, SHIFT, encode_key
+from stellar.settings.config import config
+from stellar.settings.themes import DEFAULT_BG, DEFAULT_FG
+from stellar.utils.logger import StellarLogger
+
+logger = StellarLogger("stellar-gui", log_file="stellar-gui.log")
+
+# Paths in config.toml are relative to the repository root
+ROOT = Path(__file__).parent.parent.parent
+
+# pygame keys that have an xterm encoding of their own; other keys send their text
+PYGAME_KEY_NAMES = {
+    pygame.K_UP: "up",
+    pygame.K_DOWN: "down",
+    pygame.K_RIGHT: "right",
+    pygame.K_LEFT: "left",
+    pygame.K_HOME: "home",
+    pygame.K_END: "end",
+    pygame.K_INSERT: "insert",
+    pygame.K_DELETE: "delete",
+    pygame.K_PAGEUP: "page_up",
+    pygame.K_PAGEDOWN: "page_down",
+    pygame.K_RETURN: "return",
+    pygame.K_KP_ENTER: "enter",
+    pygame.K_TAB: "tab",
+    pygame.K_BACKSPACE: "backspace",
+    pygame.K_ESCAPE: "escape",
+    pygame.K_SPACE: " ",
+    pygame.K_LEFTBRACKET: "[",
+    pygame.K_BACKSLASH: "\\",
+    pygame.K_RIGHTBRACKET: "]",
+}
+PYGAME_KEY_NAMES.update(
+    {getattr(pygame, f"K_F{n}"): f"f{n}" for n in range(1, 13)}
+)
+PYGAME_KEY_NAMES.update(
+    {getattr(pygame, f"K_{chr(code)}"): chr(code) for code in range(ord("a"), ord("z") + 1)}
+)
+
+PYGAME_MODIFIERS = (
+    (pygame.KMOD_SHIFT, SHIFT),
+    (pygame.KMOD_ALT, ALT),
+    (pygame.KMOD_CTRL, CTRL),
+)
+
+
+def encode_key_event(event) -> bytes:
+    """Encodes a pygame KEYDOWN event as the bytes an xterm would send."""
+    bits = 0
+    for mask, bit in PYGAME_MODIFIERS:
+        if event.mod & mask:
+            bits |= bit
+    return encode_key(PYGAME_KEY_NAMES.get(event.key), event.unicode, bits)
+
+
+def load_font(size: int, bold: bool = False, italic: bool = False) -> pygame.font.Font:
+    """Loads the configured font, falling back to the system monospace font."""
+    path = Path(config.font_path)
+    if not path.is_absolute():
+        path = ROOT / path
+    try:
+        font = pygame.font.Font(str(path), size)
+    except (FileNotFoundError, OSError):
+        logger.warning(f"Font {path} not found, using the system monospace font")
+        font = pygame.font.SysFont("monospace", size)
+    font.set_bold(bold)
+    font.set_italic(italic)
+    return font
+
+
+class GlyphAtlas:
+    """
+    Caches rendered glyphs for blitting.
+
+    Each (character, bold, italic) glyph is rasterized once, in white, into a
+    slot of an atlas page. Colored copies are made by multiplying the slot with
+    the foreground color and kept in a bounded LRU, so steady-state rendering
+    is blits only.
+
+    Attributes:
+        cell_width (int): Width of one terminal cell in pixels.
+        cell_height (int): Height of one terminal cell in pixels.
+    """
+
+    def __init__(self, size: int, page_cells: int = 64, max_colored: int = 4096) -> None:
+        self.fonts = {
+            (bold, italic): load_font(size, bold, italic)
+            for bold in (False, True)
+            for italic in (False, True)
+        }
+        regular = self.fonts[(False, False)]
+        self.cell_width = max(1, regular.size("M")[0])
+        self.cell_height = max(1, regular.get_linesize())
+        self.page_cells = page_cells
+        self.pages: list[pygame.Surface] = []
+        self.next_slot = page_cells * page_cells  # Forces a page on first use
+        self.slots: dict[tuple[str, bool, bool], tuple[pygame.Surface, pygame.Rect]] = {}
+        self.colored: OrderedDict = OrderedDict()
+        self.max_colored = max_colored
+
+    def _slot(self, glyph: tuple[str, bool, bool]) -> tuple[pygame.Surface, pygame.Rect]:
+        """Returns the atlas page and rectangle holding a white glyph."""
+        slot = self.slots.get(glyph)
+        if slot is not None:
+            return slot
+
+        char, bold, italic = glyph
+        # Wide characters take two slots
+        cells = char_width(char)
+        if self.next_slot % self.page_cells + cells > self.page_cells:
+            self.next_slot += self.page_cells - self.next_slot % self.page_cells
+        if self.next_slot + cells > self.page_cells * self.page_cells:
+            self.pages.append(
+                pygame.Surface(
+                    (self.page_cells * self.cell_width, self.page_cells * self.cell_height),
+                    pygame.SRCALPHA,
+                )
+            )
+            self.next_slot = 0
+        page = self.pages[-1]
+        x = (self.next_slot % self.page_cells) * self.cell_width
+        y = (self.next_slot // self.page_cells) * self.cell_height
+        self.next_slot += cells
+
+        rect = pygame.Rect(x, y, cells * self.cell_width, self.cell_height)
+        rendered = self.fonts[(bold, italic)].render(char, True, (255, 255, 255))
+        page.blit(rendered, rect.topleft, pygame.Rect((0, 0), rect.size))
+        slot = (page, rect)
+        self.slots[glyph] = slot
+        return slot
+
+    def glyph(self, char: str, color: tuple, bold: bool = False, italic: bool = False) -> pygame.Surface:
+        """Returns the glyph of `char` in `color`, rendering it at most once."""
+        key = (char, bold, italic, color)
+        surface = self.colored.get(key)
+        if surface is not None:
+            self.colored.move_to_end(key)
+            return surface
+
+        page, rect = self._slot((char, bold, italic))
+        surface = pygame.Surface(rect.size, pygame.SRCALPHA)
+        surface.blit(page, (0, 0), rect)
+        surface.fill((*color, 255), special_flags=pygame.BLEND_RGBA_MULT)
+        self.colored[key] = surface
+        if len(self.colored) > self.max_colored:
+            self.colored.popitem(last=False)
+        return surface
+
+
+class TerminalSurface:
+    """
+    Renders the Screen's viewport onto a pygame surface, cell by cell.
+
+    Rows are compared with the previous frame and only rows that changed (or
+    that the cursor moved into or out of) are repainted; render() returns their
+    rectangles for `pygame.display.update`.
+    """
+
+    def __init__(self, surface: pygame.Surface, screen: Screen, atlas: GlyphAtlas) -> None:
+        self.surface = surface
+        self.screen = screen
+        self.atlas = atlas
+        self.padding = config.padding
+        self.rendered_rows = []
+        self.cursor = None
+        self.apply_theme()
+
+    def apply_theme(self) -> None:
+        """Takes the palette of the active theme and repaints everything."""
+        self.resolve = config.theme.resolve
+        self.default_fg = config.theme.palette[DEFAULT_FG]
+        self.default_bg = config.theme.palette[DEFAULT_BG]
+        self.invalidate()
+
+    def grid_size(self) -> tuple[int, int]:
+        """Returns the (rows, cols) that fit on the surface."""
+        width, height = self.surface.get_size()
+        rows = max(1, (height - 2 * self.padding) // self.atlas.cell_height)
+        cols = max(1, (width - 2 * self.padding) // self.atlas.cell_width)
+        return rows, cols
+
+    def invalidate(self) -> None:
+        """Forces a full repaint on the next render."""
+        self.rendered_rows = []
+        self.surface.fill(self.default_bg)
+
+    def row_rect(self, index: int) -> pygame.Rect:
+        return pygame.Rect(
+            0,
+            self.padding + index * self.atlas.cell_height,
+            self.surface.get_width(),
+            self.atlas.cell_height,
+        )
+
+    def cursor_cell(self, rows) -> tuple[int, int] | None:
+        """Returns the (row, column) of the terminal cursor if it is visible."""
+        live = len(self.screen.scrollback)
+        column = self.screen.line.cursor
+        for index in range(len(rows) - 1, -1, -1):
+            row = rows[index]
+            if row.line != live:
+                break
+            if row.start <= column or index == 0:
+                return index, max(0, column - row.start)
+        return None
+
+    def render(self) -> list[pygame.Rect]:
+        """
+        Repaints the rows that changed since the last call.
+
+        Returns:
+            list[pygame.Rect]: The dirty rectangles.
+        """
+        rows = self.screen.visible_rows()
+        old_rows = self.rendered_rows
+        cursor = self.cursor_cell(rows)
+
+        dirty_rows = {
+            i
+            for i in range(max(len(rows), len(old_rows)))
+            if i >= len(rows) or i >= len(old_rows) or rows[i] != old_rows[i]
+        }
+        if cursor != self.cursor:
+            for cell in (self.cursor, cursor):
+                if cell is not None:
+                    dirty_rows.add(cell[0])
+        self.rendered_rows = rows
+        self.cursor = cursor
+
+        dirty = []
+        for index in sorted(dirty_rows):
+            rect = self.row_rect(index)
+            self.surface.fill(self.default_bg, rect)
+            if index < len(rows):
+                self.draw_row(index, rows[index].content)
+            dirty.append(rect)
+        return dirty
+
+    def draw_row(self, index: int, line) -> None:
+        cell_width = self.atlas.cell_width
+        cell_height = self.atlas.cell_height
+        y = self.padding + index * cell_height
+        x = self.padding
+        column = 0
+        position = 0
+        glyph = self.atlas.glyph
+        blit = self.surface.blit
+        cursor_column = (
+            self.cursor[1] if self.cursor and self.cursor[0] == index else None
+        )
+        for length, key in line.runs:
+            if key is None:
+                foreground, background, bold, italic, underline = (
+                    self.default_fg,
+                    self.default_bg,
+                    False,
+                    False,
+                    False,
+                )
+            else:
+                foreground, background, bold, italic, underline = key
+                foreground, background = self.resolve(foreground), self.resolve(background)
+            text = line.text[position : position + length]
+            position += length
+            run_x = x + column * cell_width
+            if background != self.default_bg:
+                width = sum(char_width(char) for char in text) * cell_width
+                self.surface.fill(background, (run_x, y, width, cell_height))
+            for char in text:
+                cx = x + column * cell_width
+                if column == cursor_column:
+                    # Block cursor: swap the colors of this cell
+                    self.surface.fill(foreground, (cx, y, cell_width, cell_height))
+                    if char != " ":
+                        blit(glyph(char, background, bold, italic), (cx, y))
+                elif char != " ":
+                    blit(glyph(char, foreground, bold, italic), (cx, y))
+                column += char_width(char)
+            if underline:
+                self.surface.fill(
+                    foreground, (run_x, y + cell_height - 2, x + column * cell_width - run_x, 1)
+                )
+        if cursor_column is not None and cursor_column >= column:
+            self.surface.fill(
+                self.default_fg,
+                (x + cursor_column * cell_width, y, cell_width, cell_height),
+            )
+
+
+class StellarApp:
+    """
+    pygame frontend over StellarPTY.
+
+    The PTY runs in non-threaded mode and is drained between frames; only the
+    dirty rectangles of each frame are passed to `pygame.display.update`. Set
+    SDL_VIDEODRIVER=dummy to run without a display.
+    """
+
+    def __init__(self, fps: int = 60) -> None:
+        pygame.display.init()
+        pygame.font.init()
+        self.fps = fps
+        self.atlas = GlyphAtlas(config.font_size)
+        width = config.cols * self.atlas.cell_width + 2 * config.padding
+        height = config.rows * self.atlas.cell_height + 2 * config.padding
+        self.window = pygame.display.set_mode((width, height), pygame.RESIZABLE)
+        pygame.display.set_caption("Stellar Terminal Emulator")
+        pygame.key.set_repeat(400, 30)
+
+        self.scrollback = Scrollback.from_config(config)
+        self.screen = Screen(self.scrollback, config.rows, config.cols)
+        self.ansi_parser = ANSIParser()
+        self.terminal = TerminalSurface(self.window, self.screen, self.atlas)
+        self.theme_dirty = False
+        config.subscribe(self.on_config_changed, keys=["theme"])
+        self.stellar_pty = StellarPTY("/bin/bash")
+        self.stellar_pty.resize(config.rows, config.cols)
+        self.pty_resize_at = None
+        # Set to a list by benchmark_frames() to record each frame's duration
+        self.frame_times: list[float] | None = None
+
+    def append_output(self, output: str) -> None:
+        # tokenize() also picks up the title the shell sets
+        self.screen.feed(self.ansi_parser.tokenize(output))
+        title = self.ansi_parser.get_terminal_title()
+        if title:
+            pygame.display.set_caption(f"Stellar Term - {title}")
+
+    def on_resize(self) -> None:
+        self.window = pygame.display.get_surface()
+        self.terminal.surface = self.window
+        rows, cols = self.terminal.grid_size()
+        self.screen.resize(rows, cols)
+        self.terminal.invalidate()
+        pygame.display.flip()
+        # The shell only hears about the size once resizing settles
+        self.pty_resize_at = time.monotonic() + config.resize_debounce_ms / 1000
+
+    def on_config_changed(self, changed) -> None:
+        self.theme_dirty = True
+
+    def handle_event(self, event) -> bool:
+        """Handles one pygame event; returns False when the window was closed."""
+        if event.type == pygame.QUIT:
+            return False
+        if event.type == pygame.VIDEORESIZE:
+            self.on_resize()
+        elif event.type == pygame.MOUSEWHEEL:
+            self.screen.viewport.scroll_by(-3 * event.y)
+        elif event.type == pygame.KEYDOWN:
+            data = encode_key_event(event)
+            if data:
+                if not self.screen.viewport.follow:
+                    self.screen.viewport.scroll_to_bottom()
+                self.stellar_pty.send_keys(data)
+        return True
+
+    def frame(self) -> None:
+        """Renders one frame and pushes only its dirty rectangles to the display."""
+        start = time.perf_counter()
+        dirty = self.terminal.render()
+        if dirty:
+            pygame.display.update(dirty)
+        if self.frame_times is not None:
+            self.frame_times.append(time.perf_counter() - start)
+
+    def run(self) -> None:
+        self.stellar_pty.start(threaded=False)
+        fd = self.stellar_pty.master_fd
+        frame_budget = 1 / self.fps
+        next_config_check = time.monotonic()
+        running = True
+        try:
+            while running:
+                if time.monotonic() >= next_config_check:
+                    config.check_for_changes()
+                    next_config_check = time.monotonic() + 1
+                if self.theme_dirty:
+                    # Cells hold palette indices, so a repaint picks up the new theme
+                    self.theme_dirty = False
+                    self.terminal.apply_theme()
+                    pygame.display.flip()
+
+                for event in pygame.event.get():
+                    running = self.handle_event(event) and running
+
+                # Sleep until output arrives or the next frame is due; also wake
+                # up to flush input the PTY could not take yet
+                pending = [fd] if self.stellar_pty.write_pending else []
+                readable, writable, _ = select.select([fd], pending, [], frame_budget)
+                if writable:
+                    self.stellar_pty.flush()
+                if readable:
+                    output = self.stellar_pty.drain()
+                    if output:
+                        self.append_output(output)
+                    if self.stellar_pty.closed:
+                        running = False
+
+                if self.pty_resize_at is not None and time.monotonic() >= self.pty_resize_at:
+                    self.pty_resize_at = None
+                    self.stellar_pty.resize(*self.terminal.grid_size())
+
+                self.frame()
+        finally:
+            # Hangs up the shell and removes the spill file even if the loop failed
+            self.stellar_pty.close()
+            self.scrollback.close()
+            pygame.quit()
+
+
+def benchmark_frames(frames: int = 300) -> None:
+    """
+    Measures frame time headlessly by feeding colored output between frames.
+
+    Run with `SDL_VIDEODRIVER=dummy python -m stellar.gui.pygame --benchmark`.
+    """
+    app = StellarApp()
+    line = "".join(
+        f"\x1b[{31 + i % 7}m{i:04d} lorem ipsum dolor sit amet\x1b[0m " for i in range(3)
+    )
+    try:
+        app.frame()
+        app.frame_times = []
+        for i in range(frames):
+            app.append_output(f"{i:06d} {line}\n")
+            app.frame()
+
+        times = sorted(app.frame_times)
+        mean = sum(times) / len(times)
+        print(f"{len(times)} frames ({config.rows}x{config.cols} cells)")
+        print(f"  mean {mean * 1000:.2f} ms  p50 {times[len(times) // 2] * 1000:.2f} ms"
+              f"  p99 {times[int(len(times) * 0.99)] * 1000:.2f} ms")
+        print(f"  {len(app.atlas.slots)} glyphs in atlas, {len(app.atlas.colored)} colored")
+    finally:
+        app.scrollback.close()
+        pygame.quit()
+
+
+if __name__ == "__main__":
+    if "--benchmark" in sys.argv:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        benchmark_frames()
+    else:
+        StellarApp().run()
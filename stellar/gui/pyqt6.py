@@ -1,17 +1,132 @@
 import sys
-from PyQt6.QtWidgets import QApplication, QWidget, QVBoxLayout, QLabel, QTextEdit
-from PyQt6.QtGui import QColor, QFont, QTextCharFormat, QTextCursor
-from PyQt6.QtCore import Qt, pyqtSlot, QTimer, QTime, QObject, pyqtSignal
-
+import time
+from bisect import bisect_left
+from functools import lru_cache
+from PyQt6.QtWidgets import (
+    QApplication,
+    QWidget,
+    QHBoxLayout,
+    QVBoxLayout,
+    QScrollBar,
+    QTextEdit,
+)
+from PyQt6.QtGui import (
+    QColor,
+    QFont,
+    QFontMetrics,
+    QKeySequence,
+    QShortcut,
+    QTextCharFormat,
+    QTextCursor,
+)
+from PyQt6.QtCore import (
+    Qt,
+    pyqtSlot,
+    QTimer,
+    QObject,
+    QSocketNotifier,
+    pyqtSignal,
+)
+
+from stellar.components.ansi import ANSI_COLORS
 from stellar.components.ansi_parser import ANSIParser
+from stellar.components.screen import Screen
+from stellar.components.scrollback import Scrollback
+from stellar.components.search import ScrollbackSearch
 from stellar.components.st_pty import StellarPTY
+from stellar.components.triggers import TriggerEngine
+from stellar.input.xterm import ALT, CTRL, SHIFT, encode_key
+from stellar.plugins.manager import PLUGIN_DIR, PluginManager
 from stellar.settings.config import config
-from stellar.utils.logger import StellarLogger
+from stellar.gui.hud import PerformanceHUD
+from stellar.utils.logger import StellarLogger, tracer
+from stellar.utils.metrics import metrics
 
 logger = StellarLogger("stellar-gui", log_file="stellar-gui.log")
+trace = tracer("render")
+
+# Trigger highlights kept for repainting; the oldest half is dropped past this
+MAX_TRIGGER_HIGHLIGHTS = 10000
+
+
+@lru_cache(maxsize=256)
+def char_format(key: tuple) -> QTextCharFormat:
+    """
+    Builds the QTextCharFormat for a style key.
+
+    Formats are cached per distinct style (LRU), so colors and font flags are
+    converted once instead of for every inserted run. Colors are resolved
+    through the active theme's palette; clear the cache when the theme changes.
+    """
+    char_format = QTextCharFormat()
+    if key is None:
+        return char_format
+    foreground, background, bold, italic, underline = key
+    resolve = config.theme.resolve
+    char_format.setForeground(QColor(*resolve(foreground)))
+    char_format.setBackground(QColor(*resolve(background)))
+    if bold:
+        char_format.setFontWeight(QFont.Weight.Bold)
+    if italic:
+        char_format.setFontItalic(True)
+    if underline:
+        char_format.setFontUnderline(True)
+    return char_format
+
+
+# Qt keys that have an xterm encoding of their own; other keys send their text
+QT_KEY_NAMES = {
+    Qt.Key.Key_Up: "up",
+    Qt.Key.Key_Down: "down",
+    Qt.Key.Key_Right: "right",
+    Qt.Key.Key_Left: "left",
+    Qt.Key.Key_Home: "home",
+    Qt.Key.Key_End: "end",
+    Qt.Key.Key_Insert: "insert",
+    Qt.Key.Key_Delete: "delete",
+    Qt.Key.Key_PageUp: "page_up",
+    Qt.Key.Key_PageDown: "page_down",
+    Qt.Key.Key_Return: "return",
+    Qt.Key.Key_Enter: "enter",
+    Qt.Key.Key_Tab: "tab",
+    Qt.Key.Key_Backtab: "tab",
+    Qt.Key.Key_Backspace: "backspace",
+    Qt.Key.Key_Escape: "escape",
+    Qt.Key.Key_At: "@",
+    Qt.Key.Key_Space: " ",
+    Qt.Key.Key_BracketLeft: "[",
+    Qt.Key.Key_Backslash: "\\",
+    Qt.Key.Key_BracketRight: "]",
+    Qt.Key.Key_AsciiCircum: "^",
+    Qt.Key.Key_Underscore: "_",
+}
+QT_KEY_NAMES.update(
+    {getattr(Qt.Key, f"Key_F{n}"): f"f{n}" for n in range(1, 13)}
+)
+QT_KEY_NAMES.update(
+    {getattr(Qt.Key, f"Key_{chr(code)}"): chr(code).lower() for code in range(65, 91)}
+)
+
+QT_MODIFIERS = (
+    (Qt.KeyboardModifier.ShiftModifier, SHIFT),
+    (Qt.KeyboardModifier.AltModifier, ALT),
+    (Qt.KeyboardModifier.ControlModifier, CTRL),
+)
+
+
+def encode_key_event(event) -> bytes:
+    """Encodes a QKeyEvent as the bytes an xterm would send."""
+    modifiers = event.modifiers()
+    bits = 0
+    for flag, bit in QT_MODIFIERS:
+        if modifiers & flag:
+            bits |= bit
+    return encode_key(QT_KEY_NAMES.get(event.key()), event.text(), bits)
 
 
 class PTYHandler(QObject):
+    """Runs StellarPTY I/O on its thread and forwards output via a queued signal."""
+
     output_ready = pyqtSignal(str)
 
     def __init__(self, stellar_pty):
@@ -19,16 +134,92 @@ class PTYHandler(QObject):
         self.stellar_pty = stellar_pty
         self.stellar_pty.set_output_callback(self.handle_output)
 
+    def start(self):
+        self.stellar_pty.start()
+
     def handle_output(self, output):
         self.output_ready.emit(output)
 
     def send_input(self, input_data):
         self.stellar_pty.send_input(input_data)
 
+    def send_keys(self, data):
+        self.stellar_pty.send_keys(data)
+
+    def stop(self):
+        # The I/O thread exits by itself once the PTY is closed
+        pass
+
+
+class NotifierPTYHandler(QObject):
+    """
+    Reads StellarPTY output on the GUI event loop.
+
+    `master_fd` is registered with a QSocketNotifier and drained in batches
+    when it becomes readable, so there is no I/O thread, no input queue and no
+    cross-thread signal per read. Writes never block the GUI thread: input the
+    PTY cannot take yet stays buffered in StellarPTY and is flushed by a second
+    notifier, enabled only while some is pending. Exposes the same interface
+    as PTYHandler.
+    """
+
+    output_ready = pyqtSignal(str)
+
+    def __init__(self, stellar_pty):
+        super().__init__()
+        self.stellar_pty = stellar_pty
+        self.notifier = None
+        self.write_notifier = None
+
+    def start(self):
+        self.stellar_pty.start(threaded=False)
+        fd = self.stellar_pty.master_fd
+        self.notifier = QSocketNotifier(fd, QSocketNotifier.Type.Read, self)
+        self.notifier.activated.connect(self.handle_readable)
+        self.write_notifier = QSocketNotifier(fd, QSocketNotifier.Type.Write, self)
+        self.write_notifier.setEnabled(False)
+        self.write_notifier.activated.connect(self.handle_writable)
+
+    def handle_readable(self):
+        output = self.stellar_pty.drain()
+        if output:
+            self.output_ready.emit(output)
+        if self.stellar_pty.closed:
+            self.stop()
+
+    def handle_writable(self):
+        if self.stellar_pty.flush():
+            self.write_notifier.setEnabled(False)
+
+    def watch_writes(self):
+        if self.stellar_pty.write_pending and not self.stellar_pty.closed:
+            self.write_notifier.setEnabled(True)
+
+    def send_input(self, input_data):
+        self.stellar_pty.send_input(input_data)
+        self.watch_writes()
+
+    def send_keys(self, data):
+        self.stellar_pty.send_keys(data)
+        self.watch_writes()
+
+    def stop(self):
+        for notifier in (self.notifier, self.write_notifier):
+            if notifier is not None:
+                notifier.setEnabled(False)
+
+
+PTY_HANDLERS = {
+    "thread": PTYHandler,
+    "notifier": NotifierPTYHandler,
+}
+
 
 class TerminalWidget(QTextEdit):
     title_changed = pyqtSignal(str)
     cwd_changed = pyqtSignal(str)
+    search_results = pyqtSignal(int, list)
+    theme_changed = pyqtSignal()
 
     def __init__(self, stellar_pty: StellarPTY) -> None:
         super().__init__()
@@ -39,11 +230,37 @@ class TerminalWidget(QTextEdit):
         self.current_command = ""
         self.command_start_position = 0
         self.ansi_parser = ANSIParser()
-        self.buffer_size = 0
-        self.line_buffer = ""
+        self.scrollback = Scrollback.from_config(config)
+        self.screen = Screen(self.scrollback, config.rows, config.cols)
+        self.rendered_rows = []
+        self.grid_size = (config.rows, config.cols)
+        self.stellar_pty.resize(*self.grid_size)
+        self.search = ScrollbackSearch(self.scrollback)
+        self.search_generation = 0
+        self.search_matches = []
+        # Trigger highlights arrive in line order as lines are committed
+        self.trigger_matches = []
+        self.triggers = TriggerEngine.from_config(config)
+        self.triggers.attach(self.scrollback)
+        self.triggers.on("highlight", self.add_trigger_highlight)
+        self.triggers.on("beep", lambda match: QApplication.beep())
+        self.scrollback.add_clear_listener(self.on_scrollback_cleared)
+        # Plugins see the raw output on their own worker threads (on_output)
+        self.plugins = PluginManager()
+        self.plugins.discover_plugins(PLUGIN_DIR)
+        self.plugins.initialize_plugins(self)
+        # In raw mode keys go straight to the shell, which does the echoing
+        self.raw_input = config.input_mode == "raw"
+        self.pending_input = bytearray()
         self.setup_ui()
 
-        self.pty_handler = PTYHandler(self.stellar_pty)
+        self.search_results.connect(self.add_search_matches)
+        self.theme_changed.connect(self.apply_theme)
+        config.subscribe(self.on_config_changed, keys=["theme"])
+
+        self.pty_handler = PTY_HANDLERS.get(config.pty_mode, PTYHandler)(
+            self.stellar_pty
+        )
         self.pty_handler.output_ready.connect(self.process_output)
 
         # Add a flag to track whether we're currently at a prompt
@@ -54,9 +271,23 @@ class TerminalWidget(QTextEdit):
         self.output_end_timer.setSingleShot(True)
         self.output_end_timer.timeout.connect(self.handle_output_end)
 
+        # Resizes reflow the viewport at once but reach the PTY debounced
+        self.resize_timer = QTimer(self)
+        self.resize_timer.setSingleShot(True)
+        self.resize_timer.timeout.connect(self.apply_pty_size)
+
         QTimer.singleShot(0, self.initialize_pty)
 
     def setup_ui(self) -> None:
+        self.apply_stylesheet()
+        # The document only ever holds the viewport; history is reached through
+        # a scrollbar mapped onto the scrollback instead of the built-in one
+        self.setLineWrapMode(QTextEdit.LineWrapMode.NoWrap)
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.scrollbar = QScrollBar(Qt.Orientation.Vertical)
+        self.scrollbar.valueChanged.connect(self.on_scrollbar_moved)
+
+    def apply_stylesheet(self) -> None:
         self.setStyleSheet(f"""
             background-color: {config.theme.get_default_bg()};
             color: {config.theme.get_default_fg()};
@@ -65,17 +296,34 @@ class TerminalWidget(QTextEdit):
             font-weight: 600;
         """)
 
+    def on_config_changed(self, changed: dict) -> None:
+        # May be called from the config watcher thread; the signal is queued
+        self.theme_changed.emit()
+
+    @pyqtSlot()
+    def apply_theme(self) -> None:
+        """Repaints with the new palette; stored cells keep their palette indices."""
+        char_format.cache_clear()
+        self.apply_stylesheet()
+        self.rendered_rows = []
+        self.render_viewport()
+
     def initialize_pty(self) -> None:
         try:
-            self.stellar_pty.start()
+            self.pty_handler.start()
         except Exception as e:
             logger.error(f"Failed to start StellarPTY: {str(e)}")
 
     @pyqtSlot(str)
     def process_output(self, output: str) -> None:
         try:
-            # Process title and CWD changes
-            self.ansi_parser.process_title_and_cwd(output)
+            # Process the entire output at once
+            trace.debug("Output to append: %r", output)
+            self.append_output(output)
+            # Only queues the output; plugins handle it off the GUI thread
+            self.plugins.handle_output(output)
+
+            # tokenize() has picked up title and CWD changes
             new_title = self.ansi_parser.get_terminal_title()
             new_cwd = self.ansi_parser.get_current_working_directory()
 
@@ -84,74 +332,289 @@ class TerminalWidget(QTextEdit):
             if new_cwd:
                 self.cwd_changed.emit(new_cwd)
 
-            # Process the entire output at once
-            print("Outpt to append: ", output)
-            self.append_output(output)
-
-            self.output_end_timer.start(100)
-            self.command_start_position = self.textCursor().position()
+            if not self.raw_input:
+                self.output_end_timer.start(100)
 
         except Exception as e:
             logger.error(f"Error in process_output: {str(e)}")
 
     def append_output(self, output: str) -> None:
         try:
-            cursor = self.textCursor()
-            cursor.movePosition(QTextCursor.MoveOperation.End)
-            self.setTextCursor(cursor)
-
-            # Handle buffer size limits
-            new_size = self.buffer_size + len(output)
-            if new_size > config.buffer_size:
-                chars_to_remove = new_size - config.buffer_size
-                cursor.movePosition(QTextCursor.MoveOperation.Start)
-                cursor.movePosition(
-                    QTextCursor.MoveOperation.Right,
-                    QTextCursor.MoveMode.KeepAnchor,
-                    chars_to_remove,
-                )
-                cursor.removeSelectedText()
-                self.buffer_size = self.document().characterCount()
-
-            cursor.movePosition(QTextCursor.MoveOperation.End)
-
-            print("Ouput before inserting: ", output)
-            # Process and insert the entire output at once
-            for text, style in self.ansi_parser.parse(output):
-                self.insert_styled_text(text, style)
-
-            self.buffer_size += len(output)
-
-            cursor.movePosition(QTextCursor.MoveOperation.End)
-            self.setTextCursor(cursor)
+            trace.debug("Output before inserting: %r", output)
+            start = time.perf_counter()
+            tokens = self.ansi_parser.tokenize(output)
+            parsed = time.perf_counter()
+            self.screen.feed(tokens)
+            metrics.record("parse", parsed - start)
+            metrics.record("screen", time.perf_counter() - parsed)
+            self.update_scrollbar()
+            if self.screen.viewport.follow:
+                self.render_viewport()
+            else:
+                metrics.count("frames_skipped")
 
         except Exception as e:
             logger.error(f"Error in append_output: {str(e)}")
 
+    def render_viewport(self) -> None:
+        """Repaints the document rows that differ from the viewport."""
+        start = time.perf_counter()
+        rows = self.screen.visible_rows()
+        first = self.screen.first_changed_row(self.rendered_rows, rows)
+        self.rendered_rows = rows
+
+        # One edit block per render, so the document is laid out once
+        cursor = self.textCursor()
+        cursor.beginEditBlock()
+        if first == 0:
+            cursor.select(QTextCursor.SelectionType.Document)
+            cursor.removeSelectedText()
+        else:
+            # Keep the unchanged rows; drop everything after them
+            block = self.document().findBlockByNumber(first)
+            if block.isValid():
+                cursor.setPosition(block.position() - 1)
+            else:
+                # Only the typed command after the last row needs redrawing
+                cursor.setPosition(self.command_start_position)
+            cursor.movePosition(
+                QTextCursor.MoveOperation.End, QTextCursor.MoveMode.KeepAnchor
+            )
+            cursor.removeSelectedText()
+
+        for i, row in enumerate(rows[first:], start=first):
+            if i:
+                cursor.insertText("\n")
+            line = row.content
+            position = 0
+            for length, key in line.runs:
+                cursor.insertText(
+                    line.text[position : position + length], char_format(key)
+                )
+                position += length
+
+        # Keep a partially typed command on the live line
+        self.command_start_position = cursor.position()
+        if self.current_command and self.screen.viewport.follow:
+            cursor.insertText(self.current_command)
+        cursor.endEditBlock()
+        if self.raw_input:
+            self.place_terminal_cursor(cursor)
+        self.setTextCursor(cursor)
+        self.highlight_visible_matches()
+        metrics.record("layout", time.perf_counter() - start)
+
+    def paintEvent(self, event):
+        # Each call draws a frame of the viewport
+        start = time.perf_counter()
+        super().paintEvent(event)
+        metrics.record("paint", time.perf_counter() - start)
+        metrics.count("frames_presented")
+
+    def place_terminal_cursor(self, cursor: QTextCursor) -> None:
+        """Moves the text cursor to the live line's cursor column, if it is shown."""
+        live = len(self.scrollback)
+        column = self.screen.line.cursor
+        for block_number in range(len(self.rendered_rows) - 1, -1, -1):
+            row = self.rendered_rows[block_number]
+            if row.line != live:
+                break
+            if row.start <= column or block_number == 0:
+                block = self.document().findBlockByNumber(block_number)
+                offset = min(max(0, column - row.start), block.length() - 1)
+                cursor.setPosition(block.position() + offset)
+                return
+
+    def update_scrollbar(self) -> None:
+        """Maps the scrollbar onto the scrollback line count."""
+        viewport = self.screen.viewport
+        self.scrollbar.blockSignals(True)
+        self.scrollbar.setRange(0, viewport.max_top)
+        self.scrollbar.setPageStep(viewport.rows)
+        self.scrollbar.setValue(viewport.top)
+        self.scrollbar.blockSignals(False)
+
+    def on_scrollbar_moved(self, value: int) -> None:
+        self.screen.viewport.scroll_to(value)
+        self.render_viewport()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        font_metrics = QFontMetrics(self.font())
+        margin = 2 * int(self.document().documentMargin())
+        rows = max(1, (self.viewport().height() - margin) // font_metrics.lineSpacing())
+        cols = max(
+            1,
+            (self.viewport().width() - margin)
+            // max(1, font_metrics.horizontalAdvance("W")),
+        )
+        if (rows, cols) == self.grid_size:
+            return
+        self.grid_size = (rows, cols)
+        self.screen.resize(rows, cols)
+        self.update_scrollbar()
+        self.render_viewport()
+        self.resize_timer.start(config.resize_debounce_ms)
+
+    def apply_pty_size(self) -> None:
+        self.stellar_pty.resize(*self.grid_size)
+
+    def wheelEvent(self, event):
+        # One notch (120) scrolls three lines
+        lines = -event.angleDelta().y() // 40
+        if lines:
+            self.screen.viewport.scroll_by(lines)
+            self.update_scrollbar()
+            self.render_viewport()
+
     def handle_output_end(self):
         # This method is called when we think the command output has ended
         self.at_prompt = True
         self.prompt = self.toPlainText().split("\n")[-1]
         self.command_start_position = self.textCursor().position()
 
-    def insert_styled_text(self, text: str, style: dict) -> None:
-        cursor = self.textCursor()
-        char_format = QTextCharFormat()
-        char_format.setForeground(QColor(*style["foreground"]))
-        char_format.setBackground(QColor(*style["background"]))
-        if style["bold"]:
-            char_format.setFontWeight(QFont.Weight.Bold)
-        if style["italic"]:
-            char_format.setFontItalic(True)
-        if style["underline"]:
-            char_format.setFontUnderline(True)
-        cursor.insertText(text, char_format)
+    def find(self, pattern: str, regex: bool = False, ignore_case: bool = False) -> None:
+        """Searches the scrollback in the background and highlights visible hits."""
+        self.search_generation += 1
+        generation = self.search_generation
+        self.search_matches = []
+        self.highlight_visible_matches()
+        self.search.search(
+            pattern,
+            regex=regex,
+            ignore_case=ignore_case,
+            on_matches=lambda matches: self.search_results.emit(generation, matches),
+        )
+
+    def clear_search(self) -> None:
+        self.search.cancel()
+        self.search_generation += 1
+        self.search_matches = []
+        self.highlight_visible_matches()
+
+    @pyqtSlot(int, list)
+    def add_search_matches(self, generation: int, matches: list) -> None:
+        # Drop batches still in flight from a superseded search
+        if generation != self.search_generation:
+            return
+        self.search_matches.extend(matches)
+        self.highlight_visible_matches()
+
+    def on_scrollback_cleared(self) -> None:
+        # Highlights refer to line indices that now belong to new lines
+        self.clear_search()
+        self.trigger_matches = []
+        self.rendered_rows = []
+        self.update_scrollbar()
+        self.render_viewport()
+
+    def add_trigger_highlight(self, match) -> None:
+        self.trigger_matches.append(match)
+        # Only recent highlights can still be on screen often enough to matter
+        if len(self.trigger_matches) > MAX_TRIGGER_HIGHLIGHTS:
+            del self.trigger_matches[: MAX_TRIGGER_HIGHLIGHTS // 2]
+
+    def highlight_visible_matches(self) -> None:
+        """Highlights the search and trigger matches that fall inside the viewport."""
+        rows = self.rendered_rows
+        if not rows:
+            self.setExtraSelections([])
+            return
+
+        theme = config.theme
+        selections = []
+        for matches, background in (
+            (self.search_matches, theme.get_bright_color(ANSI_COLORS.YELLOW)),
+            (self.trigger_matches, theme.get_bright_color(ANSI_COLORS.RED)),
+        ):
+            selections += self.match_selections(rows, matches, QColor(background))
+        self.setExtraSelections(selections)
+
+    def match_selections(self, rows, matches, background: QColor) -> list:
+        """Builds extra selections for the line-sorted matches visible in `rows`."""
+        key = lambda match: match.line  # noqa: E731
+        lo = bisect_left(matches, rows[0].line, key=key)
+        hi = bisect_left(matches, rows[-1].line + 1, key=key)
+        by_line = {}
+        for match in matches[lo:hi]:
+            by_line.setdefault(match.line, []).append(match)
+        if not by_line:
+            return []
+
+        # Document block k shows display row k, a wrapped segment of a line
+        document = self.document()
+        foreground = QColor(config.theme.get_default_bg())
+        selections = []
+        for block_number, row in enumerate(rows):
+            row_end = row.start + len(row.content.text)
+            for match in by_line.get(row.line, ()):
+                start = max(match.start, row.start) - row.start
+                end = min(match.end, row_end) - row.start
+                if end <= start:
+                    continue
+                block = document.findBlockByNumber(block_number)
+                cursor = QTextCursor(block)
+                cursor.setPosition(block.position() + start)
+                cursor.setPosition(
+                    block.position() + end, QTextCursor.MoveMode.KeepAnchor
+                )
+                selection = QTextEdit.ExtraSelection()
+                selection.cursor = cursor
+                selection.format.setBackground(background)
+                selection.format.setForeground(foreground)
+                selections.append(selection)
+        return selections
+
+    def send_key(self, event) -> None:
+        """
+        Encodes a key press and queues it for the PTY.
+
+        Keys delivered in the same event loop iteration (typed ahead, auto-repeat,
+        input method commits) are coalesced into a single write.
+        """
+        data = encode_key_event(event)
+        if not data:
+            return
+        self.queue_input(data)
+
+    def queue_input(self, data: bytes) -> None:
+        if not self.screen.viewport.follow:
+            # Typing jumps back to the live line
+            self.screen.viewport.scroll_to_bottom()
+            self.update_scrollbar()
+            self.render_viewport()
+        if not self.pending_input:
+            QTimer.singleShot(0, self.flush_input)
+        self.pending_input += data
+
+    def flush_input(self) -> None:
+        data = bytes(self.pending_input)
+        self.pending_input.clear()
+        if data:
+            self.pty_handler.send_keys(data)
+
+    def insertFromMimeData(self, source):
+        if not self.raw_input:
+            super().insertFromMimeData(source)
+            return
+        if source.hasText():
+            self.queue_input(source.text().replace("\n", "\r").encode("utf-8"))
 
     def keyPressEvent(self, event):
+        if self.raw_input:
+            self.send_key(event)
+            return
+
         if not self.at_prompt:
             # If we're not at a prompt, don't allow input
             return
 
+        if not self.screen.viewport.follow:
+            # Typing jumps back to the live line
+            self.screen.viewport.scroll_to_bottom()
+            self.update_scrollbar()
+            self.render_viewport()
+
         cursor = self.textCursor()
         if cursor.position() < self.command_start_position:
             cursor.movePosition(QTextCursor.MoveOperation.End)
@@ -191,25 +654,28 @@ class StellarApp(QWidget):
         layout = QVBoxLayout(self)
         layout.setContentsMargins(0, 0, 0, 0)
 
-        self.fps_label = QLabel("FPS: 0")
-        self.fps_label.setAlignment(Qt.AlignmentFlag.AlignRight)
-        layout.addWidget(self.fps_label)
-
         self.stellar_pty = StellarPTY("/bin/bash")
         self.terminal = TerminalWidget(self.stellar_pty)
         self.terminal.title_changed.connect(self.update_window_title)
         self.terminal.cwd_changed.connect(self.handle_cwd_change)
-        layout.addWidget(self.terminal)
+        terminal_row = QHBoxLayout()
+        terminal_row.addWidget(self.terminal)
+        terminal_row.addWidget(self.terminal.scrollbar)
+        layout.addLayout(terminal_row)
 
         self.setWindowTitle("Stellar Terminal Emulator")
 
-        self.frame_count = 0
-        self.last_fps_update = QTime.currentTime()
-        self.fps_update_interval = 1000
+        # Frame rate and stage timings overlay, toggled with Ctrl+Shift+H
+        self.hud = PerformanceHUD(metrics, self.terminal)
+        self.hud_shortcut = QShortcut(QKeySequence("Ctrl+Shift+H"), self)
+        self.hud_shortcut.activated.connect(self.hud.toggle)
+        if config.show_hud:
+            self.hud.show()
 
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update_gui)
-        self.timer.start(16)
+        # Hot-reload config.toml and the theme when they change on disk
+        self.config_timer = QTimer(self)
+        self.config_timer.timeout.connect(config.check_for_changes)
+        self.config_timer.start(1000)
 
     def update_window_title(self, new_title):
         self.setWindowTitle(f"Stellar Term - {new_title}")
@@ -219,21 +685,13 @@ class StellarApp(QWidget):
         # For example, update a status bar or use it for file operations
         pass
 
-    def update_gui(self):
-        self.terminal.update()
-        self.frame_count += 1
-
-        current_time = QTime.currentTime()
-        if self.last_fps_update.msecsTo(current_time) > self.fps_update_interval:
-            elapsed_time = self.last_fps_update.msecsTo(current_time) / 1000.0
-            fps = self.frame_count / elapsed_time
-            self.fps_label.setText(f"FPS: {fps:.2f}")
-            self.frame_count = 0
-            self.last_fps_update = current_time
-
     def closeEvent(self, event):
         # Ensure clean shutdown of PTY
-        # self.stellar_pty.close()
+        self.terminal.pty_handler.stop()
+        self.stellar_pty.close()
+        self.terminal.plugins.cleanup_plugins()
+        config.unsubscribe(self.terminal.on_config_changed)
+        self.terminal.scrollback.close()
         super().closeEvent(event)
 
 
@@ -1,140 +1,355 @@
 import sys
-import os
+from collections import OrderedDict
 import tkinter as tk
-from tkinter import scrolledtext, messagebox
-import subprocess
-import threading
-import queue
-
-
-class ANSIParser:
-    def __init__(self):
-        self.reset_style()
-
-    def reset_style(self):
-        self.style = {
-            "foreground": "white",
-            "background": "black",
-            "bold": False,
-            "italic": False,
-            "underline": False,
-        }
-
-    def parse(self, text):
-        # This is a simplified ANSI parser. In a real implementation, you'd want to handle more ANSI codes.
-        parsed = []
-        current_text = ""
-        i = 0
-        while i < len(text):
-            if text[i] == "\033" and text[i + 1] == "[":
-                if current_text:
-                    parsed.append((current_text, self.style.copy()))
-                    current_text = ""
-                end = text.find("m", i)
-                if end != -1:
-                    self.handle_ansi_code(text[i + 2 : end])
-                    i = end
-            else:
-                current_text += text[i]
-            i += 1
-        if current_text:
-            parsed.append((current_text, self.style.copy()))
-        return parsed
-
-    def handle_ansi_code(self, code):
-        if code == "0":
-            self.reset_style()
-        elif code == "1":
-            self.style["bold"] = True
-        elif code == "3":
-            self.style["italic"] = True
-        elif code == "4":
-            self.style["underline"] = True
-        elif code.startswith("3") and len(code) == 2:
-            color_map = [
-                "black",
-                "red",
-                "green",
-                "yellow",
-                "blue",
-                "magenta",
-                "cyan",
-                "white",
-            ]
-            self.style["foreground"] = color_map[int(code[1])]
-        elif code.startswith("4") and len(code) == 2:
-            color_map = [
-                "black",
-                "red",
-                "green",
-                "yellow",
-                "blue",
-                "magenta",
-                "cyan",
-                "white",
-            ]
-            self.style["background"] = color_map[int(code[1])]
+import tkinter.font as tkfont
+from tkinter import messagebox
+
+from stellar.components.ansi_parser import ANSIParser
+from stellar.components.screen import Screen
+from stellar.components.scrollback import Scrollback
+from stellar.components.st_pty import StellarPTY
+from stellar.input.xterm import ALT, CTRL, SHIFT, encode_key
+from stellar.settings.config import config
+
+# Tk keysyms that have an xterm encoding of their own; other keys send their text
+TK_KEY_NAMES = {
+    "Up": "up",
+    "Down": "down",
+    "Right": "right",
+    "Left": "left",
+    "Home": "home",
+    "End": "end",
+    "Insert": "insert",
+    "Delete": "delete",
+    "Prior": "page_up",
+    "Next": "page_down",
+    "Return": "return",
+    "KP_Enter": "enter",
+    "Tab": "tab",
+    "ISO_Left_Tab": "tab",
+    "BackSpace": "backspace",
+    "Escape": "escape",
+    "at": "@",
+    "space": " ",
+    "bracketleft": "[",
+    "backslash": "\\",
+    "bracketright": "]",
+    "asciicircum": "^",
+    "underscore": "_",
+}
+TK_KEY_NAMES.update({f"F{n}": f"f{n}" for n in range(1, 13)})
+TK_KEY_NAMES.update({chr(code): chr(code) for code in range(ord("a"), ord("z") + 1)})
+TK_KEY_NAMES.update({chr(code).upper(): chr(code) for code in range(ord("a"), ord("z") + 1)})
+
+# Bits of event.state (X11 layout; Mod1 is Alt)
+TK_MODIFIERS = ((0x0001, SHIFT), (0x0008, ALT), (0x0004, CTRL))
+
+
+def encode_key_event(event) -> bytes:
+    """Encodes a Tk key event as the bytes an xterm would send."""
+    bits = 0
+    for mask, bit in TK_MODIFIERS:
+        if event.state & mask:
+            bits |= bit
+    return encode_key(TK_KEY_NAMES.get(event.keysym), event.char, bits)
+
+
+class StyleTags:
+    """
+    Interns style keys as short Tk tag names.
+
+    Each distinct style is configured with `tag_configure` once, the first time
+    it is rendered. The table is an LRU bounded to `max_tags`. An evicted tag is
+    only retired, not deleted: partial renders leave the rows above the first
+    changed one in place, and those may still use it. purge() deletes retired
+    tags once no text in the widget carries them. Colors are palette indices
+    resolved through the active theme, so a theme switch reconfigures the
+    interned and retired tags in place (see refresh()).
+    """
+
+    def __init__(self, text_area: tk.Text, max_tags: int = 256) -> None:
+        self.text_area = text_area
+        self.max_tags = max_tags
+        self.tags: OrderedDict = OrderedDict()
+        # Evicted tag name -> style key, until purge() finds the tag unused
+        self.retired: dict = {}
+        self.counter = 0
+        font = tkfont.Font(font=text_area["font"]).actual()
+        self.family = font["family"]
+        self.size = font["size"]
+
+    def tag(self, key) -> str:
+        """Returns the tag for a style key, configuring it on first use."""
+        name = self.tags.get(key)
+        if name is not None:
+            self.tags.move_to_end(key)
+            return name
+
+        self.counter += 1
+        name = f"s{self.counter}"
+        self.configure(name, key)
+        self.tags[key] = name
+        if len(self.tags) > self.max_tags:
+            evicted_key, evicted = self.tags.popitem(last=False)
+            self.retired[evicted] = evicted_key
+        return name
+
+    def purge(self) -> None:
+        """Deletes the retired tags that no longer style any text in the widget."""
+        unused = [name for name in self.retired if not self.text_area.tag_ranges(name)]
+        for name in unused:
+            self.text_area.tag_delete(name)
+            del self.retired[name]
+
+    def configure(self, name: str, key) -> None:
+        foreground, background, bold, italic, underline = key
+        resolve = config.theme.resolve
+        weight = "bold" if bold else "normal"
+        slant = "italic" if italic else "roman"
+        self.text_area.tag_configure(
+            name,
+            foreground="#%02x%02x%02x" % resolve(foreground),
+            background="#%02x%02x%02x" % resolve(background),
+            font=(self.family, self.size, weight, slant),
+            underline=bool(underline),
+        )
+
+    def refresh(self) -> None:
+        """Re-resolves every interned and retired tag's colors after a theme change."""
+        for key, name in self.tags.items():
+            self.configure(name, key)
+        for name, key in self.retired.items():
+            self.configure(name, key)
 
 
 class StellarApp(tk.Frame):
+    """
+    Tkinter frontend over StellarPTY.
+
+    The PTY's `master_fd` is registered with `createfilehandler`, so output is
+    handled by the Tk event loop as soon as it arrives; each callback drains
+    everything available and renders once for the whole batch. Input the PTY
+    cannot take at once stays buffered in StellarPTY and the handler also waits
+    for writability until it is flushed, so a large paste never blocks the Tk
+    thread. Destroying the frame, e.g. by closing the window, closes the PTY
+    and the scrollback.
+    """
+
     def __init__(self, master=None):
         super().__init__(master)
         self.master = master
         self.pack(fill=tk.BOTH, expand=True)
-        self.create_widgets()
+        self.scrollback = Scrollback.from_config(config)
+        self.screen = Screen(self.scrollback, config.rows, config.cols)
+        self.rendered_rows = []
         self.ansi_parser = ANSIParser()
+        self.stellar_pty = StellarPTY("/bin/bash")
+        self.stellar_pty.resize(config.rows, config.cols)
+        self.raw_input = config.input_mode == "raw"
+        self.resize_job = None
+        # Tk file handler events registered for the PTY; 0 when not watching
+        self.pty_events = 0
+        self.closed = False
+        self.create_widgets()
         self.command_start_position = "1.0"
         self.current_command = ""
-        self.process = None
-        self.output_queue = queue.Queue()
-        self.after(100, self.check_output_queue)
+        config.subscribe(self.on_config_changed, keys=["theme"])
+        self.config_job = self.after(1000, self.check_config)
 
     def create_widgets(self):
-        self.text_area = scrolledtext.ScrolledText(
-            self, wrap=tk.WORD, bg="black", fg="white"
+        # The text widget only holds the viewport; the scrollbar is mapped onto
+        # the scrollback line count instead of the widget's own contents
+        self.scrollbar = tk.Scrollbar(self, command=self.on_scroll)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.text_area = tk.Text(
+            self,
+            wrap=tk.NONE,
+            bg=config.theme.get_default_bg(),
+            fg=config.theme.get_default_fg(),
+            insertbackground=config.theme.get_default_fg(),
+            height=config.rows,
         )
         self.text_area.pack(fill=tk.BOTH, expand=True)
         self.text_area.bind("<KeyPress>", self.on_key_press)
         self.text_area.bind("<KeyRelease>", self.on_key_release)
+        self.text_area.bind("<<Paste>>", self.on_paste)
+        self.text_area.bind("<MouseWheel>", self.on_mouse_wheel)
+        self.text_area.bind("<Button-4>", lambda event: self.scroll_lines(-3))
+        self.text_area.bind("<Button-5>", lambda event: self.scroll_lines(3))
+        self.text_area.bind("<Configure>", self.on_configure)
+        self.text_area.focus_set()
+        self.style_tags = StyleTags(self.text_area)
+
+    def check_config(self):
+        # Hot-reload config.toml and the theme on the Tk thread
+        config.check_for_changes()
+        self.config_job = self.after(1000, self.check_config)
+
+    def on_config_changed(self, changed):
+        self.text_area.configure(
+            bg=config.theme.get_default_bg(),
+            fg=config.theme.get_default_fg(),
+            insertbackground=config.theme.get_default_fg(),
+        )
+        self.style_tags.refresh()
 
     def start_process(self):
         try:
-            self.process = subprocess.Popen(
-                ["bash" if os.name != "nt" else "cmd"],
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                bufsize=0,
-            )
-            threading.Thread(target=self.read_output, daemon=True).start()
+            self.stellar_pty.start(threaded=False)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to start terminal: {str(e)}")
+            return
+        self.watch_pty()
 
-    def read_output(self):
-        while True:
-            output = self.process.stdout.readline()
-            if output == "" and self.process.poll() is not None:
-                break
+    def watch_pty(self):
+        """Watches the PTY for output, and for writability while input is pending."""
+        if self.stellar_pty.closed or self.stellar_pty.master_fd is None:
+            return
+        events = tk.READABLE | (tk.WRITABLE if self.stellar_pty.write_pending else 0)
+        if events != self.pty_events:
+            self.pty_events = events
+            self.tk.createfilehandler(self.stellar_pty.master_fd, events, self.on_pty_event)
+
+    def stop_watching_pty(self):
+        if self.pty_events:
+            self.pty_events = 0
+            self.tk.deletefilehandler(self.stellar_pty.master_fd)
+
+    def on_pty_event(self, fd, mask):
+        if mask & tk.WRITABLE:
+            self.stellar_pty.flush()
+        if mask & tk.READABLE:
+            output = self.stellar_pty.drain()
             if output:
-                self.output_queue.put(output.strip())
-        rc = self.process.poll()
-        return rc
+                self.append_output(output)
+        if self.stellar_pty.closed:
+            self.stop_watching_pty()
+        else:
+            self.watch_pty()
 
-    def check_output_queue(self):
-        while not self.output_queue.empty():
-            output = self.output_queue.get()
-            self.append_output(output + "\n")
-        self.after(100, self.check_output_queue)
+    def send_keys(self, data):
+        self.stellar_pty.send_keys(data)
+        self.watch_pty()
 
     def append_output(self, output):
-        parsed_output = self.ansi_parser.parse(output)
-        for text, style in parsed_output:
-            self.text_area.insert(tk.END, text, style)
-        self.text_area.see(tk.END)
+        # tokenize() also picks up the title the shell sets
+        self.screen.feed(self.ansi_parser.tokenize(output))
+        title = self.ansi_parser.get_terminal_title()
+        if title and self.master is not None:
+            self.master.title(f"Stellar Term - {title}")
+
+        self.update_scrollbar()
+        if self.screen.viewport.follow:
+            self.render_viewport()
+
+    def render_viewport(self):
+        """Repaints the widget rows that differ from the viewport."""
+        rows = self.screen.visible_rows()
+        first = self.screen.first_changed_row(self.rendered_rows, rows)
+        if first == 0:
+            self.text_area.delete("1.0", tk.END)
+        elif first < len(self.rendered_rows):
+            self.text_area.delete(f"{first + 1}.0 -1c", tk.END)
+        else:
+            # Only the typed command after the last row needs redrawing
+            self.text_area.delete(self.command_start_position, tk.END)
+        self.rendered_rows = rows
+
+        # One insert call per render: alternating (text, tags) arguments
+        chunks = []
+        tag = self.style_tags.tag
+        for i, row in enumerate(rows[first:], start=first):
+            if i:
+                chunks += ("\n", ())
+            line = row.content
+            position = 0
+            for length, key in line.runs:
+                chunks += (
+                    line.text[position : position + length],
+                    tag(key) if key else (),
+                )
+                position += length
+        if chunks:
+            self.text_area.insert(tk.END, *chunks)
+        if self.style_tags.retired:
+            self.style_tags.purge()
         self.command_start_position = self.text_area.index(tk.END + "-1c")
+        # Keep a partially typed command on the live line
+        if self.current_command and self.screen.viewport.follow:
+            self.text_area.insert(tk.END, self.current_command)
+        self.text_area.mark_set(tk.INSERT, self.terminal_cursor_index())
+
+    def terminal_cursor_index(self):
+        """Returns the index of the live line's cursor, or the end if not shown."""
+        if not self.raw_input:
+            return tk.END
+        live = len(self.scrollback)
+        column = self.screen.line.cursor
+        for row_number in range(len(self.rendered_rows) - 1, -1, -1):
+            row = self.rendered_rows[row_number]
+            if row.line != live:
+                break
+            if row.start <= column or row_number == 0:
+                return f"{row_number + 1}.{max(0, column - row.start)}"
+        return tk.END
+
+    def update_scrollbar(self):
+        viewport = self.screen.viewport
+        first, last = viewport.visible_range()
+        self.scrollbar.set(first / viewport.line_count, last / viewport.line_count)
+
+    def on_scroll(self, action, amount, unit=None):
+        viewport = self.screen.viewport
+        if action == "moveto":
+            viewport.scroll_to(round(float(amount) * viewport.line_count))
+        elif action == "scroll":
+            step = viewport.rows if unit == "pages" else 1
+            viewport.scroll_by(int(amount) * step)
+        self.update_scrollbar()
+        self.render_viewport()
+
+    def on_configure(self, event):
+        # Only the viewport is reflowed; history is rewrapped as it scrolls into view
+        font = tkfont.Font(font=self.text_area["font"])
+        rows = max(1, event.height // font.metrics("linespace"))
+        cols = max(1, event.width // max(1, font.measure("W")))
+        viewport = self.screen.viewport
+        if (rows, cols) != (viewport.rows, viewport.cols):
+            self.screen.resize(rows, cols)
+            self.update_scrollbar()
+            self.render_viewport()
+            # The shell only hears about the size once resizing settles
+            if self.resize_job is not None:
+                self.after_cancel(self.resize_job)
+            self.resize_job = self.after(
+                config.resize_debounce_ms, self.apply_pty_size
+            )
+
+    def apply_pty_size(self):
+        self.resize_job = None
+        viewport = self.screen.viewport
+        self.stellar_pty.resize(viewport.rows, viewport.cols)
+
+    def on_mouse_wheel(self, event):
+        self.scroll_lines(-3 if event.delta > 0 else 3)
+
+    def scroll_lines(self, lines):
+        self.screen.viewport.scroll_by(lines)
+        self.update_scrollbar()
+        self.render_viewport()
 
     def on_key_press(self, event):
+        if not self.screen.viewport.follow:
+            # Typing jumps back to the live line
+            self.screen.viewport.scroll_to_bottom()
+            self.update_scrollbar()
+            self.render_viewport()
+        if self.raw_input:
+            # The shell echoes what it receives; nothing is inserted locally
+            data = encode_key_event(event)
+            if data:
+                self.send_keys(data)
+            return "break"
         if event.keysym == "Return":
             self.handle_return()
             return "break"
@@ -147,18 +362,48 @@ class StellarApp(tk.Frame):
         return None
 
     def on_key_release(self, event):
-        self.current_command = self.text_area.get(self.command_start_position, tk.END)
+        if self.raw_input or not self.screen.viewport.follow:
+            return
+        self.current_command = self.text_area.get(
+            self.command_start_position, tk.END + "-1c"
+        )
+
+    def on_paste(self, event):
+        if not self.raw_input:
+            return None
+        try:
+            text = self.clipboard_get()
+        except tk.TclError:
+            return "break"
+        self.send_keys(text.replace("\n", "\r").encode("utf-8"))
+        return "break"
 
     def handle_return(self):
-        command = self.current_command.strip() + "\n"
-        self.text_area.insert(tk.END, "\n")
-        self.process.stdin.write(command)
-        self.process.stdin.flush()
+        command = self.current_command.strip()
         self.current_command = ""
+        self.stellar_pty.send_input(command)
+        self.watch_pty()
 
     def start(self):
         self.start_process()
 
+    def close(self):
+        """Stops watching the PTY and closes it and the scrollback's spill file."""
+        if self.closed:
+            return
+        self.closed = True
+        for job in (self.config_job, self.resize_job):
+            if job is not None:
+                self.after_cancel(job)
+        config.unsubscribe(self.on_config_changed)
+        self.stop_watching_pty()
+        self.stellar_pty.close()
+        self.scrollback.close()
+
+    def destroy(self):
+        self.close()
+        super().destroy()
+
 
 def exception_hook(exctype, value, traceback):
     print("Uncaught exception:", file=sys.stderr)
@@ -171,4 +416,7 @@ if __name__ == "__main__":
     root.title("Tkinter Terminal Emulator")
     app = StellarApp(master=root)
     app.start_process()
-    root.mainloop()
+    try:
+        root.mainloop()
+    finally:
+        app.close()
@@ -1,28 +1,32 @@
 import logging
 from stellar.interfaces.input import InputInterface
 from stellar.interfaces.window import WindowEngineInterface
+from stellar.utils.logger import tracer
+
+logger = logging.getLogger(__name__)
+trace = tracer("input")
 
 
 class KeyboardHandler(InputInterface):
     def __init__(self, window: WindowEngineInterface) -> None:
         self.window = window
         self.key_buffer = []
-        logging.info("KeyboardHandler initialized.")
+        logger.info("KeyboardHandler initialized.")
 
     def handle_input(self):
         if self.key_buffer:
             key = self.key_buffer.pop(0)
-            logging.info(f"Handling input: '{key}'")
+            trace.debug("Handling input: %r", key)
             return key
         return None
 
     def on_key_press(self, event):
         if event.char:
-            logging.info(f"Key pressed: '{event.char}'")
+            trace.debug("Key pressed: %r", event.char)
             self.key_buffer.append(event.char)
         elif event.keysym == "Return":
-            logging.info("Key pressed: 'Return'")
+            trace.debug("Key pressed: 'Return'")
             self.key_buffer.append("\n")
         elif event.keysym == "BackSpace":
-            logging.info("Key pressed: 'BackSpace'")
+            trace.debug("Key pressed: 'BackSpace'")
             self.key_buffer.append("\b")
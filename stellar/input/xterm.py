@@ -0,0 +1,105 @@
+"""
+Encoding of key events into the byte sequences an xterm sends to the PTY.
+
+All sequences are precomputed into lookup tables keyed by (key name, modifier
+bits), so encoding a key press is a single dictionary lookup.
+"""
+
+# Modifier bits; xterm encodes them as the parameter 1 + bits
+SHIFT = 1
+ALT = 2
+CTRL = 4
+
+# CSI <final> / CSI 1;<mod> <final>
+CURSOR_KEYS = {
+    "up": "A",
+    "down": "B",
+    "right": "C",
+    "left": "D",
+    "home": "H",
+    "end": "F",
+}
+
+# CSI <n> ~ / CSI <n>;<mod> ~
+TILDE_KEYS = {
+    "insert": 2,
+    "delete": 3,
+    "page_up": 5,
+    "page_down": 6,
+    "f5": 15,
+    "f6": 17,
+    "f7": 18,
+    "f8": 19,
+    "f9": 20,
+    "f10": 21,
+    "f11": 23,
+    "f12": 24,
+}
+
+# SS3 <final> / CSI 1;<mod> <final>
+SS3_KEYS = {"f1": "P", "f2": "Q", "f3": "R", "f4": "S"}
+
+# Keys that send a fixed byte; Alt prefixes them with ESC
+BYTE_KEYS = {
+    "return": b"\r",
+    "enter": b"\r",
+    "tab": b"\t",
+    "backspace": b"\x7f",
+    "escape": b"\x1b",
+}
+
+
+def _build_key_table() -> dict[tuple[str, int], bytes]:
+    table = {}
+    for modifiers in range(8):
+        param = modifiers + 1
+        for name, final in CURSOR_KEYS.items():
+            sequence = f"\x1b[1;{param}{final}" if modifiers else f"\x1b[{final}"
+            table[(name, modifiers)] = sequence.encode()
+        for name, number in TILDE_KEYS.items():
+            sequence = f"\x1b[{number};{param}~" if modifiers else f"\x1b[{number}~"
+            table[(name, modifiers)] = sequence.encode()
+        for name, final in SS3_KEYS.items():
+            sequence = f"\x1b[1;{param}{final}" if modifiers else f"\x1bO{final}"
+            table[(name, modifiers)] = sequence.encode()
+        for name, data in BYTE_KEYS.items():
+            table[(name, modifiers)] = b"\x1b" + data if modifiers & ALT else data
+
+    table[("tab", SHIFT)] = b"\x1b[Z"
+    table[("backspace", CTRL)] = b"\x08"
+
+    # Ctrl+letter and the punctuation xterm maps into C0
+    for code in range(ord("a"), ord("z") + 1):
+        control = bytes([code - 0x60])
+        table[(chr(code), CTRL)] = control
+        table[(chr(code), CTRL | SHIFT)] = control
+        table[(chr(code), CTRL | ALT)] = b"\x1b" + control
+    for char, control in (("@", 0), (" ", 0), ("[", 27), ("\\", 28), ("]", 29), ("^", 30), ("_", 31)):
+        table[(char, CTRL)] = bytes([control])
+    return table
+
+
+KEY_TABLE = _build_key_table()
+
+
+def encode_key(name: str | None, text: str, modifiers: int = 0) -> bytes:
+    """
+    Encodes a key press.
+
+    Args:
+        name (str | None): Toolkit-independent key name (e.g. "up", "f5", "a"),
+            or None if the toolkit only reported text.
+        text (str): The text the key produced, if any.
+        modifiers (int): Combination of SHIFT, ALT and CTRL.
+
+    Returns:
+        bytes: The bytes to write to the PTY, empty for keys that send nothing.
+    """
+    if name is not None:
+        sequence = KEY_TABLE.get((name, modifiers))
+        if sequence is not None:
+            return sequence
+    if text:
+        data = text.encode("utf-8")
+        return b"\x1b" + data if modifiers & ALT else data
+    return b""
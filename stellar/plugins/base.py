@@ -1,23 +1,63 @@
 from abc import ABC, abstractmethod
 
+# Hooks the PluginManager dispatches to; a plugin only receives those it overrides
+HOOKS = ("on_input", "on_render", "on_output")
+
+# What happens to output chunks that arrive while a plugin's queue is full
+OVERFLOW_POLICIES = ("coalesce", "drop_oldest", "drop_newest")
+
 
 class StellarPlugin(ABC):
-    @abstractmethod
+    # on_output runs on a worker thread with a bounded queue of chunks
+    output_queue_size: int = 256
+    output_overflow: str = "coalesce"
+    # Share of one CPU core the plugin's on_output may use per second
+    output_cpu_budget: float = 0.1
+
     def initialize(self, emulator):
-        """Initialize the plugin with a reference to the emulator."""
+        """
+        Initialize the plugin with a reference to the emulator.
+
+        Plugins that override this are loaded at startup; the others are only
+        imported when one of their hooks is first dispatched.
+        """
         pass
 
-    @abstractmethod
     def on_input(self, key):
         """Handle input events."""
         pass
 
-    @abstractmethod
     def on_render(self):
         """Perform actions before or after rendering."""
         pass
 
+    def on_output(self, text):
+        """
+        Handle a chunk of terminal output.
+
+        Called on a worker thread, never the UI thread; chunks arrive in order
+        but may be coalesced, truncated or dropped when the plugin falls behind.
+        """
+        pass
+
     @abstractmethod
     def cleanup(self):
         """Perform cleanup actions when the plugin is disabled or unloaded."""
         pass
+
+
+def overridden_hooks(plugin_class: type) -> list[str]:
+    """
+    Returns the hooks a plugin class implements itself.
+
+    Args:
+        plugin_class (type): A StellarPlugin subclass.
+
+    Returns:
+        list[str]: Names from HOOKS whose method differs from StellarPlugin's.
+    """
+    return [
+        hook
+        for hook in HOOKS
+        if getattr(plugin_class, hook, None) is not getattr(StellarPlugin, hook)
+    ]
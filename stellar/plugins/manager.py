@@ -1,7 +1,142 @@
+import ast
+import hashlib
 import importlib
 import os
 import logging
-from .base import StellarPlugin
+import pickle
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+from .base import HOOKS, StellarPlugin, overridden_hooks
+from .streams import OutputDispatcher
+
+logger = logging.getLogger(__name__)
+
+# The bundled plugins, imported as stellar.plugins.<module>
+PLUGIN_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_PRIORITY = 50
+PRIORITY_COMMENT = re.compile(r"^#\s*Priority:\s*(-?\d+)\s*$", re.MULTILINE)
+
+# Bump when PluginManifest or scanning changes so stale manifests are rescanned
+MANIFEST_VERSION = 3
+
+
+@dataclass
+class PluginManifest:
+    """
+    What the manager needs to know about a plugin without importing it.
+
+    Attributes:
+        module (str): The importable module path.
+        class_name (str): The StellarPlugin subclass defined in the module.
+        priority (int): Dispatch order; lower runs first.
+        hooks (list[str]): The hooks the class overrides.
+        stamp (tuple[int, int]): The source file's mtime and size when scanned.
+        eager (bool): Load at startup instead of on first dispatch: the class
+            overrides initialize() or no hook would ever load it.
+    """
+
+    module: str
+    class_name: str
+    priority: int
+    hooks: list[str]
+    stamp: tuple[int, int]
+    eager: bool = False
+
+
+def manifest_path(plugin_dir: str) -> Path:
+    """Returns the manifest cache file for a plugin directory."""
+    cache_dir = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+    digest = hashlib.sha1(os.path.abspath(plugin_dir).encode()).hexdigest()[:16]
+    return cache_dir / "stellar" / f"plugins-{digest}.pickle"
+
+
+def scan_plugin(path: str, module: str, stamp: tuple[int, int]) -> PluginManifest | None:
+    """
+    Reads a plugin's manifest from its source without importing it.
+
+    The plugin class is the first class deriving from StellarPlugin by name;
+    its hooks are the HOOKS it defines in its own body. If no class names
+    StellarPlugin as a base but some class has bases, it may still be a plugin
+    (deriving from another plugin or an aliased import), so the module is
+    imported and inspected instead.
+
+    Returns:
+        PluginManifest | None: The manifest, or None if the file defines no plugin.
+    """
+    with open(path, "r") as f:
+        source = f.read()
+    try:
+        tree = ast.parse(source, filename=path)
+    except SyntaxError as e:
+        logger.error(f"Failed to scan plugin {module}: {e}")
+        return None
+
+    match = PRIORITY_COMMENT.search(source)
+    priority = int(match.group(1)) if match else DEFAULT_PRIORITY
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        bases = {
+            base.id if isinstance(base, ast.Name) else getattr(base, "attr", None)
+            for base in node.bases
+        }
+        if "StellarPlugin" not in bases:
+            continue
+        defined = {
+            item.name
+            for item in node.body
+            if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef))
+        }
+        hooks = [hook for hook in HOOKS if hook in defined]
+        eager = not hooks or "initialize" in defined
+        return PluginManifest(module, node.name, priority, hooks, stamp, eager)
+
+    if any(isinstance(node, ast.ClassDef) and node.bases for node in tree.body):
+        return inspect_plugin(module, priority, stamp)
+    return None
+
+
+def inspect_plugin(module: str, priority: int, stamp: tuple[int, int]) -> PluginManifest | None:
+    """
+    Builds a plugin's manifest by importing it and inspecting the plugin class.
+
+    Returns:
+        PluginManifest | None: The manifest, or None if the module defines no plugin.
+    """
+    try:
+        plugin_class = find_plugin_class(importlib.import_module(module))
+    except Exception as e:
+        logger.error(f"Failed to scan plugin {module}: {e}")
+        return None
+    if plugin_class is None:
+        return None
+    hooks = overridden_hooks(plugin_class)
+    eager = not hooks or plugin_class.initialize is not StellarPlugin.initialize
+    return PluginManifest(module, plugin_class.__name__, priority, hooks, stamp, eager)
+
+
+def find_plugin_class(module) -> type | None:
+    """
+    Finds the StellarPlugin subclass in an imported module.
+
+    Classes defined in the module are preferred over plugin classes it imports.
+    """
+    found = None
+    for item in dir(module):
+        item = getattr(module, item)
+        if (
+            isinstance(item, type)
+            and issubclass(item, StellarPlugin)
+            and item is not StellarPlugin
+        ):
+            if item.__module__ == module.__name__:
+                return item
+            found = found or item
+    return found
 
 
 class PluginManager:
@@ -9,74 +144,198 @@ class PluginManager:
         self.plugins: dict[str, StellarPlugin] = {}
         self.plugin_modules: dict[str, str] = {}
         self.plugin_priorities: dict[str, int] = {}
+        self.manifests: dict[str, PluginManifest] = {}
+        self.emulator = None
+        self.initialized = False
+        self.output = OutputDispatcher()
+        # Hook name -> handlers in priority order: bound methods of loaded
+        # plugins, or loaders for plugins that are not imported yet. Rebuilt
+        # only when plugins are discovered, loaded or unloaded
+        self.dispatch: dict[str, list[Callable]] = {hook: [] for hook in HOOKS}
 
     def discover_plugins(self, plugin_dir: str):
-        """Discover plugins without loading them."""
-        for filename in os.listdir(plugin_dir):
-            if filename.endswith(".py") and not filename.startswith("__"):
-                module_name = filename[:-3]
-                self.plugin_modules[module_name] = f"stellar.plugins.{module_name}"
-
-                # Read plugin priority from a comment in the file
-                with open(os.path.join(plugin_dir, filename), "r") as f:
-                    first_line = f.readline().strip()
-                    if first_line.startswith("# Priority:"):
-                        try:
-                            priority = int(first_line.split(":")[1].strip())
-                            self.plugin_priorities[module_name] = priority
-                        except ValueError:
-                            self.plugin_priorities[module_name] = 50  # Default priority
-                    else:
-                        self.plugin_priorities[module_name] = 50  # Default priority
+        """
+        Discover plugins without importing them.
+
+        Manifests are cached by file mtime and size, so only new or edited
+        plugin files are parsed.
+        """
+        cache_file = manifest_path(plugin_dir)
+        cached = self._read_manifests(cache_file)
+        manifests = {}
+        for entry in os.scandir(plugin_dir):
+            filename = entry.name
+            if not filename.endswith(".py") or filename.startswith("__"):
+                continue
+            module_name = filename[:-3]
+            stat = entry.stat()
+            stamp = (stat.st_mtime_ns, stat.st_size)
+            if module_name in cached and cached[module_name][0] == stamp:
+                manifest = cached[module_name][1]
+            else:
+                manifest = scan_plugin(entry.path, f"stellar.plugins.{module_name}", stamp)
+            manifests[module_name] = (stamp, manifest)
+
+        if manifests != cached:
+            self._write_manifests(cache_file, manifests)
+
+        for module_name, (_, manifest) in manifests.items():
+            # Helper modules like base.py and manager.py define no plugin
+            if manifest is None:
+                continue
+            self.manifests[module_name] = manifest
+            self.plugin_modules[module_name] = manifest.module
+            self.plugin_priorities[module_name] = manifest.priority
+        self.rebuild_dispatch()
+
+    def _read_manifests(self, path: Path) -> dict:
+        try:
+            with open(path, "rb") as f:
+                version, manifests = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            return {}
+        return manifests if version == MANIFEST_VERSION else {}
+
+    def _write_manifests(self, path: Path, manifests: dict) -> None:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            partial = path.with_suffix(f".{os.getpid()}.tmp")
+            with open(partial, "wb") as f:
+                pickle.dump((MANIFEST_VERSION, manifests), f)
+            os.replace(partial, path)
+        except OSError as e:
+            logger.warning(f"Could not write plugin manifest {path}: {e}")
 
     def load_plugin(self, module_name: str) -> StellarPlugin:
         """Load a single plugin by module name."""
         if module_name not in self.plugins:
             try:
                 module = importlib.import_module(self.plugin_modules[module_name])
-                for item in dir(module):
-                    item = getattr(module, item)
-                    if (
-                        isinstance(item, type)
-                        and issubclass(item, StellarPlugin)
-                        and item is not StellarPlugin
-                    ):
-                        plugin = item()
-                        self.plugins[module_name] = plugin
-                        logging.info(f"Loaded plugin: {module_name}")
-                        return plugin
+                manifest = self.manifests.get(module_name)
+                plugin_class = getattr(module, manifest.class_name, None) if manifest else None
+                if plugin_class is None:
+                    plugin_class = find_plugin_class(module)
+                if plugin_class is not None:
+                    plugin = plugin_class()
+                    self.plugins[module_name] = plugin
+                    if self.initialized:
+                        plugin.initialize(self.emulator)
+                    self.rebuild_dispatch()
+                    logger.info(f"Loaded plugin: {module_name}")
+                    return plugin
             except Exception as e:
-                logging.error(f"Failed to load plugin {module_name}: {e}")
+                logger.error(f"Failed to load plugin {module_name}: {e}")
         return self.plugins.get(module_name)
 
+    def unload_plugin(self, module_name: str) -> None:
+        """Clean up and remove a loaded plugin."""
+        plugin = self.plugins.pop(module_name, None)
+        if plugin is None:
+            return
+        # Keep the next dispatch from importing it again
+        self.manifests.pop(module_name, None)
+        self.rebuild_dispatch()
+        plugin.cleanup()
+        logger.info(f"Unloaded plugin: {module_name}")
+
+    def rebuild_dispatch(self) -> None:
+        """
+        Precompiles the per-hook handler lists.
+
+        Loaded plugins contribute the hooks they override; discovered plugins
+        that are not imported yet contribute a loader for each hook their
+        manifest lists, which imports the plugin on first dispatch.
+        """
+        dispatch = {hook: [] for hook in HOOKS}
+        for module_name in self.get_sorted_plugin_names():
+            plugin = self.plugins.get(module_name)
+            if plugin is not None:
+                for hook in overridden_hooks(type(plugin)):
+                    dispatch[hook].append(self._handler(module_name, plugin, hook))
+            elif module_name in self.manifests:
+                for hook in self.manifests[module_name].hooks:
+                    dispatch[hook].append(self._lazy_handler(module_name, hook))
+        self.output.retain(set(self.plugins))
+        self.dispatch = dispatch
+
+    def _handler(self, module_name: str, plugin: StellarPlugin, hook: str) -> Callable:
+        # on_output runs off the calling thread: the handler only queues the chunk
+        if hook == "on_output":
+            return self.output.stream(module_name, plugin).put
+        return getattr(plugin, hook)
+
+    def _lazy_handler(self, module_name: str, hook: str) -> Callable:
+        def handler(*args):
+            plugin = self.load_plugin(module_name)
+            if plugin is None:
+                # Don't retry a broken plugin on every event
+                self.manifests.pop(module_name, None)
+                self.rebuild_dispatch()
+                return None
+            return self._handler(module_name, plugin, hook)(*args)
+
+        return handler
+
     def get_sorted_plugin_names(self) -> list[str]:
         """Get a list of plugin names sorted by priority."""
         return sorted(
-            self.plugin_modules.keys(), key=lambda x: self.plugin_priorities.get(x, 50)
+            self.plugin_modules.keys(),
+            key=lambda x: self.plugin_priorities.get(x, DEFAULT_PRIORITY),
         )
 
     def initialize_plugins(self, emulator):
-        """Initialize all discovered plugins."""
+        """
+        Initialize the discovered plugins.
+
+        Plugins whose manifest is eager are loaded and initialized now, as are
+        those already loaded. The others are imported and initialized lazily,
+        on the first dispatch of a hook they implement.
+        """
+        self.emulator = emulator
+        self.initialized = True
         for module_name in self.get_sorted_plugin_names():
-            plugin = self.load_plugin(module_name)
+            plugin = self.plugins.get(module_name)
             if plugin:
                 plugin.initialize(emulator)
+            elif module_name in self.manifests and self.manifests[module_name].eager:
+                # load_plugin() initializes it
+                self.load_plugin(module_name)
 
     def handle_input(self, key):
-        """Pass input events to all loaded plugins."""
-        for module_name in self.get_sorted_plugin_names():
-            plugin = self.plugins.get(module_name)
-            if plugin:
-                plugin.on_input(key)
+        """Pass input events to the plugins that handle input."""
+        handlers = self.dispatch["on_input"]
+        if handlers:
+            for handler in handlers:
+                handler(key)
 
     def handle_render(self):
-        """Call render method for all loaded plugins."""
-        for module_name in self.get_sorted_plugin_names():
-            plugin = self.plugins.get(module_name)
-            if plugin:
-                plugin.on_render()
+        """Call the render hook of the plugins that implement it."""
+        handlers = self.dispatch["on_render"]
+        if handlers:
+            for handler in handlers:
+                handler()
+
+    def handle_output(self, text):
+        """
+        Queue terminal output for the plugins that implement on_output.
+
+        Returns immediately: each plugin consumes its own bounded queue on the
+        output worker pool (see OutputStream).
+        """
+        handlers = self.dispatch["on_output"]
+        if handlers:
+            for handler in handlers:
+                handler(text)
+
+    def output_stats(self) -> dict[str, dict[str, int | float]]:
+        """Per-plugin on_output counters: calls, CPU time, drops and throttling."""
+        return self.output.stats()
 
     def cleanup_plugins(self):
         """Clean up all loaded plugins."""
         for plugin in self.plugins.values():
             plugin.cleanup()
+        self.plugins.clear()
+        # Not rebuild_dispatch(): its lazy loaders would import the plugins again
+        self.dispatch = {hook: [] for hook in HOOKS}
+        self.output.retain(set())
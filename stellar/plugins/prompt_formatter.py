@@ -1,9 +1,10 @@
 from stellar.plugins.base import StellarPlugin
 from stellar.settings.config import config
+from stellar.components.git_status import git_status
+from stellar.components.segments import SegmentEngine
 import time
 import getpass
 import os
-import subprocess
 
 
 class PromptFormatterPlugin(StellarPlugin):
@@ -11,30 +12,24 @@ class PromptFormatterPlugin(StellarPlugin):
         self.prompt_format = config.prompt_format
         self.time_format = config.prompt_time_format
         self.emulator = None
+        self.segments = SegmentEngine(budget=config.prompt_budget_ms / 1000)
+        self.register_segments()
+
+    def register_segments(self):
+        # The time changes every render; the user never does
+        self.segments.register("time", self.get_time)
+        self.segments.register("username", self.get_username, ttl=None)
+        self.segments.register("current_dir", self.get_current_dir, ttl=1.0)
+        self.segments.register("git_branch", self.get_git_branch, ttl=2.0, threaded=True)
 
     def initialize(self, emulator):
         self.emulator = emulator
 
-    def on_input(self, key):
-        # This plugin doesn't need to handle input
-        pass
-
-    def on_render(self):
-        # This plugin doesn't need to do anything on render
-        pass
-
     def cleanup(self):
-        # No cleanup needed for this plugin
-        pass
+        self.segments.shutdown()
 
     def format_prompt(self):
-        formatted_prompt = self.prompt_format.format(
-            time=self.get_time(),
-            username=self.get_username(),
-            current_dir=self.get_current_dir(),
-            git_branch=self.get_git_branch(),
-        )
-        return formatted_prompt
+        return self.segments.render(self.prompt_format)
 
     def get_time(self):
         return time.strftime(self.time_format)
@@ -46,18 +41,8 @@ class PromptFormatterPlugin(StellarPlugin):
         return os.path.basename(os.getcwd())
 
     def get_git_branch(self):
-        try:
-            branch = (
-                subprocess.check_output(
-                    ["git", "rev-parse", "--abbrev-ref", "HEAD"],
-                    stderr=subprocess.DEVNULL,
-                )
-                .decode()
-                .strip()
-            )
-            return f"({branch})" if branch else ""
-        except subprocess.CalledProcessError:
-            return ""
+        state = git_status.status()
+        return f"({state.branch})" if state and state.branch else ""
 
 
 # Priority: 10
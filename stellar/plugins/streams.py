@@ -0,0 +1,211 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .base import OVERFLOW_POLICIES, StellarPlugin
+
+logger = logging.getLogger(__name__)
+
+# CPU budgets are enforced over windows of this many seconds
+BUDGET_WINDOW = 1.0
+# Chunks handled per turn before a stream yields its worker to the others
+BATCH_SIZE = 16
+# Characters a coalesced chunk may grow to; older output is cut off beyond that
+COALESCE_LIMIT = 64 * 1024
+
+
+class OutputStream:
+    """
+    One plugin's subscription to the output stream.
+
+    Chunks are queued by put() on the output thread and handed to the plugin's
+    on_output on the dispatcher's worker pool, one worker per stream at a time
+    so the plugin sees them in order. The queue is bounded; when it is full the
+    plugin's `output_overflow` policy decides:
+
+    - "coalesce" appends the chunk to the newest queued one, so the plugin
+      gets fewer, larger calls. That chunk keeps only its newest
+      COALESCE_LIMIT characters, so a stalled plugin can't hold on to the
+      whole output; the characters cut off are counted as `truncated`.
+    - "drop_oldest" discards the oldest queued chunk.
+    - "drop_newest" discards the incoming chunk.
+
+    The thread CPU time of every call is accounted. Once a plugin has used more
+    than `output_cpu_budget` of a core in the current window, it is throttled:
+    a warning is logged (the first time) and its chunks only queue up until the
+    window ends.
+
+    Args:
+        name (str): The plugin's module name, for logging and stats.
+        plugin (StellarPlugin): The subscribed plugin.
+        executor (ThreadPoolExecutor): The worker pool.
+    """
+
+    def __init__(self, name: str, plugin: StellarPlugin, executor: ThreadPoolExecutor) -> None:
+        self.name = name
+        self.plugin = plugin
+        self.executor = executor
+        self.max_size = max(1, plugin.output_queue_size)
+        self.policy = plugin.output_overflow
+        if self.policy not in OVERFLOW_POLICIES:
+            logger.warning(f"Plugin {name} has unknown overflow policy {self.policy!r}")
+            self.policy = "coalesce"
+        self.budget = plugin.output_cpu_budget * BUDGET_WINDOW
+
+        self.queue: deque[str] = deque()
+        self.lock = threading.Lock()
+        self.scheduled = False
+        self.closed = False
+        self.window_start = time.monotonic()
+        self.window_cpu = 0.0
+        self.throttled_until = 0.0
+
+        self.calls = 0
+        self.cpu_time = 0.0
+        self.dropped = 0
+        self.coalesced = 0
+        self.truncated = 0
+        self.throttled = 0
+        self.errors = 0
+
+    def put(self, text: str) -> None:
+        """Queues a chunk for the plugin; never blocks on the plugin."""
+        with self.lock:
+            if self.closed:
+                return
+            if len(self.queue) < self.max_size:
+                self.queue.append(text)
+            elif self.policy == "coalesce":
+                chunk = self.queue[-1] + text
+                if len(chunk) > COALESCE_LIMIT:
+                    self.truncated += len(chunk) - COALESCE_LIMIT
+                    chunk = chunk[-COALESCE_LIMIT:]
+                self.queue[-1] = chunk
+                self.coalesced += 1
+            elif self.policy == "drop_oldest":
+                self.queue.popleft()
+                self.queue.append(text)
+                self.dropped += 1
+            else:
+                self.dropped += 1
+            if self.scheduled or time.monotonic() < self.throttled_until:
+                return
+            self.scheduled = True
+        self.executor.submit(self.drain)
+
+    def drain(self) -> None:
+        """Worker side: feeds queued chunks to the plugin until empty, throttled or a batch is done."""
+        for _ in range(BATCH_SIZE):
+            with self.lock:
+                if self.closed or not self.queue:
+                    self.scheduled = False
+                    return
+                now = time.monotonic()
+                if now - self.window_start >= BUDGET_WINDOW:
+                    self.window_start = now
+                    self.window_cpu = 0.0
+                if self.window_cpu > self.budget:
+                    self._throttle(now)
+                    return
+                text = self.queue.popleft()
+
+            start = time.thread_time()
+            try:
+                self.plugin.on_output(text)
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Plugin {self.name} failed in on_output: {e}")
+            used = time.thread_time() - start
+
+            with self.lock:
+                self.calls += 1
+                self.cpu_time += used
+                self.window_cpu += used
+
+        # Let other plugins' streams have the worker before continuing
+        self.executor.submit(self.drain)
+
+    def _throttle(self, now: float) -> None:
+        # Called with the lock held
+        self.scheduled = False
+        self.throttled += 1
+        self.throttled_until = self.window_start + BUDGET_WINDOW
+        # Warn once per plugin; repeats are in stats() and the debug log
+        log = logger.warning if self.throttled == 1 else logger.debug
+        log(
+            f"Plugin {self.name} used {self.window_cpu * 1000:.0f} ms CPU in on_output"
+            f" (budget {self.budget * 1000:.0f} ms per {BUDGET_WINDOW:g} s);"
+            f" throttled with {len(self.queue)} chunks queued"
+        )
+        resume = threading.Timer(self.throttled_until - now, self.resume)
+        resume.daemon = True
+        resume.start()
+
+    def resume(self) -> None:
+        """Restarts a throttled stream once its budget window is over."""
+        with self.lock:
+            if self.scheduled or self.closed or not self.queue:
+                return
+            self.scheduled = True
+        self.executor.submit(self.drain)
+
+    def close(self) -> None:
+        with self.lock:
+            self.closed = True
+            self.queue.clear()
+
+    def stats(self) -> dict[str, int | float]:
+        with self.lock:
+            return {
+                "calls": self.calls,
+                "cpu_time": self.cpu_time,
+                "queued": len(self.queue),
+                "dropped": self.dropped,
+                "coalesced": self.coalesced,
+                "truncated": self.truncated,
+                "throttled": self.throttled,
+                "errors": self.errors,
+            }
+
+
+class OutputDispatcher:
+    """
+    Fans terminal output out to the plugins that implement on_output.
+
+    Args:
+        max_workers (int): Threads shared by all output streams.
+    """
+
+    def __init__(self, max_workers: int = 2) -> None:
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="plugin-output"
+        )
+        self.streams: dict[str, OutputStream] = {}
+
+    def stream(self, name: str, plugin: StellarPlugin) -> OutputStream:
+        """Returns the plugin's stream, creating it on first use."""
+        stream = self.streams.get(name)
+        if stream is None or stream.plugin is not plugin:
+            if stream is not None:
+                stream.close()
+            stream = OutputStream(name, plugin, self.executor)
+            self.streams[name] = stream
+        return stream
+
+    def retain(self, names: set[str]) -> None:
+        """Closes the streams of plugins that are no longer loaded."""
+        for name in list(self.streams):
+            if name not in names:
+                self.streams.pop(name).close()
+
+    def stats(self) -> dict[str, dict[str, int | float]]:
+        """Returns each stream's counters, by plugin module name."""
+        return {name: stream.stats() for name, stream in self.streams.items()}
+
+    def shutdown(self) -> None:
+        for stream in self.streams.values():
+            stream.close()
+        self.streams.clear()
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -1,50 +1,317 @@
+import hashlib
+import logging
+import os
+import pickle
+import threading
 from pathlib import Path
+from typing import Any, Callable, Iterable
 
-# import tomllib as toml
-import toml
 from .themes import Theme
 
+logger = logging.getLogger(__name__)
+
+ROOT = Path(__file__).parent.parent.parent
+CONFIG_PATH = ROOT / "config.toml"
+THEMES_DIR = ROOT / "stellar" / "themes"
+
+# Bump when the snapshot layout changes so stale caches are ignored
+SNAPSHOT_VERSION = 2
+
+REQUIRED = object()
+
+# Attribute -> (section, key, default); REQUIRED settings must be in config.toml
+SETTINGS: dict[str, tuple[str, str, Any]] = {
+    # Appearance settings
+    "font_family": ("appearance", "font_family", REQUIRED),
+    "font_path": ("appearance", "font_path", REQUIRED),
+    "font_size": ("appearance", "font_size", REQUIRED),
+    "padding": ("appearance", "padding", REQUIRED),
+    "theme_name": ("appearance", "theme", "tokyonight"),
+    # Terminal settings
+    "cols": ("terminal", "cols", REQUIRED),
+    "rows": ("terminal", "rows", REQUIRED),
+    "buffer_size": ("terminal", "buffer_size", REQUIRED),
+    "resize_debounce_ms": ("terminal", "resize_debounce_ms", 100),
+    "pty_mode": ("terminal", "pty_mode", "thread"),
+    "input_mode": ("terminal", "input_mode", "raw"),
+    # Scrollback settings
+    "scrollback_hot_lines": ("scrollback", "hot_lines", 5000),
+    "scrollback_block_lines": ("scrollback", "block_lines", 1024),
+    "scrollback_compression": ("scrollback", "compression", "zlib"),
+    "scrollback_cache_blocks": ("scrollback", "cache_blocks", 8),
+    "scrollback_spill": ("scrollback", "spill", True),
+    "scrollback_max_ram_blocks": ("scrollback", "max_ram_blocks", 64),
+    "scrollback_spill_dir": ("scrollback", "spill_dir", ""),
+    "scrollback_keep_spill": ("scrollback", "keep_spill", False),
+    # Prompt settings
+    "prompt_format": ("prompt", "format", ""),
+    "prompt_time_format": ("prompt", "time_format", REQUIRED),
+    "prompt_budget_ms": ("prompt", "budget_ms", 50),
+    # Output triggers
+    "trigger_rules": ("triggers", "rules", []),
+    # Cursor settings
+    "cursor_blink_interval": ("cursor", "blink_interval", REQUIRED),
+    "cursor_type": ("cursor", "type", REQUIRED),
+    # GUI
+    "gui_engine": ("gui", "engine", REQUIRED),
+    "show_hud": ("gui", "hud", False),
+    # Logging
+    "trace_subsystems": ("logging", "trace", []),
+}
+
+
+def snapshot_path(config_path: Path) -> Path:
+    """Returns the snapshot cache file for a config file."""
+    cache_dir = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+    digest = hashlib.sha1(str(config_path.resolve()).encode()).hexdigest()[:16]
+    return cache_dir / "stellar" / f"config-{digest}.pickle"
+
+
+def file_stamp(path: Path) -> tuple[str, int, int]:
+    """Identifies a version of a file by path, mtime and size."""
+    stat = path.stat()
+    return (str(path), stat.st_mtime_ns, stat.st_size)
+
+
+def plain(value: Any) -> Any:
+    """Converts parsed TOML to builtin types; toml's inline tables can't be pickled."""
+    if isinstance(value, dict):
+        return {key: plain(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [plain(item) for item in value]
+    return value
+
 
 class Config:
-    def __init__(self):
+    """
+    The settings from config.toml and the active theme.
+
+    Parsing TOML is the slow part of a cold start, so the parsed config and
+    theme are cached as a pickle keyed by each file's path, mtime and size and
+    reused until the file changes.
+
+    Hot reloads diff the old and new values and notify only the subscribers
+    whose keys changed (see subscribe() and watch()).
+
+    Attributes:
+        config (dict): The parsed config.toml.
+        theme (Theme): The active color theme.
+    """
+
+    def __init__(self, config_path: Path = CONFIG_PATH, theme_path: Path | None = None):
         # TODO: We should set up a config so the user can easily update that
-        config_path = Path(__file__).parent.parent.parent / "config.toml"
-        # with open(config_path, "rb") as config:
+        self.config_path = Path(config_path)
+        # An explicit theme file overrides appearance.theme
+        self.theme_override = Path(theme_path) if theme_path else None
+        self.theme_path = self.theme_override
+        self.subscribers: list[tuple[Callable[[dict[str, Any]], None], set[str] | None]] = []
+        self.stamps: tuple = ()
+        self._watcher: threading.Thread | None = None
+        self._stop_watching = threading.Event()
+        self._load()
 
-        self.config = toml.load(config_path)
+    def _theme_file(self, config: dict) -> Path:
+        if self.theme_override is not None:
+            return self.theme_override
+        name = config.get("appearance", {}).get("theme", "tokyonight")
+        return THEMES_DIR / f"{name}.toml"
 
-        # Load theme
-        self.theme = Theme()
-        self.theme.print_theme_table()
+    def _load(self) -> None:
+        """Loads the config and theme, from the snapshot cache when it is current."""
+        snapshot = self._read_snapshot()
+        stale = False
 
-        # Appearance settings
-        self.font_family = self.config["appearance"]["font_family"]
-        self.font_path = self.config["appearance"]["font_path"]
-        self.font_size = self.config["appearance"]["font_size"]
-        self.text_color = self.theme.get_default_fg()
+        config_stamp = file_stamp(self.config_path)
+        if snapshot["config"][0] == config_stamp:
+            config = snapshot["config"][1]
+        else:
+            # import tomllib as toml
+            import toml  # Only needed when the snapshot is stale
+
+            config = plain(toml.load(self.config_path))
+            snapshot["config"] = (config_stamp, config)
+            stale = True
+
+        theme_path = self._theme_file(config)
+        theme_stamp = file_stamp(theme_path)
+        if snapshot["theme"][0] == theme_stamp:
+            colors = snapshot["theme"][1]
+        else:
+            colors = Theme(str(theme_path)).colors
+            snapshot["theme"] = (theme_stamp, colors)
+            stale = True
+
+        if stale:
+            self._write_snapshot(snapshot)
+        self.theme_path = theme_path
+        self.stamps = (config_stamp, theme_stamp)
+        self._apply(config, colors)
+
+    def _read_snapshot(self) -> dict:
+        """Returns the cached snapshot, or an empty one that matches nothing."""
+        empty = {"version": SNAPSHOT_VERSION, "config": (None, None), "theme": (None, None)}
+        try:
+            with open(snapshot_path(self.config_path), "rb") as f:
+                snapshot = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return empty
+        if not isinstance(snapshot, dict) or snapshot.get("version") != SNAPSHOT_VERSION:
+            return empty
+        return snapshot
 
+    def _write_snapshot(self, snapshot: dict) -> None:
+        path = snapshot_path(self.config_path)
+        # Write then rename, so a concurrent start never reads half a file
+        partial = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(partial, "wb") as f:
+                pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(partial, path)
+        except (OSError, pickle.PicklingError, AttributeError, TypeError) as e:
+            logger.warning(f"Could not write config snapshot {path}: {e}")
+            partial.unlink(missing_ok=True)
+
+    def _apply(self, config: dict, colors: dict) -> None:
+        """Sets the attributes from a parsed config and theme."""
+        # Resolve everything first, so a missing key leaves the old settings intact
+        values = {}
+        for attribute, (section, key, default) in SETTINGS.items():
+            if default is REQUIRED:
+                values[attribute] = config[section][key]
+            else:
+                values[attribute] = config.get(section, {}).get(key, default)
+
+        self.config = config
+        self.__dict__.update(values)
+
+        # Load theme
+        self.theme = Theme(str(self.theme_path), colors=colors)
+        self.text_color = self.theme.get_default_fg()
         self.bg_color = self.theme.get_default_bg()
-        self.padding = self.config["appearance"]["padding"]
 
-        # Terminal settings
-        self.cols = self.config["terminal"]["cols"]
-        self.rows = self.config["terminal"]["rows"]
-        self.buffer_size = self.config["terminal"]["buffer_size"]
+    def values(self) -> dict[str, Any]:
+        """Returns the current settings, including the theme colors, by attribute."""
+        values = {attribute: getattr(self, attribute) for attribute in SETTINGS}
+        values["theme"] = self.theme.colors
+        return values
+
+    def subscribe(
+        self,
+        callback: Callable[[dict[str, Any]], None],
+        keys: Iterable[str] | None = None,
+    ) -> None:
+        """
+        Registers a callback for hot reloads.
+
+        Args:
+            callback (Callable[[dict[str, Any]], None]): Called with the changed
+                settings ({attribute: new value}); "theme" stands for the colors.
+            keys (Iterable[str] | None): Attributes the callback cares about;
+                None subscribes to every change.
+        """
+        self.subscribers.append((callback, set(keys) if keys is not None else None))
+
+    def unsubscribe(self, callback: Callable[[dict[str, Any]], None]) -> None:
+        self.subscribers = [
+            (subscriber, keys) for subscriber, keys in self.subscribers if subscriber != callback
+        ]
+
+    def reload(self) -> dict[str, Any]:
+        """
+        Reload the configuration from the TOML file.
+
+        Returns:
+            dict[str, Any]: The settings that changed, by attribute.
+        """
+        old = self.values()
+        self._load()
+        new = self.values()
+        changed = {key: value for key, value in new.items() if old.get(key) != value}
+        if not changed:
+            return changed
+
+        logger.info(f"Config reloaded, changed: {', '.join(changed)}")
+        self._notify(changed)
+        return changed
+
+    def _notify(self, changed: dict[str, Any]) -> None:
+        """Calls the subscribers whose keys are among the changed settings."""
+        for callback, keys in list(self.subscribers):
+            if keys is None:
+                callback(changed)
+            elif keys & changed.keys():
+                callback({key: changed[key] for key in keys & changed.keys()})
+
+    def set_theme(self, name: str) -> None:
+        """
+        Switches to stellar/themes/<name>.toml for this session.
+
+        Cells store palette indices, so subscribers to "theme" only need to swap
+        in the new palette and repaint; nothing in the scrollback changes.
+
+        Args:
+            name (str): The theme's file name without extension.
+        """
+        path = THEMES_DIR / f"{name}.toml"
+        theme = Theme(str(path))
+        self.theme_override = path
+        self.theme_path = path
+        self.stamps = (self.stamps[0], file_stamp(path))
+        self.theme = theme
+        self.theme_name = name
+        self.text_color = theme.get_default_fg()
+        self.bg_color = theme.get_default_bg()
+        self._notify({"theme": theme.colors, "theme_name": name})
+
+    def check_for_changes(self) -> bool:
+        """
+        Reloads if config.toml or the theme file changed on disk.
+
+        Cheap enough to call from an event loop timer: it only stats two files.
+
+        Returns:
+            bool: Whether a reload happened.
+        """
+        try:
+            stamps = (file_stamp(self.config_path), file_stamp(self.theme_path))
+        except OSError:
+            return False  # Mid-save; try again on the next check
+        if stamps == self.stamps:
+            return False
+        try:
+            self.reload()
+        except (OSError, KeyError, ValueError) as e:  # TomlDecodeError is a ValueError
+            # Keep the previous settings until the file is valid again
+            logger.error(f"Failed to reload config: {e}")
+            self.stamps = stamps
+            return False
+        return True
+
+    def watch(self, interval: float = 1.0) -> None:
+        """
+        Polls the config and theme files on a daemon thread and hot-reloads them.
+
+        Subscribers are called on the watcher thread; GUI code should hand the
+        change to its event loop (or call check_for_changes() from a timer instead).
 
-        # Prompt settings
-        self.prompt_format = self.config["prompt"].get("format", "")
-        self.prompt_time_format = self.config["prompt"]["time_format"]
+        Args:
+            interval (float): Seconds between checks.
+        """
+        if self._watcher is not None:
+            return
+        self._stop_watching.clear()
 
-        # Cursor settings
-        self.cursor_blink_interval = self.config["cursor"]["blink_interval"]
-        self.cursor_type = self.config["cursor"]["type"]
+        def poll() -> None:
+            while not self._stop_watching.wait(interval):
+                self.check_for_changes()
 
-        # GUI
-        self.gui_engine = self.config["gui"]["engine"]
+        self._watcher = threading.Thread(target=poll, name="config-watcher", daemon=True)
+        self._watcher.start()
 
-    def reload(self):
-        """Reload the configuration from the TOML file"""
-        self.__init__()
+    def stop_watching(self) -> None:
+        self._stop_watching.set()
+        self._watcher = None
 
     def validate(self):
         """Validate that the values for the config make sense"""
@@ -56,5 +323,5 @@ class Config:
 config = Config()
 
 if __name__ == "__main__":
-    config = Config()
     config._print()
+    config.theme.print_theme_table()
@@ -1,20 +1,92 @@
-from tabulate import tabulate
-import toml
 import logging
+from functools import lru_cache
 
 from stellar.components.ansi import ANSI_COLORS
 
+# Palette layout: 0-15 ANSI colors, 16-255 the xterm 256-color table, then the
+# theme's default colors. Cells store these indices (or an RGB tuple for
+# truecolor), so switching themes only swaps the table.
+DEFAULT_FG = 256
+DEFAULT_BG = 257
+PALETTE_SIZE = 258
+
+ANSI_ORDER = (
+    ANSI_COLORS.BLACK,
+    ANSI_COLORS.RED,
+    ANSI_COLORS.GREEN,
+    ANSI_COLORS.YELLOW,
+    ANSI_COLORS.BLUE,
+    ANSI_COLORS.MAGENTA,
+    ANSI_COLORS.CYAN,
+    ANSI_COLORS.WHITE,
+)
+
+
+@lru_cache(maxsize=1024)
+def parse_hex(hex_color: str) -> tuple[int, int, int]:
+    """Parses "#rrggbb" into an RGB tuple; cached, as themes repeat colors."""
+    hex_color = hex_color.lstrip("#")
+    return tuple(int(hex_color[i : i + 2], 16) for i in (0, 2, 4))
+
+
+def xterm_color(index: int) -> tuple[int, int, int]:
+    """Returns the stock RGB value of an entry of the 6x6x6 cube or gray ramp."""
+    if index < 232:
+        index -= 16
+        return (index // 36 * 51, index // 6 % 6 * 51, index % 6 * 51)
+    gray = 8 + (index - 232) * 10
+    return (gray, gray, gray)
+
 
 class Theme:
-    def __init__(self, theme_file: str = "stellar/themes/tokyonight.toml"):
+    def __init__(
+        self,
+        theme_file: str = "stellar/themes/tokyonight.toml",
+        colors: dict[str, dict] | None = None,
+    ):
         """
         Initializes the Theme class by loading the theme from a .toml file.
 
         Args:
             theme_file (str): Path to the theme file.
+            colors (dict[str, dict] | None): Already loaded color mappings (e.g. from
+                the config snapshot cache); the file is only read when omitted.
         """
         self.theme_file = theme_file
-        self.colors = self.load_theme()
+        self.colors = colors if colors is not None else self.load_theme()
+        self.indexed_colors = {
+            color.get("index"): color.get("color", "#FFFFFF")
+            for color in self.colors.get("indexed_colors", [])
+        }
+        self.palette = self.compile_palette()
+
+    def compile_palette(self) -> tuple[tuple[int, int, int], ...]:
+        """
+        Builds the dense color table indexed by palette index.
+
+        Returns:
+            tuple[tuple[int, int, int], ...]: PALETTE_SIZE RGB tuples.
+        """
+        palette = [parse_hex(self.get_normal_color(color)) for color in ANSI_ORDER]
+        palette += [parse_hex(self.get_bright_color(color)) for color in ANSI_ORDER]
+        for index in range(16, 256):
+            color = self.indexed_colors.get(index)
+            palette.append(parse_hex(color) if color else xterm_color(index))
+        palette.append(parse_hex(self.get_default_fg()))
+        palette.append(parse_hex(self.get_default_bg()))
+        return tuple(palette)
+
+    def resolve(self, color: int | tuple[int, int, int]) -> tuple[int, int, int]:
+        """
+        Resolves a cell color: a palette index, or an RGB tuple for truecolor.
+
+        Args:
+            color (int | tuple[int, int, int]): The stored color.
+
+        Returns:
+            tuple[int, int, int]: The RGB value under this theme.
+        """
+        return self.palette[color] if color.__class__ is int else color
 
     def load_theme(self) -> dict[str, dict]:
         """
@@ -23,6 +95,8 @@ class Theme:
         Returns:
             dict: A dictionary containing theme color categories.
         """
+        import toml  # Deferred: themes are usually restored from the config snapshot
+
         try:
             with open(self.theme_file, "r") as f:
                 theme_data = toml.load(f)
@@ -102,10 +176,7 @@ class Theme:
         Returns:
             str: The hex code of the indexed color or white if not found.
         """
-        for color in self.colors.get("indexed_colors", []):
-            if color.get("index") == index:
-                return color.get("color", "#FFFFFF")
-        return "#FFFFFF"  # Default to white if index not found
+        return self.indexed_colors.get(index, "#FFFFFF")  # Default to white if not found
 
     def hex_to_rgb(self, hex_color: str) -> tuple[int, int, int]:
         """
@@ -117,8 +188,7 @@ class Theme:
         Returns:
             tuple: A tuple of integers representing the RGB color (R, G, B).
         """
-        hex_color = hex_color.lstrip("#")
-        return tuple(int(hex_color[i : i + 2], 16) for i in (0, 2, 4))
+        return parse_hex(hex_color)
 
     def rgb_color(self, hex_color: str) -> tuple[int, int, int]:
         """
@@ -159,6 +229,9 @@ class Theme:
         """
         Prints a table displaying the normal and bright colors in the theme using ANSI color blocks.
         """
+        # Only needed for this debugging aid, so kept off the startup path
+        from tabulate import tabulate
+
         headers = ["Color Name", "Normal Color (Hex)", "Bright Color (Hex)"]
         table = []
 
@@ -1,5 +1,159 @@
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+import os
+import queue
+from collections import deque
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Iterable
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(funcName)s:%(lineno)d] - %(message)s"
+
+# Hot-path tracers are children of this logger, one per subsystem
+TRACE_ROOT = "stellar.trace"
+# Subsystems with tracing calls: PTY reads and writes, escape parsing, rendering, keys
+TRACE_SUBSYSTEMS = ("pty", "parser", "render", "input")
+
+
+class RingBufferHandler(logging.Handler):
+    """
+    Keeps the most recent log records in memory.
+
+    Runs on the listener thread like the other handlers, so it adds nothing to
+    the logging call itself. Useful for dumping the trace leading up to a bug.
+    """
+
+    def __init__(self, capacity: int = 2000) -> None:
+        super().__init__()
+        self.records: deque[logging.LogRecord] = deque(maxlen=capacity)
+        self.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append(record)
+
+    def dump(self, name: str | None = None) -> list[str]:
+        """
+        Formats the buffered records.
+
+        Args:
+            name (str | None): Only records from this logger or its children.
+
+        Returns:
+            list[str]: The formatted records, oldest first.
+        """
+        return [
+            self.format(record)
+            for record in list(self.records)
+            if name is None or record.name == name or record.name.startswith(name + ".")
+        ]
+
+
+recent = RingBufferHandler()
+_queue_handlers: dict[str, QueueHandler] = {}
+_listeners: list[QueueListener] = []
+
+
+def _start_listener(key: str, *handlers: logging.Handler) -> QueueHandler:
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    listener = QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+    _listeners.append(listener)
+    handler = QueueHandler(records)
+    _queue_handlers[key] = handler
+    return handler
+
+
+def queue_handler(log_file: str) -> QueueHandler:
+    """
+    Returns the QueueHandler that feeds `log_file`, starting its writer on first use.
+
+    Loggers only put records on a queue; a QueueListener thread formats them,
+    writes the rotating file and copies them into `recent`.
+
+    Args:
+        log_file (str): The log file the records end up in.
+
+    Returns:
+        QueueHandler: The handler to attach to a logger.
+    """
+    handler = _queue_handlers.get(log_file)
+    if handler is None:
+        file_handler = RotatingFileHandler(log_file, maxBytes=1024 * 1024, backupCount=3)
+        file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        handler = _start_listener(log_file, file_handler, recent)
+    return handler
+
+
+def console_handler() -> QueueHandler:
+    """Returns the QueueHandler whose writer thread prints records to stderr."""
+    handler = _queue_handlers.get("<console>")
+    if handler is None:
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        handler = _start_listener("<console>", stream_handler)
+    return handler
+
+
+def setup_logging(log_file: str = "stellar.log", level: int = logging.INFO) -> None:
+    """
+    Routes the `stellar.*` module loggers through the background writer.
+
+    Safe to call more than once. Tracing starts with the subsystems listed in
+    the STELLAR_TRACE environment variable (comma separated), if any.
+
+    Args:
+        log_file (str): The log file for module loggers.
+        level (int): The level for module loggers; tracers are enabled separately.
+    """
+    package = logging.getLogger("stellar")
+    handler = queue_handler(log_file)
+    if handler not in package.handlers:
+        package.addHandler(handler)
+        package.setLevel(level)
+        # Don't also reach handlers an application put on the root logger
+        package.propagate = False
+        atexit.register(stop_logging)
+        traced = os.environ.get("STELLAR_TRACE", "")
+        enable_tracing(*(name.strip() for name in traced.split(",") if name.strip()))
+
+
+def stop_logging() -> None:
+    """Flushes the queues and stops the writer threads."""
+    while _listeners:
+        _listeners.pop().stop()
+    _queue_handlers.clear()
+
+
+def tracer(subsystem: str) -> logging.Logger:
+    """
+    Returns the tracer for a hot-path subsystem.
+
+    Tracers log at DEBUG and are disabled until enable_tracing() is called, so a
+    call like `trace.debug("read %r", data)` costs one cached level check.
+    Always pass arguments instead of pre-formatting the message.
+
+    Args:
+        subsystem (str): One of TRACE_SUBSYSTEMS, or any other name.
+    """
+    return logging.getLogger(f"{TRACE_ROOT}.{subsystem}")
+
+
+def enable_tracing(*subsystems: str) -> None:
+    """Turns on tracing for the given subsystems; takes effect immediately."""
+    for subsystem in subsystems:
+        tracer(subsystem).setLevel(logging.DEBUG)
+
+
+def disable_tracing(*subsystems: str) -> None:
+    """Turns tracing off again for the given subsystems."""
+    for subsystem in subsystems:
+        tracer(subsystem).setLevel(logging.NOTSET)
+
+
+def set_tracing(subsystems: Iterable[str]) -> None:
+    """Traces exactly the given subsystems, e.g. after a config reload."""
+    subsystems = set(subsystems)
+    disable_tracing(*(name for name in TRACE_SUBSYSTEMS if name not in subsystems))
+    enable_tracing(*subsystems)
 
 
 class StellarLogger(logging.Logger):
@@ -7,29 +161,16 @@ class StellarLogger(logging.Logger):
         """
         Custom logger class that inherits from logging.Logger.
 
+        Records are handed to a background writer (see queue_handler()), so
+        logging never blocks the caller on file or console I/O.
+
         Args:
             name (str): The name of the logger.
             log_file (str): The log file path. Defaults to "stellar.log".
-            level (int): The logging level. Defaults to logging.DEBUG.
+            level (int): The logging level. Defaults to logging.INFO.
         """
         # Call the parent class (Logger) __init__ method
         super().__init__(name, level)
-
-        # Create handlers: Console and File handlers
-        console_handler = logging.StreamHandler()  # Output logs to console
-        file_handler = RotatingFileHandler(
-            log_file, maxBytes=1024 * 1024, backupCount=3
-        )  # Output logs to a rotating file
-
-        # Define log format
-        formatter = logging.Formatter(
-            "%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(funcName)s:%(lineno)d] - %(message)s"
-        )
-
-        # Attach formatters to handlers
-        console_handler.setFormatter(formatter)
-        file_handler.setFormatter(formatter)
-
-        # Add handlers to the logger instance (self)
-        self.addHandler(console_handler)
-        self.addHandler(file_handler)
+        setup_logging()
+        self.addHandler(console_handler())
+        self.addHandler(queue_handler(log_file))
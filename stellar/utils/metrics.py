@@ -0,0 +1,176 @@
+"""
+Frame and pipeline timing.
+
+Every stage of getting output on screen records its duration into a
+fixed-bucket histogram, so recording is O(1) with constant memory however long
+the session runs, and percentiles are read from the buckets:
+
+    read    PTY reads            decode  UTF-8 decoding
+    parse   escape tokenizing    screen  screen model update
+    layout  building the frame   paint   drawing/presenting it
+
+Counters track bytes in, frames presented and frames skipped (output that was
+processed without a repaint, e.g. while scrolled back).
+"""
+
+import atexit
+import json
+import logging
+import time
+from array import array
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Iterator
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("read", "decode", "parse", "screen", "layout", "paint")
+COUNTERS = ("bytes_in", "frames_presented", "frames_skipped")
+
+# Bucket upper bounds in seconds: four per power of two from 1 us to ~17 s,
+# so a percentile is accurate to within 19%
+BUCKET_BOUNDS = tuple(1e-6 * 2 ** (i / 4) for i in range(97))
+
+
+class Histogram:
+    """
+    Durations counted into fixed logarithmic buckets.
+
+    Attributes:
+        counts (array): Samples per bucket; the last bucket takes everything longer.
+        count (int): Samples recorded.
+        total (float): Sum of the samples in seconds.
+        max (float): The longest sample in seconds.
+    """
+
+    def __init__(self) -> None:
+        self.counts = array("Q", bytes(8 * (len(BUCKET_BOUNDS) + 1)))
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.counts[bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q: float) -> float:
+        """
+        Returns the upper bound of the bucket holding the q-th percentile.
+
+        Args:
+            q (float): The percentile, between 0 and 100.
+
+        Returns:
+            float: Seconds, or 0.0 without samples.
+        """
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return BUCKET_BOUNDS[bucket] if bucket < len(BUCKET_BOUNDS) else self.max
+        return self.max
+
+    def summary(self) -> dict[str, float | int]:
+        """Returns count, mean, p50, p95, p99 and max, in milliseconds."""
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "p50_ms": self.percentile(50) * 1000,
+            "p95_ms": self.percentile(95) * 1000,
+            "p99_ms": self.percentile(99) * 1000,
+            "max_ms": self.max * 1000,
+        }
+
+
+class Metrics:
+    """
+    Per-stage histograms and counters for one terminal session.
+
+    Stages are recorded from whichever thread runs them (reads and decoding may
+    be on the PTY thread); each stage is only ever recorded from one thread.
+    """
+
+    def __init__(self) -> None:
+        self.started = time.monotonic()
+        self.reset()
+
+    def reset(self) -> None:
+        self.histograms = {stage: Histogram() for stage in STAGES}
+        self.counters = dict.fromkeys(COUNTERS, 0)
+
+    def record(self, stage: str, seconds: float) -> None:
+        self.histograms[stage].record(seconds)
+
+    def count(self, counter: str, n: int = 1) -> None:
+        self.counters[counter] += n
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        """Times the enclosed block as one sample of `stage`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.histograms[stage].record(time.perf_counter() - start)
+
+    def snapshot(self) -> dict:
+        """
+        Returns everything recorded so far as plain data.
+
+        Returns:
+            dict: {"elapsed_s", "counters", "stages": {stage: Histogram.summary()}}.
+        """
+        return {
+            "elapsed_s": time.monotonic() - self.started,
+            "counters": dict(self.counters),
+            "stages": {stage: h.summary() for stage, h in self.histograms.items()},
+        }
+
+    def write_json(self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+    def dump_on_exit(self, path: str) -> None:
+        """Writes the snapshot to `path` as JSON when the interpreter exits."""
+
+        def dump() -> None:
+            try:
+                self.write_json(path)
+            except OSError as e:
+                logger.error(f"Could not write stats to {path}: {e}")
+
+        atexit.register(dump)
+
+    def format_lines(self) -> list[str]:
+        """Formats the snapshot as text lines for an on-screen display."""
+        snapshot = self.snapshot()
+        counters = snapshot["counters"]
+        lines = [
+            f"{'stage':<7}{'p50':>8}{'p95':>8}{'p99':>8}  ms",
+        ]
+        for stage, summary in snapshot["stages"].items():
+            lines.append(
+                f"{stage:<7}{summary['p50_ms']:8.2f}{summary['p95_ms']:8.2f}"
+                f"{summary['p99_ms']:8.2f}"
+            )
+        lines.append(
+            f"in {counters['bytes_in'] / 1024:.0f} KiB  frames"
+            f" {counters['frames_presented']} (+{counters['frames_skipped']} skipped)"
+        )
+        return lines
+
+
+metrics = Metrics()
+
+if __name__ == "__main__":
+    import random
+
+    for _ in range(10000):
+        metrics.record("paint", random.expovariate(1 / 0.004))
+    print("\n".join(metrics.format_lines()))
@@ -0,0 +1,119 @@
+"""
+Startup benchmark: import cost per engine and time to first prompt.
+
+Each run starts a fresh interpreter with `-X importtime` that imports the
+selected engine through the lazy registry, starts a shell in StellarPTY and
+waits until its first output has gone through the parser and screen model.
+The parent reports the wall-clock time to that point and the slowest imports.
+
+    python -m stellar.utils.startup [engine ...] [--runs N] [--top N]
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+
+READY = "stellar-ready"
+
+
+def child(engine: str) -> None:
+    """Runs inside the measured interpreter; prints READY after the first prompt."""
+    import select
+
+    from stellar.gui import load_engine
+
+    # The engine is imported first so shared modules are charged to it
+    load_engine(engine)
+    from stellar.gui.headless import HeadlessTerminal
+    from stellar.components.st_pty import StellarPTY
+
+    terminal = HeadlessTerminal()
+    stellar_pty = StellarPTY("/bin/bash")
+    stellar_pty.start(threaded=False)
+    while not stellar_pty.closed:
+        select.select([stellar_pty.master_fd], [], [])
+        output = stellar_pty.drain()
+        if output:
+            terminal.feed(output)
+            break
+    print(READY, flush=True)
+    terminal.close()
+
+
+def parse_importtime(stderr: str) -> list[tuple[int, int, str]]:
+    """
+    Parses `-X importtime` output.
+
+    Returns:
+        list[tuple[int, int, str]]: (self us, cumulative us, module) for top-level
+            imports, i.e. those not nested inside another import.
+    """
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        # Nested imports are indented below the module that triggered them
+        if name.startswith("  "):
+            continue
+        imports.append((int(self_us), int(cumulative_us), name.strip()))
+    return imports
+
+
+def measure(engine: str) -> tuple[float, list[tuple[int, int, str]]]:
+    """
+    Starts a fresh interpreter for `engine` and times it to the first prompt.
+
+    Returns:
+        tuple[float, list]: Seconds to first prompt and the top-level imports.
+    """
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-X", "importtime", "-m", "stellar.utils.startup", "--child", engine],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    for line in process.stdout:
+        if line.strip() == READY:
+            break
+    elapsed = time.perf_counter() - start
+    _, stderr = process.communicate()
+    if process.returncode:
+        raise RuntimeError(f"{engine} failed to start:\n{stderr[-2000:]}")
+    return elapsed, parse_importtime(stderr)
+
+
+def main() -> None:
+    from stellar.gui import GUI_ENGINES
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("engines", nargs="*", default=["headless"])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child)
+        return
+
+    for engine in args.engines:
+        if engine not in GUI_ENGINES:
+            parser.error(f"unknown engine {engine!r}")
+        try:
+            runs = [measure(engine) for _ in range(args.runs)]
+        except RuntimeError as e:
+            print(e)
+            continue
+        best, imports = min(runs, key=lambda run: run[0])
+        total = sum(cumulative for _, cumulative, _ in imports)
+        print(f"{engine}: first prompt in {best * 1000:.0f} ms (best of {args.runs}),"
+              f" imports {total / 1000:.0f} ms")
+        for _, cumulative, name in sorted(imports, reverse=True, key=lambda i: i[1])[: args.top]:
+            print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import pytest
+
+from stellar.components.ansi_parser import ANSIParser
+from stellar.settings.themes import DEFAULT_BG, DEFAULT_FG
+
+# What `clear` writes with TERM=xterm-256color
+CLEAR = "\x1b[H\x1b[2J\x1b[3J"
+
+
+@pytest.fixture
+def parser():
+    return ANSIParser()
+
+
+def text_of(tokens):
+    return "".join(text for text, _ in tokens if text is not None)
+
+
+def test_clear_output(parser):
+    parser.cursor_x, parser.cursor_y = 7, 3
+    tokens = parser.tokenize(f"a{CLEAR}b\n")
+    assert text_of(tokens) == "ab\n"
+    assert (parser.cursor_y, parser.cursor_x) == (0, 0)
+
+
+@pytest.mark.parametrize(
+    "sequence, position",
+    [
+        ("\x1b[H", (0, 0)),
+        ("\x1b[;5H", (0, 4)),
+        ("\x1b[3;H", (2, 0)),
+        ("\x1b[3H", (2, 0)),
+        ("\x1b[3;5H", (2, 4)),
+        ("\x1b[3;5f", (2, 4)),
+        ("\x1b[f", (0, 0)),
+    ],
+)
+def test_cursor_position_defaults(parser, sequence, position):
+    parser.cursor_x, parser.cursor_y = 9, 9
+    parser.tokenize(sequence)
+    assert (parser.cursor_y, parser.cursor_x) == position
+
+
+@pytest.mark.parametrize("sequence", ["\x1b[?25h", "\x1b[?1049h", "\x1b[>4;1m", "\x1b[?5H"])
+def test_private_sequences_are_ignored(parser, sequence):
+    tokens = parser.tokenize(f"x{sequence}y")
+    assert text_of(tokens) == "xy"
+
+
+def test_empty_params_yield_line_controls(parser):
+    tokens = parser.tokenize("ab\x1b[K\x1b[;3G\x1b[C\x1b[2D")
+    controls = [style for text, style in tokens if text is None]
+    assert controls == [("K", None), ("G", None), ("C", None), ("D", 2)]
+
+
+def test_sgr_with_empty_params(parser):
+    parser.tokenize("\x1b[1;31m")
+    assert parser.bold and parser.foreground_color == 1
+    parser.tokenize("\x1b[;m")
+    assert not parser.bold
+    assert (parser.foreground_color, parser.background_color) == (DEFAULT_FG, DEFAULT_BG)
+
+
+def test_style_key_changes_only_on_sgr(parser):
+    before = parser.tokenize("a")[0][1]
+    assert parser.tokenize("\x1b[Hb")[0][1] == before
+    after = [style for text, style in parser.tokenize("\x1b[32mc") if text][0]
+    assert after != before
+
+
+def test_title_and_cwd_are_stripped(parser):
+    tokens = parser.tokenize("\x1b]0;my title\x07\x1b]7;file://host/tmp\x07$ ")
+    assert text_of(tokens) == "$ "
+    assert parser.get_terminal_title() == "my title"
+    assert parser.get_current_working_directory() == "host/tmp"
@@ -0,0 +1,97 @@
+import os
+import sys
+import textwrap
+
+import pytest
+
+from stellar.plugins.manager import PluginManager, scan_plugin
+
+PLUGINS = {
+    "direct": """
+        from stellar.plugins.base import StellarPlugin
+
+        class Direct(StellarPlugin):
+            def on_input(self, key):
+                self.keys = [key]
+
+            def cleanup(self):
+                pass
+    """,
+    "indirect": """
+        from scanned.direct import Direct
+
+        class Indirect(Direct):
+            def on_render(self):
+                pass
+    """,
+    "aliased": """
+        from stellar.plugins.base import StellarPlugin as Plugin
+
+        class Aliased(Plugin):
+            def initialize(self, emulator):
+                self.emulator = emulator
+
+            def cleanup(self):
+                pass
+    """,
+    "helper": """
+        class Helper(dict):
+            pass
+    """,
+}
+
+
+@pytest.fixture
+def plugin_dir(tmp_path, monkeypatch):
+    package = tmp_path / "scanned"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    for name, source in PLUGINS.items():
+        (package / f"{name}.py").write_text(textwrap.dedent(source))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield package
+    for name in [name for name in sys.modules if name.startswith("scanned")]:
+        del sys.modules[name]
+
+
+def scan(plugin_dir, name):
+    path = str(plugin_dir / f"{name}.py")
+    stat = os.stat(path)
+    return scan_plugin(path, f"scanned.{name}", (stat.st_mtime_ns, stat.st_size))
+
+
+def test_direct_subclass_is_scanned_without_import(plugin_dir):
+    manifest = scan(plugin_dir, "direct")
+    assert (manifest.class_name, manifest.hooks, manifest.eager) == ("Direct", ["on_input"], False)
+    assert "scanned.direct" not in sys.modules
+
+
+def test_indirect_subclass_is_inspected(plugin_dir):
+    manifest = scan(plugin_dir, "indirect")
+    # Inherited hooks count too
+    assert manifest.class_name == "Indirect"
+    assert manifest.hooks == ["on_input", "on_render"] and not manifest.eager
+
+
+def test_aliased_base_is_inspected(plugin_dir):
+    manifest = scan(plugin_dir, "aliased")
+    assert (manifest.class_name, manifest.hooks, manifest.eager) == ("Aliased", [], True)
+
+
+def test_module_without_plugin(plugin_dir):
+    assert scan(plugin_dir, "helper") is None
+
+
+def test_indirect_subclass_is_loaded_on_dispatch(plugin_dir):
+    manager = PluginManager()
+    manifest = scan(plugin_dir, "indirect")
+    manager.manifests["indirect"] = manifest
+    manager.plugin_modules["indirect"] = manifest.module
+    manager.rebuild_dispatch()
+    manager.initialize_plugins(emulator=None)
+    assert "indirect" not in manager.plugins
+
+    manager.handle_input("a")
+    plugin = manager.plugins["indirect"]
+    assert type(plugin).__name__ == "Indirect" and plugin.keys == ["a"]
+    manager.cleanup_plugins()
@@ -0,0 +1,182 @@
+import threading
+import time
+
+import pytest
+
+from stellar.plugins import streams
+from stellar.plugins.base import StellarPlugin
+from stellar.plugins.manager import PluginManager
+from stellar.plugins.streams import OutputDispatcher, OutputStream
+
+
+class ManualExecutor:
+    """Runs submitted work only when the test says so."""
+
+    def __init__(self):
+        self.tasks = []
+
+    def submit(self, fn):
+        self.tasks.append(fn)
+
+    def run(self):
+        while self.tasks:
+            self.tasks.pop(0)()
+
+
+class Recorder(StellarPlugin):
+    output_queue_size = 2
+
+    def __init__(self, overflow="coalesce", cpu_budget=0.1, burn=0.0):
+        self.output_overflow = overflow
+        self.output_cpu_budget = cpu_budget
+        self.burn = burn
+        self.chunks = []
+
+    def on_output(self, text):
+        self.chunks.append(text)
+        start = time.thread_time()
+        while time.thread_time() - start < self.burn:
+            pass
+
+    def cleanup(self):
+        pass
+
+
+def fill(stream, chunks="abcd"):
+    for chunk in chunks:
+        stream.put(chunk)
+
+
+@pytest.mark.parametrize(
+    "overflow, delivered, counter",
+    [
+        ("coalesce", ["a", "bcd"], "coalesced"),
+        ("drop_oldest", ["c", "d"], "dropped"),
+        ("drop_newest", ["a", "b"], "dropped"),
+    ],
+)
+def test_overflow_policies(overflow, delivered, counter):
+    plugin = Recorder(overflow)
+    executor = ManualExecutor()
+    stream = OutputStream("recorder", plugin, executor)
+    fill(stream)
+    # One drain is scheduled however many chunks are queued
+    assert len(executor.tasks) == 1
+    assert stream.stats()[counter] == 2
+
+    executor.run()
+    assert plugin.chunks == delivered
+    stats = stream.stats()
+    assert stats["calls"] == 2 and stats["queued"] == 0
+
+
+def test_coalesced_chunk_is_bounded(monkeypatch):
+    monkeypatch.setattr(streams, "COALESCE_LIMIT", 5)
+    plugin = Recorder("coalesce")
+    executor = ManualExecutor()
+    stream = OutputStream("recorder", plugin, executor)
+    fill(stream, ["a", "bc", "def", "ghij", "klmnopq"])
+    assert stream.stats()["truncated"] == 11
+
+    executor.run()
+    assert plugin.chunks == ["a", "mnopq"]
+
+
+def test_unknown_policy_falls_back_to_coalesce():
+    stream = OutputStream("recorder", Recorder("explode"), ManualExecutor())
+    assert stream.policy == "coalesce"
+
+
+def test_drain_yields_after_a_batch():
+    plugin = Recorder()
+    plugin.output_queue_size = streams.BATCH_SIZE * 2
+    executor = ManualExecutor()
+    stream = OutputStream("recorder", plugin, executor)
+    fill(stream, [str(i) for i in range(streams.BATCH_SIZE + 1)])
+
+    executor.tasks.pop(0)()
+    assert len(plugin.chunks) == streams.BATCH_SIZE
+    # The rest is resubmitted behind other streams' work
+    executor.run()
+    assert plugin.chunks == [str(i) for i in range(streams.BATCH_SIZE + 1)]
+
+
+def test_plugin_errors_are_counted():
+    class Failing(Recorder):
+        def on_output(self, text):
+            raise RuntimeError(text)
+
+    executor = ManualExecutor()
+    stream = OutputStream("failing", Failing(), executor)
+    fill(stream, "ab")
+    executor.run()
+    assert stream.stats()["errors"] == 2
+
+
+def test_throttle_and_resume(monkeypatch):
+    monkeypatch.setattr(streams, "BUDGET_WINDOW", 0.2)
+    plugin = Recorder("coalesce", cpu_budget=0.01, burn=0.005)
+    executor = ManualExecutor()
+    stream = OutputStream("slow", plugin, executor)
+    fill(stream, "ab")
+
+    executor.run()
+    # The first call used the 2 ms budget; the second chunk waits for the next window
+    assert plugin.chunks == ["a"]
+    stats = stream.stats()
+    assert stats["throttled"] == 1 and stats["queued"] == 1
+    # Output arriving meanwhile is queued without scheduling a drain
+    stream.put("c")
+    assert not executor.tasks
+
+    deadline = time.monotonic() + 2
+    while not executor.tasks and time.monotonic() < deadline:
+        time.sleep(0.01)
+    executor.run()
+    assert plugin.chunks[:2] == ["a", "b"]
+
+
+def test_closed_stream_ignores_output():
+    executor = ManualExecutor()
+    stream = OutputStream("recorder", Recorder(), executor)
+    stream.close()
+    stream.put("a")
+    assert not executor.tasks and stream.stats()["queued"] == 0
+
+
+def test_dispatcher_retains_loaded_plugins():
+    dispatcher = OutputDispatcher(max_workers=1)
+    try:
+        first = dispatcher.stream("one", Recorder())
+        assert dispatcher.stream("one", first.plugin) is first
+        dispatcher.stream("two", Recorder())
+        dispatcher.retain({"two"})
+        assert set(dispatcher.stats()) == {"two"}
+        assert first.closed
+    finally:
+        dispatcher.shutdown()
+
+
+def test_manager_delivers_output_off_thread():
+    class Threads(Recorder):
+        def on_output(self, text):
+            super().on_output(threading.current_thread().name)
+            done.set()
+
+    done = threading.Event()
+    manager = PluginManager()
+    plugin = Threads()
+    manager.plugin_modules["threads"] = "threads"
+    manager.plugins["threads"] = plugin
+    manager.rebuild_dispatch()
+    try:
+        manager.handle_output("hello")
+        assert done.wait(2)
+        assert plugin.chunks[0].startswith("plugin-output")
+        deadline = time.monotonic() + 2
+        while manager.output_stats()["threads"]["calls"] < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert manager.output_stats()["threads"]["calls"] == 1
+    finally:
+        manager.cleanup_plugins()
+        manager.output.shutdown()
@@ -0,0 +1,92 @@
+import pytest
+
+from stellar.components.ansi_parser import ANSIParser
+from stellar.components.scrollback import Scrollback
+from stellar.components.screen import CurrentLine, Screen
+
+
+def written(text, cursor=None):
+    line = CurrentLine()
+    line.write(text, "s")
+    if cursor is not None:
+        line.cursor = cursor
+    return line
+
+
+def test_carriage_return_overwrites():
+    line = written("downloading 10%")
+    line.carriage_return()
+    line.write("downloading 100%", "s")
+    assert line.snapshot().text == "downloading 100%"
+
+
+def test_backspace():
+    line = written("abc")
+    line.backspace()
+    line.backspace()
+    line.write("X", "t")
+    assert line.snapshot().text == "aXc"
+    assert line.snapshot().runs == ((1, "s"), (1, "t"), (1, "s"))
+    line.cursor = 0
+    line.backspace()
+    assert line.cursor == 0
+
+
+@pytest.mark.parametrize(
+    "mode, text",
+    [(0, "hel"), (1, "    o world"), (2, "")],
+)
+def test_erase_in_line(mode, text):
+    line = written("hello world", cursor=3)
+    line.control("K", mode or None)
+    assert line.snapshot().text == text
+    assert line.cursor == 3
+
+
+@pytest.mark.parametrize(
+    "command, n, cursor",
+    [("C", None, 5), ("C", 3, 7), ("D", None, 3), ("D", 9, 0), ("G", None, 0), ("G", 2, 1)],
+)
+def test_cursor_controls(command, n, cursor):
+    line = written("hello", cursor=4)
+    line.control(command, n)
+    assert line.cursor == cursor
+
+
+def test_write_past_end_pads():
+    line = written("ab")
+    line.control("C", 2)
+    line.write("c", "s")
+    line.tab()
+    line.write("d", "s")
+    assert line.snapshot().text == "ab  c   d"
+
+
+def feed(screen, parser, text):
+    return screen.feed(parser.tokenize(text))
+
+
+def test_screen_commits_on_line_feed():
+    scrollback = Scrollback()
+    screen = Screen(scrollback, rows=5, cols=40)
+    parser = ANSIParser()
+
+    assert feed(screen, parser, "10%\r20%\r\x1b[31m100%\x1b[0m\ndone") == 1
+    assert scrollback.get_line(0).text == "100%"
+    assert screen.live_line.text == "done"
+
+    assert feed(screen, parser, "\r\x1b[2Kprompt$ ls\b\bcd\n") == 1
+    assert len(scrollback) == 2
+    assert scrollback.get_line(1).text == "prompt$ cd"
+
+
+def test_screen_handles_clear_output():
+    scrollback = Scrollback()
+    screen = Screen(scrollback, rows=5, cols=40)
+    parser = ANSIParser()
+
+    feed(screen, parser, "old\n")
+    scrollback.clear()
+    assert feed(screen, parser, "\x1b[H\x1b[2J\x1b[3Jnew\n") == 1
+    assert [line.text for line in scrollback.iter_lines()] == ["new"]
+    assert screen.visible_lines()[0].text == "new"
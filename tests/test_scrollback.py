@@ -0,0 +1,113 @@
+import os
+
+import pytest
+
+from stellar.components.scrollback import CODECS, Scrollback, ScrollbackBlock, ScrollbackLine
+
+BOLD = (1, 0, True, False, False)
+RED = (1, 0, False, False, False)
+
+
+def make_line(i):
+    text = f"line {i:04d} some output"
+    return text, ((9, BOLD), (len(text) - 9, RED if i % 2 else None))
+
+
+def fill(scrollback, count):
+    for i in range(count):
+        scrollback.append(*make_line(i))
+
+
+def expected(i):
+    text, runs = make_line(i)
+    return ScrollbackLine(text, runs)
+
+
+@pytest.mark.parametrize("codec", sorted(CODECS))
+def test_block_round_trip(codec):
+    lines = [expected(i) for i in range(10)]
+    block = ScrollbackBlock.pack(100, lines, codec)
+    assert (block.first_line, block.line_count) == (100, 10)
+    assert block.unpack() == lines
+
+
+@pytest.mark.parametrize("codec", sorted(CODECS))
+def test_round_trip_through_compressed_blocks(codec):
+    scrollback = Scrollback(hot_lines=4, block_lines=3, compression=codec, cache_blocks=1)
+    fill(scrollback, 50)
+
+    assert len(scrollback) == 50
+    assert scrollback.blocks and scrollback.cold_line_count + len(scrollback.hot) == 50
+    # Reads that jump between blocks go through the one-block cache
+    for i in (0, 49, 1, 25, 3, 2, 48, 30):
+        assert scrollback.get_line(i) == expected(i)
+    assert scrollback.get_line(-1) == expected(49)
+    assert scrollback.get_lines(2, 11) == [expected(i) for i in range(2, 11)]
+    assert scrollback.get_lines(40, 80) == [expected(i) for i in range(40, 50)]
+    assert list(scrollback.iter_lines()) == [expected(i) for i in range(50)]
+    with pytest.raises(IndexError):
+        scrollback.get_line(50)
+
+
+def test_unknown_codec():
+    with pytest.raises(ValueError):
+        Scrollback(compression="brotli")
+
+
+def test_round_trip_through_spilled_blocks(tmp_path):
+    scrollback = Scrollback(
+        hot_lines=4, block_lines=3, cache_blocks=1, spill=True, max_ram_blocks=2,
+        spill_dir=str(tmp_path),
+    )
+    fill(scrollback, 60)
+
+    assert scrollback.spilled_blocks > 0 and len(scrollback.blocks) == 2
+    assert os.path.exists(scrollback.spill.path)
+    assert list(scrollback.iter_lines()) == [expected(i) for i in range(60)]
+    assert scrollback.get_lines(0, 7) == [expected(i) for i in range(7)]
+    assert scrollback.memory_usage()["spilled_bytes"] > 0
+
+    paths = (scrollback.spill.path, scrollback.spill.index_path)
+    scrollback.close()
+    scrollback.close()
+    assert not any(os.path.exists(path) for path in paths)
+
+
+def test_keep_spill(tmp_path):
+    scrollback = Scrollback(
+        hot_lines=2, block_lines=2, spill=True, max_ram_blocks=1, spill_dir=str(tmp_path),
+        keep_spill=True,
+    )
+    fill(scrollback, 20)
+    scrollback.close()
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        os.path.basename(path) for path in (scrollback.spill.path, scrollback.spill.index_path)
+    )
+
+
+def test_listeners():
+    scrollback = Scrollback(hot_lines=2, block_lines=2)
+    appended, cleared = [], []
+    scrollback.add_listener(lambda index, text: appended.append((index, text)))
+    scrollback.add_clear_listener(lambda: cleared.append(len(scrollback)))
+
+    scrollback.append("a")
+    scrollback.append("b")
+    scrollback.clear()
+    assert cleared == [0]
+    assert scrollback.append("c") == 0
+    assert appended == [(0, "a"), (1, "b"), (0, "c")]
+
+
+def test_clear_drops_spilled_lines(tmp_path):
+    scrollback = Scrollback(
+        hot_lines=2, block_lines=2, spill=True, max_ram_blocks=1, spill_dir=str(tmp_path)
+    )
+    fill(scrollback, 20)
+    scrollback.clear()
+
+    assert len(scrollback) == 0 and scrollback.spill is None
+    assert os.listdir(tmp_path) == []
+    fill(scrollback, 12)
+    assert list(scrollback.iter_lines()) == [expected(i) for i in range(12)]
+    scrollback.close()
@@ -0,0 +1,63 @@
+import pytest
+
+from stellar.components.scrollback import Scrollback
+from stellar.components.search import ScrollbackSearch, SearchMatch, required_literal
+
+
+def run_search(search, pattern, **kwargs):
+    found, done = [], []
+    handle = search.search(
+        pattern, on_matches=found.extend, on_done=done.append, **kwargs
+    )
+    assert handle.wait(5)
+    assert done == [len(found)]
+    return found
+
+
+@pytest.fixture
+def scrollback():
+    scrollback = Scrollback(hot_lines=8, block_lines=8, cache_blocks=1)
+    yield scrollback
+    scrollback.close()
+
+
+def test_search_across_blocks(scrollback):
+    for i in range(200):
+        scrollback.append(f"line {i} {'ERROR disk full' if i % 50 == 7 else 'ok'}")
+    search = ScrollbackSearch(scrollback, chunk_lines=16)
+    # Lines appended after the index was built are indexed through the listener
+    scrollback.append("late ERROR here")
+
+    assert [m.line for m in run_search(search, "ERROR")] == [7, 57, 107, 157, 200]
+    assert run_search(search, "error", ignore_case=True)[0] == SearchMatch(7, 7, 12)
+    assert [m.line for m in run_search(search, r"line 1\d7 ERROR", regex=True)] == [107, 157]
+    assert run_search(search, "missing") == []
+
+
+def test_search_after_clear(scrollback):
+    for i in range(100):
+        scrollback.append(f"before {i}")
+    search = ScrollbackSearch(scrollback, chunk_lines=16)
+    assert len(run_search(search, "before")) == 100
+
+    scrollback.clear()
+    assert run_search(search, "before") == []
+
+    for i in range(3):
+        scrollback.append(f"after {i}")
+    assert [m.line for m in run_search(search, "after")] == [0, 1, 2]
+    assert run_search(search, "before") == []
+
+
+@pytest.mark.parametrize(
+    "pattern, literal",
+    [
+        ("error: .*", "error: "),
+        (r"\d+ files? changed", " changed"),
+        ("foo|bar", None),
+        ("[a-z]+", None),
+        ("(unbalanced", None),
+    ],
+)
+def test_required_literal(pattern, literal):
+    assert required_literal(pattern) == literal
@@ -0,0 +1,112 @@
+import re
+
+import pytest
+
+from stellar.components import triggers as triggers_module
+from stellar.components.scrollback import Scrollback
+from stellar.components.triggers import AhoCorasick, Trigger, TriggerEngine, needs_own_pattern
+
+
+def found(engine, text):
+    return [(start, end, trigger.pattern) for start, end, trigger in engine.scan(text)]
+
+
+def test_aho_corasick_overlapping():
+    automaton = AhoCorasick(["he", "she", "his", "hers", ""])
+    assert sorted(automaton.find("ushers")) == [(1, 4, 1), (2, 4, 0), (2, 6, 3)]
+    assert list(automaton.find("xyz")) == []
+    assert list(AhoCorasick([]).find("anything")) == []
+
+
+def test_literal_triggers():
+    engine = TriggerEngine([
+        Trigger("ERROR"),
+        Trigger("warning", ignore_case=True),
+        Trigger("Err"),
+    ])
+    assert found(engine, "Err: ERROR, Warning, WARNING") == [
+        (0, 3, "Err"), (5, 10, "ERROR"), (12, 19, "warning"), (21, 28, "warning"),
+    ]
+    assert found(engine, "error") == []
+
+
+def test_combined_regex_triggers():
+    engine = TriggerEngine([
+        Trigger(r"https?://\S+", regex=True, name="url"),
+        Trigger(r"(fail|error)ed", regex=True, ignore_case=True),
+    ])
+    assert engine.separate == [] and engine.regex is not None
+    assert found(engine, "see http://a.b FAILED") == [
+        (4, 14, r"https?://\S+"), (15, 21, "(fail|error)ed"),
+    ]
+
+
+@pytest.mark.parametrize(
+    "pattern, own",
+    [
+        ("warn", False),
+        ("(a|b)c", False),
+        ("(?i)error", True),
+        ("(?x) a b", True),
+        (r"(\w)\1", True),
+        (r"(?P<word>\w+) (?P=word)", True),
+        (r"(a)?(?(1)b|c)", True),
+    ],
+)
+def test_needs_own_pattern(pattern, own):
+    assert needs_own_pattern(pattern) == own
+
+
+def test_inline_flags_and_backreferences():
+    rules = [
+        Trigger("warn", regex=True),
+        Trigger("(?i)fault", regex=True),
+        Trigger(r"(\w)\1", regex=True),
+    ]
+    engine = TriggerEngine(rules)
+    assert [trigger for _, trigger in engine.separate] == rules[1:]
+
+    text = "hello aa Fault warn"
+    assert found(engine, text) == [
+        (2, 4, r"(\w)\1"), (6, 8, r"(\w)\1"), (9, 14, "(?i)fault"), (15, 19, "warn"),
+    ]
+    assert len(re.findall(r"(\w)\1", text)) == 2
+
+
+def test_combined_compile_error_falls_back(monkeypatch):
+    # Rules that only fail once combined, here through a clashing group name
+    monkeypatch.setattr(triggers_module, "needs_own_pattern", lambda pattern: False)
+    engine = TriggerEngine([
+        Trigger("(?P<n>a)b", regex=True),
+        Trigger("(?P<n>c)d", regex=True),
+    ])
+    assert engine.regex is None and len(engine.separate) == 2
+    assert found(engine, "ab cd") == [(0, 2, "(?P<n>a)b"), (3, 5, "(?P<n>c)d")]
+
+
+def test_invalid_rules_are_skipped():
+    engine = TriggerEngine([
+        Trigger("(unbalanced", regex=True),
+        Trigger("x", action="explode"),
+        Trigger("ok", regex=True),
+    ])
+    assert [trigger.pattern for trigger in engine.triggers] == ["(unbalanced", "ok"]
+    assert found(engine, "ok (unbalanced x") == [(0, 2, "ok")]
+
+
+def test_actions_fire_on_committed_lines():
+    scrollback = Scrollback()
+    engine = TriggerEngine(
+        [Trigger("ERROR", action="beep"), Trigger(r"\d+%", regex=True, action="capture")]
+    )
+    engine.attach(scrollback)
+    beeps = []
+    engine.on("beep", beeps.append)
+    engine.on("beep", lambda match: 1 / 0)
+
+    scrollback.append("progress 10%")
+    scrollback.append("ERROR at 99%")
+
+    assert [(m.line, m.text) for m in beeps] == [(1, "ERROR")]
+    assert [(m.line, m.text) for m in engine.captures] == [(0, "10%"), (1, "99%")]
+    assert (engine.lines_scanned, engine.matches_found) == (2, 3)